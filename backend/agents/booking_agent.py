@@ -1,6 +1,20 @@
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Optional, Any
+from agents import deadline
+from agents.credentials import pool_from_env
+from agents.hotel_ranking import HotelRanker, RELAXED_BUDGET_FACTORS
+from agents.records import HOTEL_SEARCH_FIELDS
+
+# Budgets tried by search_hotels_with_retry, answered from a single search:
+# 20% over, then the old 25% retry and its own 20% relaxation
+RETRY_BUDGET_FACTORS = (1.2, 1.25, 1.5)
+# Extra pages fetched when nothing fits even the widest budget
+RETRY_EXTRA_PAGES = 3
+# Paging stops early once this many in-budget hotels were seen and the
+# current top 3 all score at least EARLY_STOP_MIN_SCORE
+EARLY_STOP_CANDIDATES = 30
+EARLY_STOP_MIN_SCORE = 70
 
 def search_hotels(city: str, arrival: str, departure: str, price_max: int, **kwargs):
     """
@@ -8,7 +22,19 @@ def search_hotels(city: str, arrival: str, departure: str, price_max: int, **kwa
     
     Searches through multiple pages (up to 100 hotels) to find the best value hotels
     within the specified budget. Returns top 3 hotels.
+    
+    Pass ranking_profile ('value', 'luxury', 'family' or a dict of weights)
+    to change how hotels are scored, relax_factors for the budgets to fall back
+    to, and extra_pages to keep paging when nothing fits any budget yet.
+    min_review_score (0-10) and sort_by are sent to Booking.com with the price
+    bounds so fewer pages are needed. top_n changes how many hotels are returned.
     """
+    ranking_profile = kwargs.pop('ranking_profile', None)
+    relax_factors = tuple(kwargs.pop('relax_factors', RELAXED_BUDGET_FACTORS))
+    extra_pages = kwargs.pop('extra_pages', 0)
+    min_review_score = kwargs.pop('min_review_score', None)
+    sort_by = kwargs.pop('sort_by', None)
+    top_n = kwargs.pop('top_n', 3)
     print(f"🏨 Starting comprehensive hotel search for {city}...")
     print(f"   Budget: up to {price_max} EUR")
     print(f"   Dates: {arrival} to {departure}")
@@ -18,26 +44,33 @@ def search_hotels(city: str, arrival: str, departure: str, price_max: int, **kwa
         from agents.booking_client import BookingComAPI
         
         API_HOST = os.getenv("BOOKING_API_HOST", "booking-com15.p.rapidapi.com")
-        API_KEY = os.getenv("BOOKING_API_KEY")
+        credentials = pool_from_env("BOOKING_API_KEY")
         
-        if not API_HOST or not API_KEY:
+        if not API_HOST or not credentials:
             print("❌ Booking API credentials not set")
             return None
         
-        # Prepare parameters
+        ranker = HotelRanker(price_max, top_n=top_n, relax_factors=relax_factors, weights=ranking_profile)
+        
+        # Prepare parameters. The upstream price filter uses the widest budget
+        # so the fetched pages can answer every relaxed budget too.
         params = {
             'CITY_QUERY': city,
             'ARRIVAL_DATE': arrival,
             'DEPARTURE_DATE': departure,
-            'PRICE_MAX': price_max,
+            'PRICE_MAX': max(ranker.budgets),
             'ADULTS': kwargs.get('ADULTS', 2),
             'PRICE_MIN': kwargs.get('PRICE_MIN', 0)
         }
+        if min_review_score:
+            params['MIN_REVIEW_SCORE'] = min_review_score
+        if sort_by:
+            params['SORT_BY'] = sort_by
         
         # Add any additional parameters
         params.update(kwargs)
         
-        api_client = BookingComAPI(API_HOST, API_KEY, **params)
+        api_client = BookingComAPI(API_HOST, credentials, **params)
         
         # Step 1: Search destination
         if not api_client.search_destination():
@@ -46,36 +79,52 @@ def search_hotels(city: str, arrival: str, departure: str, price_max: int, **kwa
         
         # Step 2: Get filter data to see total available hotels (optional)
         filter_data = api_client.get_filters()
+        total_available = None
         if filter_data:
             total_available = filter_data.get('data', {}).get('pagination', {}).get('nbResultsTotal', 'Unknown')
             print(f"📊 Total hotels available in {city}: {total_available}")
         
-        # Step 3: Search multiple pages to get a comprehensive list
+        # Step 3 + 4: Search multiple pages and rank each page as it arrives.
+        # The ranker also keeps the best hotels for every relaxed budget,
+        # so falling back to one doesn't need a second pass or search.
         print("\n🔍 Searching multiple pages for the best deals...")
-        all_hotels = api_client.search_multiple_pages(max_pages=5, target_hotels=100)
+        for hotels in api_client.iter_hotel_pages(max_pages=5, target_hotels=100,
+                                                  fields=HOTEL_SEARCH_FIELDS):
+            ranker.add(hotels)
+            if ranker.is_saturated(EARLY_STOP_CANDIDATES, EARLY_STOP_MIN_SCORE):
+                print(f"✅ Enough good hotels within budget after page {api_client.LAST_PAGE}, stopping search.")
+                break
         
-        if not all_hotels:
+        more_available = not api_client.PAGES_EXHAUSTED and (
+            not isinstance(total_available, int) or ranker.hotels_seen < total_available)
+        if extra_pages and not ranker.best_tier()[1] and more_available:
+            print(f"\n🔍 Nothing within budget yet, fetching up to {extra_pages} more pages...")
+            for hotels in api_client.iter_hotel_pages(max_pages=extra_pages, target_hotels=None,
+                                                      start_page=api_client.LAST_PAGE + 1,
+                                                      fields=HOTEL_SEARCH_FIELDS):
+                ranker.add(hotels)
+                if ranker.best_tier()[1]:
+                    break
+        
+        if not ranker.hotels_seen:
             print(f"❌ No hotels found in {city}")
             return None
         
-        print(f"\n✅ Collected {len(all_hotels)} hotels for analysis")
+        print(f"\n✅ Ranked {ranker.hotels_seen} hotels")
         
-        # Step 4: Filter, analyze and rank hotels
-        filtered_hotels = filter_and_rank_hotels(all_hotels, price_max)
+        budget_used, filtered_hotels = ranker.best_tier()
         
         if not filtered_hotels:
-            print(f"❌ No hotels found within budget of {price_max} EUR")
-            # Try with a slightly higher budget
-            print(f"💡 Trying with 20% higher budget...")
-            filtered_hotels = filter_and_rank_hotels(all_hotels, int(price_max * 1.2))
-            
-            if not filtered_hotels:
-                return None
+            print(f"❌ No hotels found within budget of {price_max} EUR, even with budget up to {max(ranker.budgets)} EUR")
+            return None
+        
+        if budget_used != price_max:
+            print(f"💡 No hotels within budget of {price_max} EUR, using higher budget of {budget_used} EUR")
         
-        print(f"\n🎯 Found {len(filtered_hotels)} hotels within budget")
+        print(f"\n🎯 Kept the best {len(filtered_hotels)} hotels within budget")
         
-        # Step 5: Select the TOP 3 hotels based on value score
-        top_hotels = select_top_hotels(filtered_hotels, api_client, top_n=3)
+        # Step 5: Select the TOP N hotels based on value score
+        top_hotels = select_top_hotels(filtered_hotels, api_client, top_n=top_n)
         
         if not top_hotels:
             return None
@@ -89,7 +138,8 @@ def search_hotels(city: str, arrival: str, departure: str, price_max: int, **kwa
         return None
 
 
-def filter_and_rank_hotels(hotels: List[Dict], price_max: int) -> List[Dict]:
+def filter_and_rank_hotels(hotels: List[Dict], price_max: int,
+                           weights: Any = None) -> List[Dict]:
     """
     Filter hotels by budget and rank them by value score.
     
@@ -97,67 +147,15 @@ def filter_and_rank_hotels(hotels: List[Dict], price_max: int) -> List[Dict]:
     - Rating (review score)
     - Price (lower is better)
     - Amenities and features
-    """
-    filtered = []
-    
-    for hotel in hotels:
-        try:
-            # Extract price information
-            price_breakdown = hotel.get('property', {}).get('priceBreakdown', {}).get('grossPrice', {})
-            price = price_breakdown.get('value', 0)
-            currency = price_breakdown.get('currency', 'EUR')
-            
-            # Skip hotels without price or exceeding budget
-            if price == 0 or price > price_max:
-                continue
-            
-            # Extract rating
-            rating = hotel.get('property', {}).get('reviewScore', 0)
-            review_count = hotel.get('property', {}).get('reviewCount', 0)
-            
-            # Extract other features
-            property_data = hotel.get('property', {})
-            has_free_wifi = 'free wifi' in property_data.get('accessibilityLabel', '').lower()
-            has_breakfast = 'breakfast' in property_data.get('accessibilityLabel', '').lower()
-            
-            # Calculate value score
-            # Higher rating is better (weight: 40%)
-            rating_score = (rating / 10) * 40 if rating > 0 else 0
-            
-            # Lower price is better (weight: 30%)
-            price_score = (1 - (price / price_max)) * 30 if price_max > 0 else 0
-            
-            # More reviews indicate reliability (weight: 20%)
-            review_score = min(review_count / 100, 1) * 20
-            
-            # Amenities bonus (weight: 10%)
-            amenities_score = 0
-            if has_free_wifi:
-                amenities_score += 5
-            if has_breakfast:
-                amenities_score += 5
-            
-            total_value_score = rating_score + price_score + review_score + amenities_score
-            
-            filtered.append({
-                'hotel': hotel,
-                'price': price,
-                'currency': currency,
-                'rating': rating,
-                'review_count': review_count,
-                'value_score': total_value_score,
-                'has_wifi': has_free_wifi,
-                'has_breakfast': has_breakfast
-            })
-            
-        except Exception as e:
-            print(f"   Warning: Error processing hotel: {e}")
-            continue
-    
-    # Sort by value score (best value first)
-    filtered.sort(key=lambda x: x['value_score'], reverse=True)
     
-    return filtered
+    Weights come from a profile name or dict (see hotel_ranking.WEIGHT_PROFILES).
+    Returns every hotel within budget, best value first, as {'hotel':
+    HotelCandidate, 'value_score': float} dicts; use HotelRanker directly
+    when only the top few are needed.
+    """
+    ranker = HotelRanker(price_max, top_n=len(hotels), relax_factors=(), weights=weights)
+    ranker.add(hotels)
+    return ranker.ranked()
 
 
 def select_top_hotels(ranked_hotels: List[Dict], api_client: Any, top_n: int = 3) -> List[Dict]:
@@ -173,95 +171,88 @@ def select_top_hotels(ranked_hotels: List[Dict], api_client: Any, top_n: int = 3
     # Process top N hotels
     for i, hotel_data in enumerate(ranked_hotels[:top_n], 1):
         hotel = hotel_data['hotel']
-        hotel_id = hotel['hotel_id']
+        hotel_id = hotel.hotel_id
         
-        print(f"\n{i}. {hotel['property']['name']}")
-        print(f"   💰 Price: {hotel_data['price']} {hotel_data['currency']}")
-        print(f"   ⭐ Rating: {hotel_data['rating']}/10 ({hotel_data['review_count']} reviews)")
+        print(f"\n{i}. {hotel.name}")
+        print(f"   💰 Price: {hotel.price} {hotel.currency}")
+        print(f"   ⭐ Rating: {hotel.rating}/10 ({hotel.review_count} reviews)")
         print(f"   📊 Value Score: {hotel_data['value_score']:.1f}/100")
-        if hotel_data['has_wifi']:
+        if hotel.has_wifi:
             print(f"   📶 Free WiFi")
-        if hotel_data['has_breakfast']:
+        if hotel.has_breakfast:
             print(f"   🍳 Breakfast included")
         
         # Prepare the result
-        fallback_url = hotel['property'].get('url', f"https://www.booking.com/searchresults.html")
+        fallback_url = hotel.url or "https://www.booking.com/searchresults.html"
         
         result_data = {
             'destination': api_client.DESTINATION,
-            'hotel_name': hotel.get('property', {}).get('name', 'N/A'),
-            'hotel_description': hotel.get('accessibilityLabel', 'N/A'),
+            'hotel_name': hotel.name,
+            'hotel_description': hotel.description,
             'booking_hotel_id': hotel_id,
-            'hotel_photo_url': hotel.get('property', {}).get('photoUrls', []),
-            'rating': hotel_data['rating'],
-            'review_count': hotel_data['review_count'],
+            'hotel_photo_url': list(hotel.photo_urls),
+            'rating': hotel.rating,
+            'review_count': hotel.review_count,
             'room_photo_url': 'N/A',
             'booking_url': fallback_url,
-            'price': hotel_data['price'],
-            'currency': hotel_data['currency'],
+            'price': hotel.price,
+            'currency': hotel.currency,
             'value_score': hotel_data['value_score'],
-            'has_wifi': hotel_data['has_wifi'],
-            'has_breakfast': hotel_data['has_breakfast']
+            'has_wifi': hotel.has_wifi,
+            'has_breakfast': hotel.has_breakfast
         }
         
-        # Try to get detailed information for better URL and room photos
-        print(f"   🔍 Fetching detailed information...")
-        try:
-            details_result = api_client.get_hotel_details(hotel_id)
-            if details_result and details_result.get('data'):
-                # Get specific booking URL
-                specific_url = details_result['data'].get('url')
-                if specific_url:
-                    result_data['booking_url'] = specific_url
-                
-                # Get room photos
-                rooms = details_result['data'].get('rooms', {})
-                if rooms:
-                    try:
-                        first_room_id = list(rooms.keys())[0]
-                        first_room = rooms[first_room_id]
-                        photos = first_room.get('photos', [])
-                        for photo in photos:
-                            if photo.get('url_max1280'):
-                                result_data['room_photo_url'] = photo['url_max1280']
-                                break
-                    except Exception as e:
-                        print(f"      Note: Could not extract room photos: {e}")
-        except Exception as e:
-            print(f"      Note: Could not get detailed information: {e}")
-        
         results.append(result_data)
-        
-        # Small delay between detail requests to be respectful to the API
-        if i < top_n:
-            time.sleep(0.3)
+    
+    # Get detailed information for better URLs and room photos, all hotels at
+    # once; the host's concurrency limiter decides how many run in parallel
+    if deadline.expired():
+        print(f"\n⏱️ Out of time, returning {len(results)} hotels without their details")
+        return results
+    print(f"\n🔍 Fetching detailed information for {len(results)} hotels...")
+    with ThreadPoolExecutor(max_workers=max(1, len(results))) as executor:
+        futures = [executor.submit(deadline.in_context(_fetch_hotel_details), api_client, r['booking_hotel_id'])
+                   for r in results]
+        for result_data, future in zip(results, futures):
+            _apply_hotel_details(result_data, future.result())
     
     print(f"\n✅ Successfully prepared {len(results)} hotels")
     return results
 
 
+def _fetch_hotel_details(api_client: Any, hotel_id: Any) -> Optional[Dict]:
+    try:
+        return api_client.get_hotel_summary(hotel_id)
+    except Exception as e:
+        print(f"      Note: Could not get detailed information for {hotel_id}: {e}")
+        return None
+
+
+def _apply_hotel_details(result_data: Dict, summary: Optional[Dict]):
+    """Takes the specific booking URL and first room photo of a hotel summary."""
+    if not summary:
+        return
+    if summary.get('url'):
+        result_data['booking_url'] = summary['url']
+    if summary.get('room_photo_url'):
+        result_data['room_photo_url'] = summary['room_photo_url']
+
+
 def search_hotels_with_retry(city: str, arrival: str, departure: str, 
                             price_max: int, **kwargs) -> Optional[List[Dict]]:
     """
     Search hotels with automatic retry on different price points if needed.
     Returns a list of top 3 hotels.
+    
+    The higher price points are ranked from the hotels the search already
+    fetched, so a relaxed budget costs no extra upstream calls. More pages are
+    only fetched when nothing fits even the highest budget.
     """
-    # Try with original budget
+    kwargs.setdefault('relax_factors', RETRY_BUDGET_FACTORS)
+    kwargs.setdefault('extra_pages', RETRY_EXTRA_PAGES)
     result = search_hotels(city, arrival, departure, price_max, **kwargs)
     
-    if result:
-        return result
-    
-    # If no results, try with adjusted parameters
-    print(f"\n🔄 No results found with max price {price_max}. Trying alternative search strategies...")
-    
-    # Strategy 1: Try with 25% higher budget
-    higher_budget = int(price_max * 1.25)
-    print(f"   Trying with higher budget: {higher_budget} EUR")
-    result = search_hotels(city, arrival, departure, higher_budget, **kwargs)
-    
-    if result:
+    if result and any(hotel['price'] > price_max for hotel in result):
         print(f"   ⚠️ Note: Found hotels slightly above original budget")
-        return result
     
-    return None
\ No newline at end of file
+    return result
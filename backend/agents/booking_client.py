@@ -1,7 +1,13 @@
-import http.client
 import json
-import time
-from typing import Dict, Any, Optional, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, Iterator
+from agents import deadline
+from agents.concurrency import upstream_limiter
+from agents.credentials import CredentialPool, pool_from_env
+from agents.http_client import request_json
+from agents.records import HOTEL_DETAILS_FIELDS, hotel_details_summary
+from agents.response_cache import CachePolicy, cache_policy, response_cache
 
 # --- Configuration Variables ---
 # REQUIRED VARIABLES
@@ -14,10 +20,15 @@ CHILDREN_AGE = "0%2C17" # URL-encoded: 0,17
 ROOM_QTY = 1
 PRICE_MIN = 0
 PRICE_MAX = 1000
+# Best rated first, so the first pages hold the hotels the ranker wants
+SORT_BY = "bayesian_review_score"
+MIN_REVIEW_SCORE = None # e.g. 8 for "Very good: 8+"
+# Pages fetched ahead of the one being ranked while the upstream has spare
+# capacity; an early stop can waste this many calls
+PAGE_PREFETCH = 1
 
 # API VARIABLES
 API_HOST = "booking-com15.p.rapidapi.com"
-API_KEY = "a4635f20famshde916da8e358adbp1ad22ejsn6e8d49abb4b1"
 
 
 class BookingComAPI:
@@ -26,15 +37,27 @@ class BookingComAPI:
     encapsulating different search and details calls.
     """
     
-    def __init__(self, api_host: str, api_key: str, **kwargs):
+    # Endpoints whose responses are cached (see response_cache.py); the rest
+    # always go upstream
+    CACHE_POLICIES = {
+        '/api/v1/hotels/searchDestination': CachePolicy(ttl=7 * 24 * 3600, stale=30 * 24 * 3600),
+        '/api/v1/hotels/getFilter': CachePolicy(ttl=3600, stale=3600),
+        '/api/v1/hotels/searchHotels': CachePolicy(ttl=600, stale=600)
+    }
+    # A hotel's booking URL and room photos rarely change and don't depend on
+    # the dates searched, so get_hotel_summary keeps them per hotel for long
+    HOTEL_SUMMARY_POLICY = CachePolicy(ttl=14 * 24 * 3600, stale=30 * 24 * 3600)
+
+    def __init__(self, api_host: str, credentials: CredentialPool, **kwargs):
         """
-        Initializes the API client with host, key, and default search parameters.
+        Initializes the API client with host, key pool, and default search parameters.
         """
         self.API_HOST = api_host
         self.HEADERS = {
-            'x-rapidapi-key': api_key,
             'x-rapidapi-host': api_host
         }
+        # Each call takes its key from the pool (see credentials.py)
+        self.CREDENTIALS = credentials
         
         # Search Parameters (Default values, can be overridden per call if needed)
         self.CITY_QUERY = kwargs.get('CITY_QUERY', CITY_QUERY)
@@ -45,6 +68,8 @@ class BookingComAPI:
         self.ROOM_QTY = kwargs.get('ROOM_QTY', ROOM_QTY)
         self.PRICE_MIN = kwargs.get('PRICE_MIN', PRICE_MIN)
         self.PRICE_MAX = kwargs.get('PRICE_MAX', PRICE_MAX)
+        self.SORT_BY = kwargs.get('SORT_BY', SORT_BY)
+        self.MIN_REVIEW_SCORE = kwargs.get('MIN_REVIEW_SCORE', MIN_REVIEW_SCORE)
         
         # Booking/Display Specific Variables
         self.PAGE_NUMBER = 1
@@ -58,19 +83,21 @@ class BookingComAPI:
         self.DEST_ID = ""
         self.DESTINATION = ""
         self.SEARCH_TYPE = ""
+        self.LAST_PAGE = 0
+        self.PAGES_EXHAUSTED = False
 
-    def _make_api_call(self, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
-        """Handles the connection and makes the API request."""
-        conn = http.client.HTTPSConnection(self.API_HOST)
+    def _make_api_call(self, method: str, endpoint: str, fields=None, hedge: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Handles the connection and makes the API request. With fields (see
+        json_projection), only those paths of the response are parsed; with
+        hedge, a slow request is sent a second time (see http_client).
+        """
         print(f"\n--- Making {method} request to: {endpoint} ---")
         try:
-            conn.request(method, endpoint, headers=self.HEADERS)
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
-            
-            # Decode the bytes to a string and parse the JSON
-            return json.loads(data.decode("utf-8"))
+            _, result = request_json(self.API_HOST, method, endpoint, self.HEADERS, fields, hedge=hedge,
+                                     credentials=self.CREDENTIALS,
+                                     cache=cache_policy(self.CACHE_POLICIES, endpoint))
+            return result
             
         except Exception as e:
             print(f"An error occurred: {e}")
@@ -128,7 +155,7 @@ class BookingComAPI:
             print("❌ Failed to get filter data.")
             return None
 
-    def search_hotels(self, page_number: int = None) -> Optional[Dict[str, Any]]:
+    def search_hotels(self, page_number: int = None, fields=None) -> Optional[Dict[str, Any]]:
         """Searches for hotels based on all configured parameters."""
         if not self.DEST_ID or not self.SEARCH_TYPE:
             print("❌ Cannot search hotels: Destination ID or Search Type is missing.")
@@ -155,8 +182,13 @@ class BookingComAPI:
             f"currency_code={self.CURRENCY_CODE}&"
             f"location={self.LOCATION}"
         )
+        if self.SORT_BY:
+            hotel_endpoint += f"&sort_by={self.SORT_BY}"
+        if self.MIN_REVIEW_SCORE:
+            # Booking's review filter buckets are on a 0-100 scale
+            hotel_endpoint += f"&categories_filter=review_score%3A%3A{int(self.MIN_REVIEW_SCORE * 10)}"
 
-        hotel_data_dict = self._make_api_call("GET", hotel_endpoint)
+        hotel_data_dict = self._make_api_call("GET", hotel_endpoint, fields, hedge=True)
         
         if hotel_data_dict and hotel_data_dict.get('data'):
             hotel_results = hotel_data_dict['data']
@@ -166,6 +198,70 @@ class BookingComAPI:
             print("❌ Failed to get hotel search data.")
             return None
     
+    def iter_hotel_pages(self, max_pages: int = 5, target_hotels: Optional[int] = 100,
+                         start_page: int = 1, fields=None) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields hotel search results one page at a time, so callers can rank
+        each page as it arrives instead of waiting for all of them. Up to
+        PAGE_PREFETCH later pages are fetched meanwhile while the host's
+        concurrency limiter has spare slots.
+        
+        Args:
+            max_pages: Maximum number of pages to fetch (default 5)
+            target_hotels: Stop once this many hotels have been yielded (default 100, None for no target)
+            start_page: First page to fetch, to continue an earlier search (default 1)
+            fields: Only parse these paths of each page, e.g. records.HOTEL_SEARCH_FIELDS
+        
+        LAST_PAGE and PAGES_EXHAUSTED record where the search stopped.
+        """
+        collected = 0
+        page_size = 0
+        last_page = start_page + max_pages - 1
+        next_page = start_page
+        pending = deque()
+        limiter = upstream_limiter(self.API_HOST)
+        executor = ThreadPoolExecutor(max_workers=PAGE_PREFETCH + 1)
+        
+        def fetch_next():
+            nonlocal next_page
+            print(f"\n🔍 Fetching page {next_page}...")
+            pending.append((next_page, executor.submit(deadline.in_context(self.search_hotels), next_page, fields)))
+            next_page += 1
+        
+        try:
+            fetch_next()
+            while pending:
+                # Fetch ahead while the upstream has room and the target isn't already covered
+                while (next_page <= last_page and len(pending) <= PAGE_PREFETCH and limiter.spare()
+                       and (target_hotels is None or collected + len(pending) * page_size < target_hotels)):
+                    fetch_next()
+                
+                page, future = pending.popleft()
+                result = future.result()
+                if result and result.get('data', {}).get('hotels'):
+                    hotels = result['data']['hotels']
+                    collected += len(hotels)
+                    page_size = max(page_size, len(hotels))
+                    self.LAST_PAGE = page
+                    print(f"   Total hotels collected so far: {collected}")
+                    yield hotels
+                    
+                    # Stop if we've reached our target
+                    if target_hotels is not None and collected >= target_hotels:
+                        print(f"✅ Reached target of {target_hotels} hotels!")
+                        break
+                    if not pending and next_page <= last_page:
+                        fetch_next()
+                elif deadline.expired():
+                    print(f"   ⏱️ Out of time at page {page}, keeping the {collected} hotels found so far.")
+                    break
+                else:
+                    print(f"   No hotels found on page {page}, stopping search.")
+                    self.PAGES_EXHAUSTED = True
+                    break
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def search_multiple_pages(self, max_pages: int = 5, target_hotels: int = 100) -> List[Dict[str, Any]]:
         """
         Search multiple pages of hotels to get a larger selection.
@@ -178,31 +274,15 @@ class BookingComAPI:
             List of all hotels collected from multiple pages
         """
         all_hotels = []
-        
-        for page in range(1, max_pages + 1):
-            print(f"\n🔍 Fetching page {page}...")
-            
-            result = self.search_hotels(page_number=page)
-            if result and result.get('data', {}).get('hotels'):
-                hotels = result['data']['hotels']
-                all_hotels.extend(hotels)
-                print(f"   Total hotels collected so far: {len(all_hotels)}")
-                
-                # Stop if we've reached our target
-                if len(all_hotels) >= target_hotels:
-                    print(f"✅ Reached target of {target_hotels} hotels!")
-                    break
-            else:
-                print(f"   No hotels found on page {page}, stopping search.")
-                break
-                
-            # Small delay to be respectful to the API
-            time.sleep(0.5)
-        
+        for hotels in self.iter_hotel_pages(max_pages=max_pages, target_hotels=target_hotels):
+            all_hotels.extend(hotels)
         return all_hotels
 
-    def get_hotel_details(self, hotel_id: int) -> Optional[Dict[str, Any]]:
-        """Retrieves specific details for a single hotel, including room photos."""
+    def get_hotel_details(self, hotel_id: int, fields=None) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves specific details for a single hotel, including room photos.
+        With fields, only those paths of the response are parsed.
+        """
         details_endpoint = (
             f"/api/v1/hotels/getHotelDetails?"
             f"hotel_id={hotel_id}&"
@@ -216,7 +296,7 @@ class BookingComAPI:
             f"languagecode={self.LANGUAGE_CODE}&"
             f"currency_code={self.CURRENCY_CODE}"
         )
-        details_data_dict = self._make_api_call("GET", details_endpoint)
+        details_data_dict = self._make_api_call("GET", details_endpoint, fields)
         
         if details_data_dict and details_data_dict.get('data'):
             print(f"✅ Hotel Details Retrieved for hotel ID: **{hotel_id}**")
@@ -225,11 +305,24 @@ class BookingComAPI:
             print(f"❌ Failed to get hotel details for hotel ID: {hotel_id}.")
             return None
 
+    def get_hotel_summary(self, hotel_id: int) -> Optional[Dict[str, Optional[str]]]:
+        """
+        The booking URL and first room photo of a hotel ('url', 'room_photo_url').
+        Cached by hotel ID alone (see HOTEL_SUMMARY_POLICY), so a hotel that
+        turns up again in any search costs no details call.
+        """
+        def load():
+            summary = hotel_details_summary(self.get_hotel_details(hotel_id, HOTEL_DETAILS_FIELDS))
+            return (200, summary) if summary else (404, None)
+
+        _, summary = response_cache().fetch(f"hotel_summary:{hotel_id}", self.HOTEL_SUMMARY_POLICY, load)
+        return summary
+
 
 def main() -> Optional[Dict[str, Any]]:
     """Executes the API flow with improved multi-page search."""
     
-    api_client = BookingComAPI(API_HOST, API_KEY, CITY_QUERY=CITY_QUERY)
+    api_client = BookingComAPI(API_HOST, pool_from_env("BOOKING_API_KEY"), CITY_QUERY=CITY_QUERY)
     
     # 1. Search Destination
     if not api_client.search_destination():
@@ -2,10 +2,15 @@ import google.generativeai as genai
 from google.generativeai import types
 import os
 import json
+from contextlib import nullcontext
+from typing import Optional
 from database import db, Conversation, Message, TravelSuggestion, Profile
-from agents.iternerary_manager import ItineraryManager
+from unit_of_work import get_itinerary_manager
+from agents import deadline
 from agents.booking_agent import search_hotels
 from agents.flight_agent import search_flights
+from agents.flexible_dates import search_flexible_dates
+from agents.trip_optimizer import plan_trip_packages, summarize_package
 from agents.shop_agent import search_shops
 from agents.leisure_agent import search_leisure
 from agents.itinerary_generator import generate_detailed_itinerary
@@ -16,12 +21,17 @@ import re
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=GOOGLE_API_KEY)
 
+# Longest a single Gemini call may take; less when the request's deadline is closer
+LLM_TIMEOUT_SECONDS = 60
+# Time kept back from the tools for the model's final reply
+FINAL_ANSWER_RESERVE_SECONDS = 10
+
 class ChatService:
     def __init__(self, conversation: Conversation):
         self.conversation = conversation
         self.user_id = conversation.user_id
         self.prefs = conversation.preferences or {}
-        self.IteneraryManager = ItineraryManager(self.conversation)
+        self.IteneraryManager = get_itinerary_manager(self.conversation)
 
         # Define the tools the LLM can use
         self.tools = [
@@ -38,7 +48,9 @@ class ChatService:
                                 "arrival": {"type": "STRING", "description": "Check-in date (YYYY-MM-DD)"},
                                 "departure": {"type": "STRING", "description": "Check-out date (YYYY-MM-DD)"},
                                 "price_max": {"type": "NUMBER", "description": "The maximum price for the stay"},
-                                "adults": {"type": "NUMBER", "description": "Number of adults"}
+                                "adults": {"type": "NUMBER", "description": "Number of adults"},
+                                "ranking_profile": {"type": "STRING", "description": "Optional. How to rank hotels: 'value' (default, best rating for the price), 'luxury' (rating first) or 'family' (weights breakfast higher)"},
+                                "min_review_score": {"type": "NUMBER", "description": "Optional. Minimum guest review score out of 10, e.g. 8 when the user wants very well rated hotels"}
                             },
                             "required": ["city", "arrival", "departure", "price_max", "adults"]
                         }
@@ -53,11 +65,46 @@ class ChatService:
                                 "origin_city": {"type": "STRING", "description": "The departure city, e.g., 'New York'"},
                                 "destination_city": {"type": "STRING", "description": "The arrival city, e.g., 'London'"},
                                 "departure_date": {"type": "STRING", "description": "The departure date (YYYY-MM-DD)"},
-                                "adults": {"type": "NUMBER", "description": "Number of adults"}
+                                "adults": {"type": "NUMBER", "description": "Number of adults"},
+                                "ranking_profile": {"type": "STRING", "description": "Optional. How to pick the best flight: 'balanced' (default), 'cheapest' or 'fastest'"}
                             },
                             "required": ["origin_city", "destination_city", "departure_date", "adults"]
                         }
                     ),
+                    # Tool for finding the best flight + hotel packages within a total budget
+                    types.FunctionDeclaration(
+                        name="plan_trip_within_budget",
+                        description="Finds the best combinations of outbound flight, return flight and hotel whose total price fits the user's total trip budget. Use this instead of separate flight and hotel searches when the user gives an overall budget.",
+                        parameters={
+                            "type": "OBJECT",
+                            "properties": {
+                                "origin_city": {"type": "STRING", "description": "The user's origin city"},
+                                "destination_city": {"type": "STRING", "description": "The trip destination city"},
+                                "arrival_date": {"type": "STRING", "description": "Outbound flight / hotel check-in date (YYYY-MM-DD)"},
+                                "departure_date": {"type": "STRING", "description": "Return flight / hotel check-out date (YYYY-MM-DD)"},
+                                "total_budget": {"type": "NUMBER", "description": "Total budget in EUR for flights and hotel together"},
+                                "adults": {"type": "NUMBER", "description": "Number of adults"}
+                            },
+                            "required": ["origin_city", "destination_city", "arrival_date", "departure_date", "total_budget", "adults"]
+                        }
+                    ),
+                    # Tool for comparing round-trip prices around the chosen dates
+                    types.FunctionDeclaration(
+                        name="search_flexible_dates",
+                        description="Compares round-trip flight prices for dates around the planned ones (e.g. 'what if I leave a day earlier?'). Returns a date-by-date price matrix with the cheapest combination.",
+                        parameters={
+                            "type": "OBJECT",
+                            "properties": {
+                                "origin_city": {"type": "STRING", "description": "The user's origin city"},
+                                "destination_city": {"type": "STRING", "description": "The trip destination city"},
+                                "departure_date": {"type": "STRING", "description": "Planned outbound date (YYYY-MM-DD)"},
+                                "return_date": {"type": "STRING", "description": "Planned return date (YYYY-MM-DD)"},
+                                "window_days": {"type": "NUMBER", "description": "Days to shift each date by in both directions (1-3, default 2)"},
+                                "adults": {"type": "NUMBER", "description": "Number of adults"}
+                            },
+                            "required": ["origin_city", "destination_city", "departure_date", "return_date", "adults"]
+                        }
+                    ),
                     # Tool for getting general recommendations (no API call)
                     types.FunctionDeclaration(
                         name="get_activity_recommendations",
@@ -142,6 +189,9 @@ Ask one question at a time. Be concise and helpful.
 {current_itinerary_str}
 
 Note: The search_hotels tool returns the top 3 best value hotels for the destination.
+The search_flights tool returns the best flight plus `alternatives` and a `pareto_front` (cheapest vs fastest trade-offs); mention a cheaper or faster alternative when it is a real trade-off.
+When the user gives one total budget for the trip, call `plan_trip_within_budget`: it already checks every flight and hotel combination against the budget, so present its packages (best first) instead of adding prices up yourself.
+When the user asks about shifting their dates, call `search_flexible_dates` and show its `table` (the cheapest combination is in bold).
 
 **CRITICAL FLIGHT BOOKING LOGIC**:
 The user will provide an "Arrival Date" (when they land at the destination) and a "Departure Date" (when they leave the destination).
@@ -164,7 +214,7 @@ do NOT call a tool to find it again unless the user explicitly asks.
         
         chat_history = self._get_chat_history()
         # Send to Gemini
-        response = self.model.generate_content(chat_history)
+        response = self.model.generate_content(chat_history, request_options=self._llm_options())
 
         # Check if the LLM wants to call one *or more* tools
         try:
@@ -185,106 +235,16 @@ do NOT call a tool to find it again unless the user explicitly asks.
                 
                 print(f"Executing Tool: {tool_name} with args: {tool_args}")
 
-                if tool_name == "search_hotels":
-                    self._save_status(f"⏳ Searching for hotels in **{tool_args.get('city')}**...")
-                    # Update destination preference immediately
-                    self.prefs['destination'] = tool_args.get('city') 
-                    
-                    tool_result = search_hotels(
-                        city=tool_args.get('city'),
-                        arrival=tool_args.get('arrival'),
-                        departure=tool_args.get('departure'),
-                        price_max=int(tool_args.get('price_max', 1000)),
-                        adults=int(tool_args.get('adults', 1))
-                    )
-                    
-                    if tool_result:
-                        hotels_list = tool_result if isinstance(tool_result, list) else [tool_result]
-                        for hotel in hotels_list:
-                            self.IteneraryManager._save_hotel_to_db(hotel) 
-                        print(f"✅ Saved {len(hotels_list)} hotels to database")
-                        tool_result = hotels_list
-                    else:
-                        tool_result = {"status": "error", "message": "No hotels found matching criteria."}
-
-                elif tool_name == "search_flights":
-                    self._save_status(f"✈️ Searching for flights from **{tool_args.get('origin_city')}** to **{tool_args.get('destination_city')}**...")
-                    try:
-                        tool_result = search_flights(
-                            origin_city=tool_args.get('origin_city'),
-                            destination_city=tool_args.get('destination_city'),
-                            departure_date=tool_args.get('departure_date'),
-                            ADULTS=int(tool_args.get('adults', 1))
-                        )
-                        if tool_result:
-                            self.IteneraryManager._save_flight_to_db(tool_result)
-                            print(f"✅ Saved flight to database")
-                    except Exception as e:
-                        print(f"❌ Error searching flights: {e}")
-                        tool_result = {"error": str(e)}
-                    
-                elif tool_name == "get_activity_recommendations":
-                    self._save_status(f"✨ Generating personalized activities for **{tool_args.get('destination')}**...")
-                    itinerary_text = self._get_activity_itinerary(
-                        tool_args.get('destination'), 
-                        tool_args.get('activities')
-                    )
-                    
-                    # Return the actual content so LLM can display it
+                tool_time = self._time_for_tools()
+                if tool_time is not None and tool_time <= 0:
+                    print(f"⏱️ Out of time, skipping tool: {tool_name}")
                     tool_result = {
-                        "status": "success",
-                        "recommendations": itinerary_text,
-                        "instruction": "Display these recommendations to the user in your response."
+                        "status": "error",
+                        "message": "Not run: this request ran out of time. Tell the user which results are missing and that they can ask again."
                     }
-
-                elif tool_name == "search_shops":
-                    self._save_status(f"🛒 Pre-loading local points of interest (supermarkets, essentials) in **{tool_args.get('city')}**...")
-                    tool_result = search_shops(
-                        city=tool_args.get('city'),
-                        categories=tool_args.get('categories')
-                    )
-                    self.IteneraryManager._save_shop_to_db(tool_result)
-                    print(tool_result)
-                
-                elif tool_name == "search_leisure":
-                    self._save_status(f"🎭 Pre-loading leisure activities and entertainment options in **{tool_args.get('city')}**...")
-                    tool_result = search_leisure(
-                        city=tool_args.get('city'),
-                        categories=tool_args.get('categories')
-                    )
-                    self.IteneraryManager._save_leisure_to_db(tool_result)
-                    print(tool_result)
-
-                elif tool_name == "generate_detailed_itinerary":
-                    print("🗓️ Generating detailed day-by-day itinerary...")
-                    
-                    # Store the parameters in preferences for future reference
-                    self.prefs['itinerary_generated'] = True
-                    self.prefs['arrival_date'] = tool_args.get('arrival_date')
-                    self.prefs['departure_date'] = tool_args.get('departure_date')
-                    
-                    try:
-                        itinerary_text = generate_detailed_itinerary(
-                            destination=tool_args.get('destination'),
-                            arrival_date=tool_args.get('arrival_date'),
-                            departure_date=tool_args.get('departure_date'),
-                            activity_preferences=tool_args.get('activity_preferences', 'mixed')
-                        )
-                        
-                        # Return the FULL itinerary to the LLM so it can display it
-                        tool_result = {
-                            "status": "success",
-                            "itinerary": itinerary_text,  # Include full content
-                            "instruction": "Display this complete itinerary to the user in your response. Format it nicely with markdown."
-                        }
-                        
-                        print(f"✅ Generated itinerary successfully")
-                    except Exception as e:
-                        print(f"❌ Error generating itinerary: {e}")
-                        tool_result = {
-                            "status": "error",
-                            "message": f"Failed to generate itinerary: {str(e)}"
-                        }
+                else:
+                    with deadline.within(tool_time) if tool_time is not None else nullcontext():
+                        tool_result = self._execute_tool(tool_name, tool_args)
 
                 function_response_parts.append(
                     types.PartDict(
@@ -306,7 +266,7 @@ do NOT call a tool to find it again unless the user explicitly asks.
                 *chat_history,                
                 model_response_content,
                 function_response_content
-            ])
+            ], request_options=self._llm_options())
         
         final_response_text = response.candidates[0].content.parts[0].text
 
@@ -319,6 +279,166 @@ do NOT call a tool to find it again unless the user explicitly asks.
         db.session.commit()
         return final_response_text
 
+    def _execute_tool(self, tool_name: str, tool_args: dict):
+        """
+        Runs one tool call and returns its result for the model. Inside a
+        deadline, tools return whatever they found before it passed.
+        """
+        tool_result = None
+        if tool_name == "search_hotels":
+            self._save_status(f"⏳ Searching for hotels in **{tool_args.get('city')}**...")
+            # Update destination preference immediately
+            self.prefs['destination'] = tool_args.get('city') 
+            if tool_args.get('ranking_profile'):
+                self.prefs['hotel_ranking_profile'] = tool_args.get('ranking_profile')
+            
+            tool_result = search_hotels(
+                city=tool_args.get('city'),
+                arrival=tool_args.get('arrival'),
+                departure=tool_args.get('departure'),
+                price_max=int(tool_args.get('price_max', 1000)),
+                ADULTS=int(tool_args.get('adults', 1)),
+                ranking_profile=self.prefs.get('hotel_ranking_profile'),
+                min_review_score=tool_args.get('min_review_score')
+            )
+            
+            if tool_result:
+                hotels_list = tool_result if isinstance(tool_result, list) else [tool_result]
+                for hotel in hotels_list:
+                    self.IteneraryManager._save_hotel_to_db(hotel) 
+                print(f"✅ Saved {len(hotels_list)} hotels to database")
+                tool_result = hotels_list
+            else:
+                tool_result = {"status": "error", "message": "No hotels found matching criteria."}
+
+        elif tool_name == "search_flights":
+            self._save_status(f"✈️ Searching for flights from **{tool_args.get('origin_city')}** to **{tool_args.get('destination_city')}**...")
+            try:
+                tool_result = search_flights(
+                    origin_city=tool_args.get('origin_city'),
+                    destination_city=tool_args.get('destination_city'),
+                    departure_date=tool_args.get('departure_date'),
+                    ADULTS=int(tool_args.get('adults', 1)),
+                    ranking_profile=tool_args.get('ranking_profile')
+                )
+                if tool_result:
+                    self.IteneraryManager._save_flight_to_db(tool_result)
+                    print(f"✅ Saved flight to database")
+            except Exception as e:
+                print(f"❌ Error searching flights: {e}")
+                tool_result = {"error": str(e)}
+            
+        elif tool_name == "plan_trip_within_budget":
+            self._save_status(f"🧮 Finding the best flight and hotel packages for **{tool_args.get('destination_city')}**...")
+            self.prefs['origin'] = tool_args.get('origin_city')
+            self.prefs['destination'] = tool_args.get('destination_city')
+            
+            tool_result = plan_trip_packages(
+                origin_city=tool_args.get('origin_city'),
+                destination_city=tool_args.get('destination_city'),
+                arrival_date=tool_args.get('arrival_date'),
+                departure_date=tool_args.get('departure_date'),
+                total_budget=float(tool_args.get('total_budget', 1000)),
+                adults=int(tool_args.get('adults', 1))
+            )
+            
+            if tool_result and tool_result.get('packages'):
+                # The best package becomes the suggested flights and hotel
+                best = tool_result['packages'][0]
+                self.IteneraryManager._save_flight_to_db(best['outbound'])
+                self.IteneraryManager._save_flight_to_db(best['return'])
+                self.IteneraryManager._save_hotel_to_db(best['hotel'])
+                tool_result = {
+                    'total_budget': tool_result['total_budget'],
+                    'packages': [summarize_package(p) for p in tool_result['packages']]
+                }
+            
+        elif tool_name == "search_flexible_dates":
+            self._save_status(f"📅 Comparing flight prices around your dates for **{tool_args.get('destination_city')}**...")
+            tool_result = search_flexible_dates(
+                origin_city=tool_args.get('origin_city'),
+                destination_city=tool_args.get('destination_city'),
+                departure_date=tool_args.get('departure_date'),
+                return_date=tool_args.get('return_date'),
+                window_days=int(tool_args.get('window_days', 2)),
+                ADULTS=int(tool_args.get('adults', 1))
+            ) or {"status": "error", "message": "No flights found around these dates."}
+            
+        elif tool_name == "get_activity_recommendations":
+            self._save_status(f"✨ Generating personalized activities for **{tool_args.get('destination')}**...")
+            itinerary_text = self._get_activity_itinerary(
+                tool_args.get('destination'), 
+                tool_args.get('activities')
+            )
+            
+            # Return the actual content so LLM can display it
+            tool_result = {
+                "status": "success",
+                "recommendations": itinerary_text,
+                "instruction": "Display these recommendations to the user in your response."
+            }
+
+        elif tool_name == "search_shops":
+            self._save_status(f"🛒 Pre-loading local points of interest (supermarkets, essentials) in **{tool_args.get('city')}**...")
+            tool_result = search_shops(
+                city=tool_args.get('city'),
+                categories=tool_args.get('categories')
+            )
+            self.IteneraryManager._save_shop_to_db(tool_result)
+            print(tool_result)
+        
+        elif tool_name == "search_leisure":
+            self._save_status(f"🎭 Pre-loading leisure activities and entertainment options in **{tool_args.get('city')}**...")
+            tool_result = search_leisure(
+                city=tool_args.get('city'),
+                categories=tool_args.get('categories')
+            )
+            self.IteneraryManager._save_leisure_to_db(tool_result)
+            print(tool_result)
+
+        elif tool_name == "generate_detailed_itinerary":
+            print("🗓️ Generating detailed day-by-day itinerary...")
+            
+            # Store the parameters in preferences for future reference
+            self.prefs['itinerary_generated'] = True
+            self.prefs['arrival_date'] = tool_args.get('arrival_date')
+            self.prefs['departure_date'] = tool_args.get('departure_date')
+            
+            try:
+                itinerary_text = generate_detailed_itinerary(
+                    destination=tool_args.get('destination'),
+                    arrival_date=tool_args.get('arrival_date'),
+                    departure_date=tool_args.get('departure_date'),
+                    activity_preferences=tool_args.get('activity_preferences', 'mixed')
+                )
+                
+                # Return the FULL itinerary to the LLM so it can display it
+                tool_result = {
+                    "status": "success",
+                    "itinerary": itinerary_text,  # Include full content
+                    "instruction": "Display this complete itinerary to the user in your response. Format it nicely with markdown."
+                }
+                
+                print(f"✅ Generated itinerary successfully")
+            except Exception as e:
+                print(f"❌ Error generating itinerary: {e}")
+                tool_result = {
+                    "status": "error",
+                    "message": f"Failed to generate itinerary: {str(e)}"
+                }
+
+        return tool_result
+
+    @staticmethod
+    def _time_for_tools() -> Optional[float]:
+        """Seconds the next tool may take, keeping FINAL_ANSWER_RESERVE_SECONDS for the reply; None without a deadline."""
+        time_left = deadline.remaining()
+        return None if time_left is None else time_left - FINAL_ANSWER_RESERVE_SECONDS
+
+    @staticmethod
+    def _llm_options() -> dict:
+        return {'timeout': deadline.timeout(LLM_TIMEOUT_SECONDS)}
+
     def _get_chat_history(self):
         # Loads messages from DB and formats them for Gemini
         messages = Message.query.filter_by(conversation_id=self.conversation.id).order_by(Message.created_at).all()
@@ -334,7 +454,8 @@ do NOT call a tool to find it again unless the user explicitly asks.
             model_name="gemini-2.0-flash-exp",
             system_instruction=f"You are a travel expert. Create a day-by-day itinerary for a trip to {destination} with a focus on {activities} activities. Be creative and engaging. Add map links."
         )
-        response = itinerary_model.generate_content(f"Give me an itinerary for {destination}.")
+        response = itinerary_model.generate_content(f"Give me an itinerary for {destination}.",
+                                                    request_options=self._llm_options())
         final_text = parse_recommendations_with_links(response.text, destination)
         
         return final_text
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import deque
+from typing import Dict, Any
+
+# Outcomes of the last WINDOW_SIZE requests to a host decide whether it is healthy
+WINDOW_SIZE = 20
+# The breaker opens once at least MIN_REQUESTS are in the window and this
+# share of them failed
+MIN_REQUESTS = 10
+FAILURE_RATE_THRESHOLD = 0.5
+# How long an open breaker rejects requests before letting a trial one through
+COOL_DOWN_SECONDS = 30
+# Trial requests allowed at once while half-open
+HALF_OPEN_MAX_CALLS = 1
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """The upstream's breaker is open; the request was not sent."""
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker with the usual three states:
+    - closed: requests go through and their outcomes are recorded
+    - open: requests are rejected at once until COOL_DOWN_SECONDS pass
+    - half-open: HALF_OPEN_MAX_CALLS trial requests go through; a success
+      closes the breaker again, a failure reopens it for another cool-down
+    """
+
+    def __init__(self, host: str):
+        self.host = host
+        self.state = CLOSED
+        self._outcomes = deque(maxlen=WINDOW_SIZE)  # True for success
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now; counts it as a trial when half-open."""
+        with self._lock:
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < COOL_DOWN_SECONDS:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._trials = 0
+                print(f"🔌 Circuit for {self.host} half-open, sending a trial request")
+            if self.state == HALF_OPEN:
+                if self._trials >= HALF_OPEN_MAX_CALLS:
+                    self.rejected += 1
+                    return False
+                self._trials += 1
+            return True
+
+    def record(self, success: bool):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._trials = max(0, self._trials - 1)
+                if success:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    print(f"🔌 Circuit for {self.host} closed again")
+                else:
+                    self._open()
+                return
+
+            self._outcomes.append(success)
+            failures = self._outcomes.count(False)
+            if (self.state == CLOSED and len(self._outcomes) >= MIN_REQUESTS
+                    and failures / len(self._outcomes) >= FAILURE_RATE_THRESHOLD):
+                self._open()
+
+    def release(self):
+        """Gives back an allowed request that was never sent (e.g. no rate limit token came)."""
+        with self._lock:
+            if self.state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    def _open(self):
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self.times_opened += 1
+        print(f"🔌 Circuit for {self.host} opened, rejecting requests for {COOL_DOWN_SECONDS}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            outcomes = len(self._outcomes)
+            return {
+                'state': self.state,
+                'failure_rate': round(self._outcomes.count(False) / outcomes, 2) if outcomes else 0.0,
+                'window': outcomes,
+                'times_opened': self.times_opened,
+                'rejected': self.rejected,
+                'retry_in_seconds': round(max(0.0, COOL_DOWN_SECONDS - (time.monotonic() - self._opened_at)), 1)
+                if self.state == OPEN else 0.0
+            }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def circuit_breaker(host: str) -> CircuitBreaker:
+    """The process-wide breaker for an upstream host."""
+    with _breakers_lock:
+        breaker = _breakers.get(host)
+        if breaker is None:
+            breaker = _breakers[host] = CircuitBreaker(host)
+        return breaker
+
+
+def breaker_stats() -> Dict[str, Dict[str, Any]]:
+    """State and failure rate of every upstream's breaker."""
+    with _breakers_lock:
+        breakers = list(_breakers.values())
+    return {breaker.host: breaker.stats() for breaker in breakers}
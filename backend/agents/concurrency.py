@@ -0,0 +1,159 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+from agents import deadline
+
+# Starting, smallest and largest number of concurrent requests per upstream host
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+# A response this many times slower than the usual latency counts as overload
+LATENCY_SPIKE_FACTOR = 2.5
+# How much the limit shrinks on overload
+DECREASE_FACTOR = 0.5
+# Longest wait for a free slot before giving up
+SLOT_WAIT_SECONDS = 30
+
+
+class ConcurrencyLimitTimeout(Exception):
+    """No request slot for the upstream freed up before the caller's deadline."""
+
+
+class _Slot:
+    """Handle for one request in flight; call overloaded() on a 429 or similar."""
+    __slots__ = ('started', 'busy', 'response_at', 'overload')
+
+    def __init__(self, busy: bool):
+        self.started = time.monotonic()
+        self.busy = busy  # at least half the limit in use when it started
+        self.response_at = None
+        self.overload = False
+
+    def responded(self):
+        """Marks when the response headers arrived; latency is measured up to here."""
+        self.response_at = time.monotonic()
+
+    def overloaded(self):
+        self.overload = True
+
+
+class AIMDLimiter:
+    """
+    Adaptive limit on concurrent requests to one upstream host, additive
+    increase / multiplicative decrease: each full limit's worth of responses
+    at the usual latency while the limit is at least half used raises it by
+    one; a 429, a timeout or a latency spike halves it (at most once per
+    usual round trip, so one burst of failures counts once). A caller
+    running out of its own deadline doesn't count. Requests over the limit
+    queue.
+    """
+
+    def __init__(self, host: str, initial: int = INITIAL_CONCURRENCY,
+                 min_limit: int = MIN_CONCURRENCY, max_limit: int = MAX_CONCURRENCY):
+        self.host = host
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(initial)
+        self.in_flight = 0
+        self.queued = 0
+        self.max_queued = 0
+        self.increases = 0
+        self.decreases = 0
+        self.usual_latency: Optional[float] = None  # EWMA of non-spike latencies, seconds
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def spare(self) -> int:
+        """Slots free right now."""
+        with self._cond:
+            return max(0, int(self.limit) - self.in_flight)
+
+    @contextmanager
+    def slot(self, timeout: float = SLOT_WAIT_SECONDS) -> Iterator[_Slot]:
+        give_up_at = time.monotonic() + timeout
+        with self._cond:
+            if self.in_flight >= int(self.limit):
+                self.queued += 1
+                self.max_queued = max(self.max_queued, self.queued)
+                try:
+                    while self.in_flight >= int(self.limit):
+                        remaining = give_up_at - time.monotonic()
+                        if remaining <= 0:
+                            raise ConcurrencyLimitTimeout(
+                                f"No free request slot for {self.host} within {timeout:g}s")
+                        self._cond.wait(remaining)
+                finally:
+                    self.queued -= 1
+            self.in_flight += 1
+            slot = _Slot(busy=self.in_flight * 2 >= int(self.limit))
+
+        try:
+            yield slot
+        except deadline.DeadlineExceeded:
+            raise  # the caller ran out of time, which says nothing about the host
+        except TimeoutError:
+            slot.overloaded()
+            raise
+        finally:
+            with self._cond:
+                self.in_flight -= 1
+                # Failures without a response (e.g. connection refused) say nothing about load
+                if slot.overload or slot.response_at is not None:
+                    self._record(slot.response_at and slot.response_at - slot.started, slot.overload, slot.busy)
+                self._cond.notify_all()
+
+    def _record(self, latency: Optional[float], overload: bool, busy: bool):
+        """Adjusts the limit after a request; called with the lock held."""
+        if not overload:
+            if self.usual_latency is None:
+                self.usual_latency = latency
+            elif latency > LATENCY_SPIKE_FACTOR * self.usual_latency:
+                overload = True
+                self.usual_latency += 0.02 * (latency - self.usual_latency)  # follow a lasting slowdown slowly
+            else:
+                self.usual_latency += 0.1 * (latency - self.usual_latency)
+
+        now = time.monotonic()
+        if overload:
+            if now - self._last_decrease >= (self.usual_latency or 0):
+                self.limit = max(self.min_limit, self.limit * DECREASE_FACTOR)
+                self._last_decrease = now
+                self.decreases += 1
+        elif busy and self.limit < self.max_limit:
+            before = int(self.limit)
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            if int(self.limit) > before:
+                self.increases += 1
+
+    def stats(self) -> Dict[str, float]:
+        with self._cond:
+            return {
+                'limit': int(self.limit),
+                'in_flight': self.in_flight,
+                'queued': self.queued,
+                'max_queued': self.max_queued,
+                'usual_latency_ms': round(self.usual_latency * 1000, 1) if self.usual_latency else None,
+                'increases': self.increases,
+                'decreases': self.decreases
+            }
+
+
+_limiters: Dict[str, AIMDLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def upstream_limiter(host: str) -> AIMDLimiter:
+    """The process-wide limiter for an upstream host."""
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = _limiters[host] = AIMDLimiter(host)
+        return limiter
+
+
+def concurrency_stats() -> Dict[str, Dict[str, float]]:
+    """Current limit, in-flight requests and queue depth per upstream host."""
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.host: limiter.stats() for limiter in limiters}
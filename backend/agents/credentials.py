@@ -0,0 +1,175 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+# How long a key is left out after the upstream rejects it: a 401 usually
+# means a revoked or mistyped key, a 429 a spent quota or a burst limit
+AUTH_QUARANTINE_SECONDS = 3600
+QUOTA_QUARANTINE_SECONDS = 60
+# Remaining-quota response headers sent by RapidAPI
+REMAINING_HEADER = 'x-ratelimit-requests-remaining'
+LIMIT_HEADER = 'x-ratelimit-requests-limit'
+RESET_HEADER = 'x-ratelimit-requests-reset'
+
+
+class NoCredentialsAvailable(Exception):
+    """Every key of the upstream is quarantined (or none is configured)."""
+
+
+def key_id(api_key: str) -> str:
+    """Short digest identifying a key in logs and stats without showing it."""
+    return hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]
+
+
+class _KeyState:
+    __slots__ = ('key', 'id', 'in_flight', 'calls', 'rejected', 'remaining', 'limit', 'quarantined_until')
+
+    def __init__(self, key: str):
+        self.key = key
+        self.id = key_id(key)
+        self.in_flight = 0
+        self.calls = 0
+        self.rejected = 0
+        self.remaining: Optional[int] = None  # last reported by the upstream
+        self.limit: Optional[int] = None
+        self.quarantined_until = 0.0
+
+
+class CredentialPool:
+    """
+    API keys for one upstream, used in turn. Each call takes the key with
+    the most quota left (as last reported by the upstream, minus calls in
+    flight), falling back to the least used one while quotas are unknown.
+    Keys answered with a 401 or 429 sit out for a while.
+
+    Keys go in a header (RapidAPI) or, with query_param, in the query
+    string (Geoapify).
+    """
+
+    def __init__(self, name: str, keys: List[str], header: Optional[str] = 'x-rapidapi-key',
+                 query_param: Optional[str] = None):
+        self.name = name
+        self.header = None if query_param else header
+        self.query_param = query_param
+        self._keys = [_KeyState(key) for key in dict.fromkeys(keys)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def available(self) -> int:
+        """Keys not quarantined right now."""
+        now = time.monotonic()
+        with self._lock:
+            return sum(1 for state in self._keys if state.quarantined_until <= now)
+
+    def acquire(self) -> str:
+        """Picks the key for the next call; pair with release()."""
+        now = time.monotonic()
+        with self._lock:
+            usable = [state for state in self._keys if state.quarantined_until <= now]
+            if not usable:
+                if not self._keys:
+                    raise NoCredentialsAvailable(f"No API key configured for {self.name}")
+                wait = min(state.quarantined_until for state in self._keys) - now
+                raise NoCredentialsAvailable(f"All {len(self._keys)} {self.name} keys are quarantined "
+                                             f"for another {wait:.0f}s")
+            state = max(usable, key=lambda s: (
+                float('inf') if s.remaining is None else s.remaining - s.in_flight,
+                -s.in_flight,
+                -s.calls
+            ))
+            state.in_flight += 1
+            state.calls += 1
+            return state.key
+
+    def release(self, api_key: str):
+        with self._lock:
+            self._state(api_key).in_flight -= 1
+
+    def report(self, api_key: str, status: int, getheader: Callable[[str], Optional[str]],
+               retry_after: Optional[float] = None):
+        """Records the quota headers of a response and quarantines the key on a 401 or 429."""
+        remaining, limit, reset = (_int_header(getheader, name) for name in (REMAINING_HEADER, LIMIT_HEADER,
+                                                                             RESET_HEADER))
+        with self._lock:
+            state = self._state(api_key)
+            if remaining is not None:
+                state.remaining = remaining
+            if limit is not None:
+                state.limit = limit
+            if status == 401:
+                seconds = AUTH_QUARANTINE_SECONDS
+            elif status == 429:
+                # A spent quota comes back at its reset time, a burst limit after Retry-After
+                seconds = reset if remaining == 0 and reset else retry_after or QUOTA_QUARANTINE_SECONDS
+            else:
+                return
+            state.rejected += 1
+            state.quarantined_until = time.monotonic() + seconds
+        print(f"🔑 {self.name} key {state.id} got a {status}, leaving it out for {seconds:.0f}s")
+
+    def apply(self, api_key: str, endpoint: str, headers: Optional[Dict[str, str]]) -> Tuple[str, Dict[str, str]]:
+        """endpoint and headers carrying api_key."""
+        if self.query_param:
+            separator = '&' if '?' in endpoint else '?'
+            return f"{endpoint}{separator}{urlencode({self.query_param: api_key})}", dict(headers or {})
+        return endpoint, {**(headers or {}), self.header: api_key}
+
+    def _state(self, api_key: str) -> _KeyState:
+        return next(state for state in self._keys if state.key == api_key)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return {state.id: {
+                'calls': state.calls,
+                'in_flight': state.in_flight,
+                'rejected': state.rejected,
+                'remaining': state.remaining,
+                'limit': state.limit,
+                'quarantined_for_seconds': round(max(0.0, state.quarantined_until - now), 1)
+            } for state in self._keys}
+
+
+def _int_header(getheader: Callable[[str], Optional[str]], name: str) -> Optional[int]:
+    try:
+        return int(getheader(name))
+    except (TypeError, ValueError):
+        return None
+
+
+_pools: Dict[str, CredentialPool] = {}
+_pools_lock = threading.Lock()
+
+
+def pool_from_env(env_var: str, **kwargs) -> CredentialPool:
+    """
+    The process-wide pool of the comma-separated keys in env_var, e.g.
+    BOOKING_API_KEY=key1,key2. kwargs are passed to CredentialPool when the
+    pool is created; a later call asking for the keys to be sent another
+    way raises ValueError, since one pool can't serve both.
+    """
+    with _pools_lock:
+        pool = _pools.get(env_var)
+        if pool is None:
+            keys = [key.strip() for key in os.getenv(env_var, '').split(',') if key.strip()]
+            pool = _pools[env_var] = CredentialPool(env_var, keys, **kwargs)
+            return pool
+
+    wanted = CredentialPool(env_var, [], **kwargs)
+    if (wanted.header, wanted.query_param) != (pool.header, pool.query_param):
+        raise ValueError(f"The {env_var} pool sends keys as header={pool.header!r}, "
+                         f"query_param={pool.query_param!r}; asked for header={wanted.header!r}, "
+                         f"query_param={wanted.query_param!r}")
+    return pool
+
+
+def credential_stats() -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """Calls, rejections and last reported quota per key (by digest) of every pool."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {pool.name: pool.stats() for pool in pools}
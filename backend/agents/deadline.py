@@ -0,0 +1,71 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+# Time budget of the request being served, as a time.monotonic() value.
+# Set once per /api/travel-chat request (see chat_routes) and read by every
+# layer below it to size its own timeouts, so nothing outlives the request.
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar('deadline', default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's time budget ran out before this step could start."""
+
+
+@contextmanager
+def within(seconds: float) -> Iterator[float]:
+    """
+    Runs the block with at most `seconds` left; an enclosing deadline that
+    ends sooner still applies. Yields the absolute deadline.
+    """
+    current = _deadline.get()
+    ends_at = time.monotonic() + seconds
+    if current is not None:
+        ends_at = min(ends_at, current)
+    token = _deadline.set(ends_at)
+    try:
+        yield ends_at
+    finally:
+        _deadline.reset(token)
+
+
+def remaining(default: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds left before the deadline (0 once it passed), never more than
+    default. Without a deadline, default is returned as is.
+    """
+    ends_at = _deadline.get()
+    if ends_at is None:
+        return default
+    left = max(0.0, ends_at - time.monotonic())
+    return left if default is None else min(left, default)
+
+
+def timeout(cap: float, floor: float = 1.0) -> float:
+    """
+    Timeout for one blocking call: the time left, capped at cap. Never
+    below floor, since libraries read 0 as non-blocking or as no timeout.
+    """
+    return max(floor, remaining(cap))
+
+
+def expired() -> bool:
+    ends_at = _deadline.get()
+    return ends_at is not None and time.monotonic() >= ends_at
+
+
+def check(step: str = 'request'):
+    """Raises DeadlineExceeded if the deadline has passed."""
+    if expired():
+        raise DeadlineExceeded(f"Out of time before {step}")
+
+
+def in_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """
+    fn bound to a copy of the caller's context, so the deadline carries over
+    to a worker thread. Make one per submitted task: a context can only run
+    on one thread at a time.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
@@ -0,0 +1,157 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Any
+from agents import deadline
+from agents.credentials import pool_from_env
+from agents.flight_client import BookingComFlightsAPI
+from agents.records import FlightCandidate
+
+# Most searchFlights calls in flight at once; the host's concurrency limiter
+# and rate limit decide how many actually run
+FLEX_MAX_WORKERS = 8
+# Largest ± window accepted, (2 * 3 + 1) dates per leg
+MAX_WINDOW_DAYS = 3
+
+
+def date_window(center: str, window_days: int) -> List[str]:
+    """Dates within ±window_days of center (YYYY-MM-DD), skipping past dates."""
+    center_date = datetime.strptime(center.split('T')[0], "%Y-%m-%d").date()
+    today = date.today()
+    return [
+        (center_date + timedelta(days=offset)).isoformat()
+        for offset in range(-window_days, window_days + 1)
+        if center_date + timedelta(days=offset) >= today
+    ]
+
+
+def _cheapest_flight(api_client: BookingComFlightsAPI, from_id: str, to_id: str,
+                     departure_date: str, flight_params: Dict[str, Any]) -> Optional[FlightCandidate]:
+    """Cheapest offer (shortest on equal price) for one leg on one date."""
+    try:
+        flights = api_client.search_flight_candidates(fromId=from_id, toId=to_id, date=departure_date,
+                                                      **flight_params) or []
+    except Exception as e:
+        print(f"   Warning: Flight search for {departure_date} failed: {e}")
+        return None
+    if not flights:
+        return None
+    return min(flights, key=lambda f: (f.price, f.duration_minutes or 0))
+
+
+def search_flexible_dates(origin_city: str, destination_city: str, departure_date: str,
+                          return_date: str, window_days: int = 2, **kwargs) -> Optional[Dict[str, Any]]:
+    """
+    Price matrix for a round trip with flexible dates.
+
+    Searches each leg on every date within ±window_days (one-way searches, so
+    2 * (2 * window_days + 1) calls at most, fewer with cached dates) and
+    combines them into outbound date x return date totals. Returns the matrix,
+    the cheapest combination and a markdown table with it highlighted.
+    """
+    window_days = max(0, min(int(window_days), MAX_WINDOW_DAYS))
+    print(f"📅 Flexible-date search {origin_city} <-> {destination_city}, ±{window_days} days...")
+
+    API_HOST = os.getenv("BOOKING_API_HOST")
+    credentials = pool_from_env("BOOKING_API_KEY")
+    if not API_HOST or not credentials:
+        print("Flight API credentials (BOOKING_API_HOST, BOOKING_API_KEY) not set")
+        return None
+
+    api_client = BookingComFlightsAPI(API_HOST, credentials)
+    # Airport IDs are cached process-wide, so only the first search pays for them
+    if not api_client.search_airport(origin_city, is_origin=True):
+        print(f"Could not find origin airport for: {origin_city}")
+        return None
+    if not api_client.search_airport(destination_city, is_origin=False):
+        print(f"Could not find destination airport for: {destination_city}")
+        return None
+
+    outbound_dates = date_window(departure_date, window_days)
+    return_dates = date_window(return_date, window_days)
+    if not outbound_dates or not return_dates:
+        print("All dates in the window are in the past.")
+        return None
+
+    flight_params = {
+        'adults': kwargs.get('ADULTS', 1),
+        'stops': 0,
+        'cabinClass': 'ECONOMY',
+        'sort': 'CHEAPEST',
+        'currency_code': 'EUR'
+    }
+    legs = ([(api_client.ORIGIN_ID, api_client.DESTINATION_ID, d) for d in outbound_dates]
+            + [(api_client.DESTINATION_ID, api_client.ORIGIN_ID, d) for d in return_dates])
+
+    with ThreadPoolExecutor(max_workers=FLEX_MAX_WORKERS) as executor:
+        futures = [executor.submit(deadline.in_context(_cheapest_flight), api_client, from_id, to_id,
+                                   departure, flight_params) for from_id, to_id, departure in legs]
+        cheapest = [future.result() for future in futures]
+    outbound = dict(zip(outbound_dates, cheapest[:len(outbound_dates)]))
+    inbound = dict(zip(return_dates, cheapest[len(outbound_dates):]))
+
+    matrix = []
+    best = None
+    for out_date in outbound_dates:
+        row = []
+        for ret_date in return_dates:
+            out_flight, ret_flight = outbound[out_date], inbound[ret_date]
+            if out_flight and ret_flight and ret_date > out_date:
+                total = out_flight.price + ret_flight.price
+                row.append(total)
+                if best is None or total < best['total_price']:
+                    best = {'outbound_date': out_date, 'return_date': ret_date, 'total_price': total}
+            else:
+                row.append(None)
+        matrix.append(row)
+
+    if best is None:
+        print("No bookable date combination found in the window.")
+        return None
+
+    currency = outbound[best['outbound_date']].currency
+    for key, leg in (('outbound', outbound[best['outbound_date']]), ('return', inbound[best['return_date']])):
+        best[key] = {
+            'airline_name': leg.airline_name,
+            'price': leg.price,
+            'departure_time': leg.departure_time,
+            'arrival_time': leg.arrival_time,
+            'stops': leg.stops
+        }
+    print(f"✅ Cheapest combination: {best['outbound_date']} -> {best['return_date']} "
+          f"for {best['total_price']} {currency}")
+
+    return {
+        'origin': origin_city,
+        'destination': destination_city,
+        'currency': currency,
+        'outbound_dates': outbound_dates,
+        'return_dates': return_dates,
+        'outbound_prices': {d: f.price if f else None for d, f in outbound.items()},
+        'return_prices': {d: f.price if f else None for d, f in inbound.items()},
+        'matrix': matrix,
+        'cheapest': best,
+        'table': format_price_matrix(outbound_dates, return_dates, matrix, best),
+        # Some dates weren't searched before the request ran out of time
+        'partial': deadline.expired()
+    }
+
+
+def format_price_matrix(outbound_dates: List[str], return_dates: List[str],
+                        matrix: List[List[Optional[float]]], best: Dict[str, Any]) -> str:
+    """Markdown table, outbound dates as rows and return dates as columns, cheapest in bold."""
+    lines = [
+        "| Depart \\ Return | " + " | ".join(d[5:] for d in return_dates) + " |",
+        "|---|" + "---|" * len(return_dates)
+    ]
+    for out_date, row in zip(outbound_dates, matrix):
+        cells = []
+        for ret_date, total in zip(return_dates, row):
+            if total is None:
+                cells.append("–")
+            elif out_date == best['outbound_date'] and ret_date == best['return_date']:
+                cells.append(f"**{total}**")
+            else:
+                cells.append(str(total))
+        lines.append(f"| {out_date[5:]} | " + " | ".join(cells) + " |")
+    return "\n".join(lines)
@@ -1,20 +1,61 @@
 import os
+from urllib.parse import quote
+from agents.credentials import pool_from_env
 from agents.flight_client import BookingComFlightsAPI
+from agents.flight_ranking import pareto_front, rank_flights, scored_flights
+from agents.records import FlightCandidate
 
 
 def search_flights(origin_city: str, destination_city: str, departure_date: str, **kwargs):
-    """Search for flights using Booking.com API"""
+    """
+    Search for flights using Booking.com API.
+    
+    Returns the best offer (see flight_ranking.scored_flights, ranking_profile
+    picks the weights) with the next best offers under 'alternatives' and the
+    price/duration trade-offs under 'pareto_front'.
+    """
+    searched = _search_and_rank(origin_city, destination_city, departure_date, **kwargs)
+    if not searched:
+        return None
+    ranked, front, flight_params = searched
+
+    best = ranked[0]
+    result = _flight_result(best, departure_date, flight_params)
+    result['value_score'] = best.value_score
+    result['alternatives'] = [_flight_summary(f, departure_date, flight_params) for f in ranked[1:]]
+    result['pareto_front'] = [_flight_summary(f, departure_date, flight_params) for f in front]
+    return result
+
+
+def search_flight_options(origin_city: str, destination_city: str, departure_date: str,
+                          top_n: int = 5, **kwargs):
+    """
+    Like search_flights, but returns the top N offers as full flight records
+    (each with its 'value_score'), e.g. as candidates for trip_optimizer.
+    """
+    searched = _search_and_rank(origin_city, destination_city, departure_date, top_n=top_n, **kwargs)
+    if not searched:
+        return None
+    ranked, _, flight_params = searched
+    return [
+        {**_flight_result(f, departure_date, flight_params), 'value_score': f.value_score}
+        for f in ranked
+    ]
+
+
+def _search_and_rank(origin_city: str, destination_city: str, departure_date: str, **kwargs):
+    """Runs the flight search and returns (ranked flights, Pareto front, search params)."""
     print(f"Starting flight search from {origin_city} to {destination_city}...")
     try:
         # NOTE: Ensure these are set in your .env file
         API_HOST = os.getenv("BOOKING_API_HOST")
-        API_KEY = os.getenv("BOOKING_API_KEY")
+        credentials = pool_from_env("BOOKING_API_KEY")
 
-        if not API_HOST or not API_KEY:
+        if not API_HOST or not credentials:
             print("Flight API credentials (FLIGHT_API_HOST, FLIGHT_API_KEY) not set")
             return None
 
-        api_client = BookingComFlightsAPI(API_HOST, API_KEY)
+        api_client = BookingComFlightsAPI(API_HOST, credentials)
 
        # origin_city = 'Amsterdam'
         # 1. Get Origin Airport ID
@@ -37,96 +78,83 @@ def search_flights(origin_city: str, destination_city: str, departure_date: str,
             'currency_code': 'EUR' # Or get from user prefs
         }
 
-        # 4. Search for flights
-        flight_result = api_client.search_flights(**flight_params)
-        print(f"FOUND FLIGHTS {flight_result}")
-        if not flight_result or not flight_result.get('data', {}).get('flightOffers'):
+        # 4. Search for flights, parsed into compact records straight away
+        flights = api_client.search_flight_candidates(**flight_params)
+        if flights is None:
             print("No flight offers found in API response.")
             return None
 
-        # 5. Parse the first flight offer
-        flight_offers = flight_result['data']['flightOffers']
-        if not flight_offers:
+        # 5. Rank every offer, the response already holds the alternatives
+        if not flights:
             print("Flight offers list is empty.")
             return None
-            
-        first_offer = flight_offers[0]
 
-        # Carrier (airline) data
-        carriers_data = {
-            c['iataCode']: c 
-            for c in flight_result['data'].get('aggregation', {}).get('airlines', [])
-        }
+        scored = scored_flights(flights, weights=kwargs.get('ranking_profile'))
+        ranked = rank_flights(scored, top_n=kwargs.get('top_n', 3))
+        front = pareto_front(scored)
+        print(f"✈️ Ranked {len(flights)} flight offers, {len(front)} on the price/duration Pareto front")
 
-        # Price data
-        price_breakdown = first_offer.get('priceBreakdown', {})
-        total_price_obj = price_breakdown.get('totalRounded', {})
-        total_price = total_price_obj.get('units', 0) 
-        currency = total_price_obj.get('currencyCode', 'N/A')
-
-        # Segment and Leg data
-        segments = first_offer.get('segments', [{}])
-        first_segment = segments[0]
-        legs = first_segment.get('legs', [{}])
-        first_leg = legs[0]
-
-        # Airline info
-        carrier_code = first_leg.get('flightInfo', {}).get('carrierInfo', {}).get('marketingCarrier', 'N/A')
-        airline = carriers_data.get(carrier_code, {})
-        airline_name = airline.get('name', 'Unknown Airline')
-        airline_logo_url = airline.get('logoUrl', 'N/A')
-
-        # Route and Times
-        dep_airport = first_leg.get('departureAirport', {}).get('code', 'N/A')
-        arr_airport = first_leg.get('arrivalAirport', {}).get('code', 'N/A')
-        dep_time_str = first_leg.get('departureTime', 'N/A')
-        arr_time_str = first_leg.get('arrivalTime', 'N/A')
-
-        # Format for display
-        title = f"Flight from {dep_airport} to {arr_airport}"
-        description = f"Operated by {airline_name}. Departs: {dep_time_str}. Arrives: {arr_time_str}."
-        
-        # Create the most specific Booking.com flights search URL possible
-        # This gets users as close to the exact flight as we can
-        from urllib.parse import quote
-        
-        # Format the date properly (remove time if present)
-        date_only = departure_date.split('T')[0] if 'T' in departure_date else departure_date
-        
-        # Extract carrier code for airline filter
-        carrier_code = first_leg.get('flightInfo', {}).get('carrierInfo', {}).get('marketingCarrier', '')
-        
-        # Build URL with maximum relevant parameters to pre-filter results
-        booking_url = (
-            f"https://www.booking.com/flights/"
-            f"?type=ONEWAY"
-            f"&adults={flight_params['adults']}"
-            f"&cabinClass={flight_params['cabinClass']}"
-            f"&from={quote(dep_airport)}"
-            f"&to={quote(arr_airport)}"
-            f"&depart={date_only}"
-            f"&sort={flight_params['sort']}"
-        )
-        
-        # Add airline filter if available to narrow results
-        if carrier_code:
-            booking_url += f"&airlines={carrier_code}"
-
-        return {
-            'type': 'flight',
-            'title': title,
-            'description': description,
-            'price': total_price,
-            'currency': currency,
-            'image_url': airline_logo_url,
-            'booking_url': booking_url,
-            'airline_name': airline_name,
-            'departure_time': dep_time_str,
-            'arrival_time': arr_time_str,
-            'origin_code': dep_airport,
-            'destination_code': arr_airport
-        }
+        return ranked, front, flight_params
 
     except Exception as e:
         print(f"Error in search_flights: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+def _booking_url(flight: FlightCandidate, departure_date: str, flight_params: dict) -> str:
+    """Creates the most specific Booking.com flights search URL possible for a flight."""
+    # Format the date properly (remove time if present)
+    date_only = departure_date.split('T')[0] if 'T' in departure_date else departure_date
+    
+    # Build URL with maximum relevant parameters to pre-filter results
+    booking_url = (
+        f"https://www.booking.com/flights/"
+        f"?type=ONEWAY"
+        f"&adults={flight_params['adults']}"
+        f"&cabinClass={flight_params['cabinClass']}"
+        f"&from={quote(flight.origin_code)}"
+        f"&to={quote(flight.destination_code)}"
+        f"&depart={date_only}"
+        f"&sort={flight_params['sort']}"
+    )
+    
+    # Add airline filter if available to narrow results
+    if flight.carrier_code and flight.carrier_code != 'N/A':
+        booking_url += f"&airlines={flight.carrier_code}"
+    return booking_url
+
+
+def _flight_result(flight: FlightCandidate, departure_date: str, flight_params: dict) -> dict:
+    """Flight record in the shape saved as a 'flight' suggestion."""
+    return {
+        'type': 'flight',
+        'title': f"Flight from {flight.origin_code} to {flight.destination_code}",
+        'description': (f"Operated by {flight.airline_name}. Departs: {flight.departure_time}. "
+                        f"Arrives: {flight.arrival_time}."),
+        'price': flight.price,
+        'currency': flight.currency,
+        'image_url': flight.airline_logo_url,
+        'booking_url': _booking_url(flight, departure_date, flight_params),
+        'airline_name': flight.airline_name,
+        'departure_time': flight.departure_time,
+        'arrival_time': flight.arrival_time,
+        'origin_code': flight.origin_code,
+        'destination_code': flight.destination_code,
+        'duration_minutes': flight.duration_minutes,
+        'stops': flight.stops
+    }
+
+
+def _flight_summary(flight: FlightCandidate, departure_date: str, flight_params: dict) -> dict:
+    """Compact version of a flight for the alternatives lists."""
+    return {
+        'airline_name': flight.airline_name,
+        'price': flight.price,
+        'currency': flight.currency,
+        'departure_time': flight.departure_time,
+        'arrival_time': flight.arrival_time,
+        'duration_minutes': flight.duration_minutes,
+        'stops': flight.stops,
+        'value_score': flight.value_score,
+        'booking_url': _booking_url(flight, departure_date, flight_params)
+    }
@@ -1,12 +1,15 @@
 #FlightSearch.py
-import http.client
-import json
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlencode, urlparse, parse_qs
+from agents import deadline
+from agents.credentials import CredentialPool, pool_from_env
+from agents.flight_ranking import parse_flight_offers, FLIGHT_OFFER_FIELDS
+from agents.http_client import request_json
+from agents.records import FlightCandidate
+from agents.response_cache import CachePolicy, cache_policy
 
 # --- User-Defined Parameters ---
 API_HOST = "booking-com15.p.rapidapi.com"
-API_KEY = "a4635f20famshde916da8e358adbp1ad22ejsn6e8d49abb4b1"
 
 # --- Flight Search Configuration ---
 ORIGIN_QUERY = "Mumbai" # e.g., "New York", "London"
@@ -30,31 +33,40 @@ class BookingComFlightsAPI:
     handling destination search and flight options retrieval with fallback to nearest airports.
     """
     
-    def __init__(self, api_host: str, api_key: str):
+    # Endpoints whose responses are cached (see response_cache.py); the rest
+    # always go upstream
+    CACHE_POLICIES = {
+        '/api/v1/flights/searchDestination': CachePolicy(ttl=30 * 24 * 3600, stale=30 * 24 * 3600),
+        '/api/v1/flights/searchFlights': CachePolicy(ttl=600, stale=300)
+    }
+
+    def __init__(self, api_host: str, credentials: CredentialPool):
         """
-        Initializes the API client with host and key.
+        Initializes the API client with host and key pool.
         """
         self.API_HOST = api_host
         self.HEADERS = {
-            'x-rapidapi-key': api_key,
             'x-rapidapi-host': api_host
         }
+        # Each call takes its key from the pool (see credentials.py)
+        self.CREDENTIALS = credentials
         
         # Variables set dynamically
         self.ORIGIN_ID = ""
         self.DESTINATION_ID = ""
 
-    def _make_api_call(self, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
-        """Handles the connection and makes the API request."""
-        conn = http.client.HTTPSConnection(self.API_HOST)
+    def _make_api_call(self, method: str, endpoint: str, fields=None, hedge: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Handles the connection and makes the API request. With fields (see
+        json_projection), only those paths of the response are parsed; with
+        hedge, a slow request is sent a second time (see http_client).
+        """
         print(f"\n--- Making {method} request to: {endpoint} ---")
         try:
-            conn.request(method, endpoint, headers=self.HEADERS)
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
-            
-            return json.loads(data.decode("utf-8"))
+            _, result = request_json(self.API_HOST, method, endpoint, self.HEADERS, fields, hedge=hedge,
+                                     credentials=self.CREDENTIALS,
+                                     cache=cache_policy(self.CACHE_POLICIES, endpoint))
+            return result
             
         except Exception as e:
             # This is where your previous error occurred! 
@@ -134,7 +146,7 @@ class BookingComFlightsAPI:
         
         # Retry the same query a few times in case of transient failures
         idx = 0
-        while not airport_data_dict.get('data') or idx < 3:
+        while not (airport_data_dict and airport_data_dict.get('data')) and idx < 3:
             idx += 1
             print(f"   ⏳ Retry {idx}/3 for query: '{query}'")
             airport_data_dict = self._make_api_call("GET", airport_endpoint)
@@ -222,16 +234,18 @@ class BookingComFlightsAPI:
         
         return generic_fallbacks
 
-    def search_flights(self, **kwargs) -> Optional[Dict[str, Any]]:
-        """Searches for flight options based on configured parameters."""
-        if not self.ORIGIN_ID or not self.DESTINATION_ID:
+    def _flight_endpoint(self, kwargs: Dict[str, Any]) -> Optional[str]:
+        """Builds the searchFlights endpoint, None when a route ID is missing."""
+        from_id = kwargs.get('fromId', self.ORIGIN_ID)
+        to_id = kwargs.get('toId', self.DESTINATION_ID)
+        if not from_id or not to_id:
             print("❌ Cannot search flights: Origin ID or Destination ID is missing.")
             return None
             
         # Compile all parameters, using self. properties as fallbacks
         params = {
-            'fromId': self.ORIGIN_ID,
-            'toId': self.DESTINATION_ID,
+            'fromId': from_id,
+            'toId': to_id,
             'stops': kwargs.get('stops', STOPS),
             'pageNo': kwargs.get('pageNo', PAGE_NO),
             'adults': kwargs.get('adults', ADULTS),
@@ -244,16 +258,26 @@ class BookingComFlightsAPI:
         
         # Construct the query string from the parameters
         query_string = urlencode(params)
-        flight_endpoint = f"/api/v1/flights/searchFlights?{query_string}"
+        return f"/api/v1/flights/searchFlights?{query_string}"
 
-        flight_data_dict = self._make_api_call("GET", flight_endpoint)
+    def search_flights(self, fields=None, **kwargs) -> Optional[Dict[str, Any]]:
+        """
+        Searches for flight options based on configured parameters.
+        Pass fromId/toId to search another route (e.g. the return leg) with
+        the same client, and fields to parse only part of the response.
+        """
+        flight_endpoint = self._flight_endpoint(kwargs)
+        if not flight_endpoint:
+            return None
+
+        flight_data_dict = self._make_api_call("GET", flight_endpoint, fields, hedge=True)
         
         idx = 0
-        while not flight_data_dict.get('data') or idx < 3:
+        while not (flight_data_dict and flight_data_dict.get('data')) and idx < 3 and not deadline.expired():
             idx += 1
-            flight_data_dict = self._make_api_call("GET", flight_endpoint)
+            flight_data_dict = self._make_api_call("GET", flight_endpoint, fields, hedge=True)
 
-        if flight_data_dict and flight_data_dict['data'].get('flightOffers'):
+        if flight_data_dict and flight_data_dict.get('data') and flight_data_dict['data'].get('flightOffers'):
             total_count = flight_data_dict['data'].get('aggregation', {}).get('totalCount', 0)
             print(f"✅ Flight Search Success: Found **{total_count}** flight offers.")
             return flight_data_dict
@@ -261,6 +285,17 @@ class BookingComFlightsAPI:
             print("❌ Failed to get flight search data or no flights found.")
             return None
 
+    def search_flight_candidates(self, **kwargs) -> Optional[List[FlightCandidate]]:
+        """
+        Same search as search_flights, returned as compact FlightCandidate
+        records; the raw response is dropped after parsing. Repeated searches
+        are answered by the response cache (see CACHE_POLICIES).
+        """
+        flight_data_dict = self.search_flights(fields=FLIGHT_OFFER_FIELDS, **kwargs)
+        if not flight_data_dict:
+            return None
+        return parse_flight_offers(flight_data_dict['data'])
+
 
 def display_flight_offers(response_data: Optional[Dict[str, Any]]):
     """
@@ -339,7 +374,7 @@ def display_flight_offers(response_data: Optional[Dict[str, Any]]):
 if __name__ == "__main__":
     
     # 1. Initialize the API client
-    flight_api = BookingComFlightsAPI(API_HOST, API_KEY)
+    flight_api = BookingComFlightsAPI(API_HOST, pool_from_env("BOOKING_API_KEY"))
     
     # 2. Get Origin Airport ID (e.g., Mumbai -> BOM.AIRPORT)
     origin_success = flight_api.search_airport(ORIGIN_QUERY, is_origin=True)
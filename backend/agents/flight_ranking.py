@@ -0,0 +1,168 @@
+import heapq
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Union
+from agents.records import FlightCandidate
+
+# Scoring weights per preference profile. Each weight is the number of points
+# (out of 100) the component contributes at its best value.
+WEIGHT_PROFILES = {
+    'balanced': {'price': 50, 'duration': 25, 'stops': 15, 'departure': 10},
+    'cheapest': {'price': 80, 'duration': 10, 'stops': 10, 'departure': 0},
+    'fastest': {'price': 30, 'duration': 45, 'stops': 25, 'departure': 0},
+}
+DEFAULT_PROFILE = 'balanced'
+
+# Departures between these hours (local time, end exclusive) get the departure points
+DEFAULT_DEPARTURE_WINDOW = (7, 22)
+
+# The parts of a searchFlights response parse_flight_offers reads, for
+# json_projection (most of each offer, e.g. luggage and fare rules, is skipped)
+FLIGHT_OFFER_FIELDS = [
+    'data.aggregation.{totalCount,airlines}',
+    'data.flightOffers[*].priceBreakdown.totalRounded',
+    'data.flightOffers[*].segments[*].{departureTime,arrivalTime,totalTime}',
+    'data.flightOffers[*].segments[*].legs[*].{departureTime,arrivalTime,departureAirport.code,arrivalAirport.code}',
+    'data.flightOffers[*].segments[*].legs[*].flightInfo.carrierInfo.marketingCarrier',
+]
+
+
+def resolve_weights(profile: Union[str, Dict[str, float], None] = None) -> Dict[str, float]:
+    """
+    Returns the weights for a profile name (e.g. 'fastest') or a custom dict of
+    weights; missing keys fall back to the default 'balanced' profile.
+    """
+    weights = dict(WEIGHT_PROFILES[DEFAULT_PROFILE])
+    if isinstance(profile, dict):
+        weights.update(profile)
+    elif profile:
+        weights = dict(WEIGHT_PROFILES.get(str(profile).lower(), weights))
+    return weights
+
+
+def _duration_minutes(segment: Dict[str, Any]) -> Optional[int]:
+    """Segment travel time in minutes, from totalTime (seconds) or the leg timestamps."""
+    if segment.get('totalTime'):
+        return int(segment['totalTime']) // 60
+    try:
+        departure = datetime.fromisoformat(segment['departureTime'])
+        arrival = datetime.fromisoformat(segment['arrivalTime'])
+        # Local times across time zones, so this is only an approximation
+        return int((arrival - departure).total_seconds()) // 60
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def parse_flight_offers(flight_data: Dict[str, Any]) -> List[FlightCandidate]:
+    """
+    Turns the 'data' of a searchFlights response into compact FlightCandidate
+    records, one per offer, so the response itself can be dropped.
+    Offers without a price are skipped.
+    """
+    carriers_data = {
+        c['iataCode']: c
+        for c in flight_data.get('aggregation', {}).get('airlines', [])
+    }
+
+    records = []
+    for index, offer in enumerate(flight_data.get('flightOffers', [])):
+        try:
+            total_price_obj = offer.get('priceBreakdown', {}).get('totalRounded', {})
+            price = total_price_obj.get('units', 0)
+            if not price:
+                continue
+
+            segment = (offer.get('segments') or [{}])[0]
+            legs = segment.get('legs') or [{}]
+            first_leg, last_leg = legs[0], legs[-1]
+            carrier_code = first_leg.get('flightInfo', {}).get('carrierInfo', {}).get('marketingCarrier', 'N/A')
+            airline = carriers_data.get(carrier_code, {})
+            departure_time = segment.get('departureTime') or first_leg.get('departureTime', 'N/A')
+
+            records.append(FlightCandidate(
+                offer_index=index,
+                price=price,
+                currency=total_price_obj.get('currencyCode', 'N/A'),
+                duration_minutes=_duration_minutes(segment),
+                stops=len(legs) - 1,
+                departure_time=departure_time,
+                arrival_time=segment.get('arrivalTime') or last_leg.get('arrivalTime', 'N/A'),
+                departure_hour=int(departure_time[11:13]) if departure_time[11:13].isdigit() else None,
+                carrier_code=carrier_code,
+                airline_name=airline.get('name', 'Unknown Airline'),
+                airline_logo_url=airline.get('logoUrl', 'N/A'),
+                origin_code=first_leg.get('departureAirport', {}).get('code', 'N/A'),
+                destination_code=last_leg.get('arrivalAirport', {}).get('code', 'N/A')
+            ))
+        except Exception as e:
+            print(f"   Warning: Error processing flight offer: {e}")
+            continue
+
+    return records
+
+
+def score_flights(flights: List[FlightCandidate], weights: Dict[str, float],
+                  departure_window: tuple = DEFAULT_DEPARTURE_WINDOW) -> List[float]:
+    """
+    Score out of 100 for each flight, relative to the other offers:
+    - Cheapest offer gets all price points, the most expensive none
+    - Shortest offer gets all duration points (unknown durations get none)
+    - Direct flights get all stop points, halved for every stop
+    - Departing inside the departure window gets the departure points
+    """
+    prices = [f.price for f in flights]
+    durations = [f.duration_minutes for f in flights if f.duration_minutes is not None]
+    min_price, max_price = min(prices, default=0), max(prices, default=0)
+    min_duration, max_duration = min(durations, default=0), max(durations, default=0)
+
+    scores = []
+    for f in flights:
+        price_score = weights['price']
+        if max_price > min_price:
+            price_score *= (max_price - f.price) / (max_price - min_price)
+
+        duration_score = 0
+        if f.duration_minutes is not None:
+            duration_score = weights['duration']
+            if max_duration > min_duration:
+                duration_score *= (max_duration - f.duration_minutes) / (max_duration - min_duration)
+
+        stops_score = weights['stops'] / (2 ** f.stops)
+
+        departure_score = 0
+        if f.departure_hour is not None and departure_window[0] <= f.departure_hour < departure_window[1]:
+            departure_score = weights['departure']
+
+        scores.append(price_score + duration_score + stops_score + departure_score)
+    return scores
+
+
+def scored_flights(flights: List[FlightCandidate], weights: Union[str, Dict[str, float], None] = None,
+                   departure_window: tuple = DEFAULT_DEPARTURE_WINDOW) -> List[FlightCandidate]:
+    """Every flight with its value_score set, in the API's order."""
+    scores = score_flights(flights, resolve_weights(weights), departure_window)
+    return [f.with_score(score) for f, score in zip(flights, scores)]
+
+
+def pareto_front(flights: List[FlightCandidate]) -> List[FlightCandidate]:
+    """
+    Flights no other flight beats on both price and duration, cheapest first.
+    Flights with an unknown duration are left out. Pass scored_flights() so
+    every member carries its value_score.
+    """
+    front = []
+    best_duration = None
+    for f in sorted((f for f in flights if f.duration_minutes is not None),
+                    key=lambda f: (f.price, f.duration_minutes)):
+        if best_duration is None or f.duration_minutes < best_duration:
+            front.append(f)
+            best_duration = f.duration_minutes
+    return front
+
+
+def rank_flights(flights: List[FlightCandidate], top_n: int = 3) -> List[FlightCandidate]:
+    """
+    Top N of scored flights (see scored_flights), best first. Equal scores
+    keep the API's order.
+    """
+    best = heapq.nsmallest(top_n, enumerate(flights), key=lambda item: (-item[1].value_score, item[0]))
+    return [f for _, f in best]
@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Any, Callable, Dict, Optional
+from agents import deadline
+
+# Latencies kept per endpoint to estimate its p90, and how many are needed
+# before hedging starts
+LATENCY_SAMPLES = 200
+MIN_SAMPLES = 20
+HEDGE_PERCENTILE = 0.9
+# Never hedge sooner than this, whatever the p90 says
+MIN_HEDGE_DELAY_SECONDS = 0.05
+# Hedges may add at most this share of an endpoint's requests. Each request
+# earns HEDGE_BUDGET_PERCENT / 100 of a hedge, saved up to HEDGE_BUDGET_MAX.
+HEDGE_BUDGET_PERCENT = 10
+HEDGE_BUDGET_MAX = 5.0
+
+
+class HedgePolicy:
+    """
+    Latency history and hedge budget of one endpoint (host + path). A
+    request still unanswered after the endpoint's p90 gets a second copy,
+    as long as the budget has a whole hedge saved up.
+    """
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._budget = 0.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self) -> Optional[float]:
+        """Seconds to wait before hedging, or None while there are too few samples."""
+        with self._lock:
+            if len(self._latencies) < MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return max(MIN_HEDGE_DELAY_SECONDS, ordered[int(HEDGE_PERCENTILE * (len(ordered) - 1))])
+
+    def started(self):
+        with self._lock:
+            self.requests += 1
+            # Rounded: float shares (ten 0.1s) would otherwise fall just short of a whole hedge
+            self._budget = min(HEDGE_BUDGET_MAX, round(self._budget + HEDGE_BUDGET_PERCENT / 100, 9))
+
+    def take_hedge(self) -> bool:
+        with self._lock:
+            if self._budget < 1:
+                self.over_budget += 1
+                return False
+            self._budget -= 1
+            self.hedged += 1
+            return True
+
+    def hedge_won(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def observe(self, latency: float):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def stats(self) -> Dict[str, Any]:
+        p90 = self.delay()
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'hedged': self.hedged,
+                'hedge_wins': self.hedge_wins,
+                'over_budget': self.over_budget,
+                'p90_ms': round(p90 * 1000, 1) if p90 is not None else None
+            }
+
+
+_policies: Dict[str, HedgePolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def hedge_policy(endpoint: str) -> HedgePolicy:
+    """The process-wide policy for an endpoint."""
+    with _policies_lock:
+        policy = _policies.get(endpoint)
+        if policy is None:
+            policy = _policies[endpoint] = HedgePolicy(endpoint)
+        return policy
+
+
+def _start(policy: HedgePolicy, fn: Callable[[], Any]) -> Future:
+    """Runs fn on its own thread, recording its latency when it answers."""
+    future = Future()
+
+    def run():
+        started = time.monotonic()
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            policy.observe(time.monotonic() - started)
+            future.set_result(result)
+
+    threading.Thread(target=deadline.in_context(run), daemon=True).start()
+    return future
+
+
+def hedged_call(endpoint: str, fn: Callable[[], Any], hedge_fn: Optional[Callable[[], Any]] = None,
+                can_hedge: Callable[[], bool] = lambda: True) -> Any:
+    """
+    Calls fn and, if it hasn't answered within the endpoint's p90 and
+    can_hedge() agrees, hedge_fn (fn by default) alongside it. The first
+    answer wins; the other call is left to finish on its own and its
+    result dropped. An error is only raised once both calls have failed.
+    """
+    policy = hedge_policy(endpoint)
+    policy.started()
+    delay = policy.delay()
+    if delay is None:
+        started = time.monotonic()
+        result = fn()
+        policy.observe(time.monotonic() - started)
+        return result
+
+    primary = _start(policy, fn)
+    done, _ = wait([primary], timeout=delay)
+    if done or not can_hedge() or not policy.take_hedge():
+        return primary.result()
+
+    hedge = _start(policy, hedge_fn or fn)
+    pending = {primary, hedge}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        answered = next((future for future in done if future.exception() is None), None)
+        if answered is not None:
+            if answered is hedge:
+                policy.hedge_won()
+            return answered.result()
+        if not pending:
+            return primary.result()  # raises the primary's error
+
+
+def hedging_stats() -> Dict[str, Dict[str, Any]]:
+    """Requests, hedges sent and won, and current p90 per hedged endpoint."""
+    with _policies_lock:
+        policies = list(_policies.values())
+    return {policy.endpoint: policy.stats() for policy in policies}
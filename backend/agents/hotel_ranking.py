@@ -0,0 +1,289 @@
+import heapq
+from numbers import Real
+from typing import Dict, List, Optional, Any, Iterable, Union
+from agents.records import HotelCandidate
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, the scalar scorer covers everything
+    np = None
+
+# Scoring weights per preference profile. Each weight is the number of points
+# (out of 100) the component contributes at its best value.
+WEIGHT_PROFILES = {
+    'value': {'rating': 40, 'price': 30, 'reviews': 20, 'wifi': 5, 'breakfast': 5},
+    'luxury': {'rating': 60, 'price': 10, 'reviews': 20, 'wifi': 5, 'breakfast': 5},
+    'family': {'rating': 35, 'price': 25, 'reviews': 20, 'wifi': 5, 'breakfast': 15},
+}
+DEFAULT_PROFILE = 'value'
+
+# Budget multipliers answered from the same pass when nothing fits the budget
+RELAXED_BUDGET_FACTORS = (1.2,)
+
+# Pages at least this large are scored column-wise with numpy when available
+VECTORIZE_MIN_BATCH = 256
+_PLAIN_NUMBERS = {int, float}
+
+
+def resolve_weights(profile: Union[str, Dict[str, float], None] = None) -> Dict[str, float]:
+    """
+    Returns the weights for a profile name (e.g. 'luxury') or a custom dict of
+    weights; missing keys fall back to the default 'value' profile.
+    """
+    weights = dict(WEIGHT_PROFILES[DEFAULT_PROFILE])
+    if isinstance(profile, dict):
+        weights.update(profile)
+    elif profile:
+        weights = dict(WEIGHT_PROFILES.get(str(profile).lower(), weights))
+    return weights
+
+
+def score_hotel(hotel: HotelCandidate, price_max: float, weights: Dict[str, float]) -> float:
+    """
+    Value score out of 100:
+    - Higher rating is better
+    - Lower price (relative to the budget) is better
+    - More reviews indicate reliability (capped at 100 reviews)
+    - Amenities bonus for free WiFi and breakfast
+    """
+    rating = hotel.rating
+    rating_score = (rating / 10) * weights['rating'] if rating > 0 else 0
+    price_score = (1 - (hotel.price / price_max)) * weights['price'] if price_max > 0 else 0
+    review_score = min(hotel.review_count / 100, 1) * weights['reviews']
+
+    amenities_score = 0
+    if hotel.has_wifi:
+        amenities_score += weights['wifi']
+    if hotel.has_breakfast:
+        amenities_score += weights['breakfast']
+
+    return rating_score + price_score + review_score + amenities_score
+
+
+def _hotel_values(hotel: Dict[str, Any]) -> Optional[tuple]:
+    """
+    (price, rating, review_count, lowercased label) of a raw hotel, or None
+    without a usable price. Same lookups as HotelCandidate.from_raw without
+    building a record, since this runs once per hotel on the vectorized path.
+    """
+    property_data = hotel.get('property', {})
+    price = property_data.get('priceBreakdown', {}).get('grossPrice', {}).get('value', 0)
+    if price == 0:
+        return None
+
+    values = (price, property_data.get('reviewScore', 0), property_data.get('reviewCount', 0))
+    if not {type(value) for value in values} <= _PLAIN_NUMBERS and \
+            not all(isinstance(value, Real) for value in values):
+        raise TypeError(f"non-numeric hotel fields {values}")
+    return values + (property_data.get('accessibilityLabel', '').lower(),)
+
+
+def extract_hotel_columns(hotels: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Columnar version of HotelCandidate.from_raw for a list of raw hotels.
+    Returns numpy arrays of price, rating, review_count, has_wifi and
+    has_breakfast plus a `valid` mask; hotels without a usable price or with
+    non-numeric fields are marked invalid, as the scalar scorer skips them.
+    """
+    price, rating, review_count, has_wifi, has_breakfast, valid = [], [], [], [], [], []
+
+    for hotel in hotels:
+        try:
+            values = _hotel_values(hotel)
+        except Exception as e:
+            print(f"   Warning: Error processing hotel: {e}")
+            values = None
+
+        valid.append(values is not None)
+        values = values or (0, 0, 0, '')
+        price.append(values[0])
+        rating.append(values[1])
+        review_count.append(values[2])
+        has_wifi.append('free wifi' in values[3])
+        has_breakfast.append('breakfast' in values[3])
+
+    return {
+        'price': np.array(price, dtype=float),
+        'rating': np.array(rating, dtype=float),
+        'review_count': np.array(review_count, dtype=float),
+        'has_wifi': np.array(has_wifi, dtype=bool),
+        'has_breakfast': np.array(has_breakfast, dtype=bool),
+        'valid': np.array(valid, dtype=bool)
+    }
+
+
+def score_hotel_columns(columns: Dict[str, Any], price_max: float, weights: Dict[str, float]):
+    """
+    Vectorized score_hotel over extract_hotel_columns output. Operations run
+    in the same order as the scalar scorer, so scores are bit-identical.
+    """
+    rating = columns['rating']
+    rating_score = np.where(rating > 0, (rating / 10) * weights['rating'], 0)
+    if price_max > 0:
+        price_score = (1 - (columns['price'] / price_max)) * weights['price']
+    else:
+        price_score = np.zeros(len(rating))
+    review_score = np.minimum(columns['review_count'] / 100, 1) * weights['reviews']
+    amenities_score = (np.where(columns['has_wifi'], weights['wifi'], 0)
+                       + np.where(columns['has_breakfast'], weights['breakfast'], 0))
+    return rating_score + price_score + review_score + amenities_score
+
+
+def top_k_indices(scores, mask, k: int):
+    """
+    Indices of the k best scores where mask is set, best first. Equal scores
+    keep their input order, like a stable descending sort.
+    """
+    candidates = np.flatnonzero(mask)
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+
+    candidate_scores = scores[candidates]
+    if len(candidates) > k:
+        # Keep everything tied with the k-th best so tie-breaking stays exact
+        kth_best = np.partition(candidate_scores, len(candidates) - k)[len(candidates) - k]
+        keep = candidate_scores >= kth_best
+        candidates, candidate_scores = candidates[keep], candidate_scores[keep]
+
+    order = np.lexsort((candidates, -candidate_scores))
+    return candidates[order[:k]]
+
+
+class HotelRanker:
+    """
+    Streaming top-k ranker for hotel search results.
+
+    Only the top k of each tier are kept, as compact HotelCandidate records,
+    so the raw pages can be freed as soon as they are ranked.
+
+    Hotels are fed page by page with `add`. Every budget tier (the budget
+    itself plus each relaxed budget) keeps a bounded min-heap of its best k
+    hotels, so ranking costs O(n log k) and a relaxed budget never needs a
+    second pass over the results.
+
+    Large pages are scored with numpy (see score_hotel_columns) and only each
+    tier's top k reach the heaps; pass vectorize=False to force the scalar path.
+    """
+
+    def __init__(self, price_max: float, top_n: int = 3,
+                 relax_factors: Iterable[float] = RELAXED_BUDGET_FACTORS,
+                 weights: Union[str, Dict[str, float], None] = None,
+                 vectorize: bool = True):
+        self.price_max = price_max
+        self.top_n = top_n
+        self.weights = resolve_weights(weights)
+        self.vectorize = vectorize and np is not None
+        self.budgets = [price_max]
+        for factor in relax_factors:
+            if int(price_max * factor) not in self.budgets:
+                self.budgets.append(int(price_max * factor))
+        self._heaps: Dict[float, list] = {budget: [] for budget in self.budgets}
+        self._in_budget: Dict[float, int] = {budget: 0 for budget in self.budgets}
+        self._seen = 0
+
+    @property
+    def hotels_seen(self) -> int:
+        return self._seen
+
+    def add(self, hotels: Iterable[Dict[str, Any]]):
+        """Scores a page of raw hotels into every budget tier."""
+        if self.vectorize:
+            hotels = hotels if isinstance(hotels, list) else list(hotels)
+            if len(hotels) >= VECTORIZE_MIN_BATCH:
+                self._add_batch(hotels)
+                return
+
+        for hotel in hotels:
+            self._seen += 1
+            try:
+                candidate = HotelCandidate.from_raw(hotel)
+                if candidate is None:
+                    continue
+
+                for budget in self.budgets:
+                    if candidate.price > budget:
+                        continue
+                    self._in_budget[budget] += 1
+                    score = score_hotel(candidate, budget, self.weights)
+                    # Earlier hotels win ties, matching a stable descending sort
+                    key = (score, -self._seen)
+                    heap = self._heaps[budget]
+                    if len(heap) < self.top_n:
+                        heapq.heappush(heap, (key, candidate))
+                    elif key > heap[0][0]:
+                        heapq.heapreplace(heap, (key, candidate))
+            except Exception as e:
+                print(f"   Warning: Error processing hotel: {e}")
+                continue
+
+    def _add_batch(self, hotels: List[Dict[str, Any]]):
+        first_seen = self._seen + 1
+        self._seen += len(hotels)
+        columns = extract_hotel_columns(hotels)
+        valid = columns['valid']
+        # Records of the hotels that made some tier's top k, shared by the tiers
+        built: Dict[int, HotelCandidate] = {}
+
+        for budget in self.budgets:
+            scores = score_hotel_columns(columns, budget, self.weights)
+            while True:
+                mask = valid & (columns['price'] <= budget)
+                best = [int(i) for i in top_k_indices(scores, mask, self.top_n)]
+                # A hotel the columns accept can still fail as a record; like the
+                # scalar path, skip it and take the next best instead
+                if all(self._build(hotels, i, built, valid) for i in best):
+                    break
+
+            self._in_budget[budget] += int(mask.sum())
+            heap = self._heaps[budget]
+            for i in best:
+                key = (float(scores[i]), -(first_seen + i))
+                if len(heap) < self.top_n:
+                    heapq.heappush(heap, (key, built[i]))
+                elif key > heap[0][0]:
+                    heapq.heapreplace(heap, (key, built[i]))
+
+    @staticmethod
+    def _build(hotels: List[Dict[str, Any]], i: int, built: Dict[int, HotelCandidate], valid) -> bool:
+        """Builds hotels[i]'s record into built; marks it invalid and returns False if it can't be."""
+        if i in built:
+            return True
+        try:
+            candidate = HotelCandidate.from_raw(hotels[i])
+        except Exception as e:
+            print(f"   Warning: Error processing hotel: {e}")
+            candidate = None
+        if candidate is None:
+            valid[i] = False
+            return False
+        built[i] = candidate
+        return True
+
+    def ranked(self, budget: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Best hotels for a budget tier (default: the original budget), best
+        first, as {'hotel': HotelCandidate, 'value_score': float} dicts.
+        """
+        heap = self._heaps[self.price_max if budget is None else budget]
+        return [
+            {'hotel': hotel, 'value_score': key[0]}
+            for key, hotel in sorted(heap, key=lambda item: item[0], reverse=True)
+        ]
+
+    def is_saturated(self, min_candidates: int, min_score: float) -> bool:
+        """
+        True once the original budget has seen at least `min_candidates`
+        hotels and its top k all score `min_score` or more, i.e. paging
+        further is unlikely to change the answer.
+        """
+        heap = self._heaps[self.price_max]
+        return (self._in_budget[self.price_max] >= min_candidates
+                and len(heap) >= self.top_n
+                and heap[0][0][0] >= min_score)
+
+    def best_tier(self) -> tuple:
+        """Returns (budget, ranked hotels) for the tightest budget with any match."""
+        for budget in self.budgets:
+            if self._heaps[budget]:
+                return budget, self.ranked(budget)
+        return self.price_max, []
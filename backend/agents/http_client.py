@@ -0,0 +1,315 @@
+import http.client
+import os
+import threading
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from agents import deadline, rate_limit
+from agents.circuit_breaker import CircuitOpenError, circuit_breaker
+from agents.concurrency import SLOT_WAIT_SECONDS, upstream_limiter
+from agents.credentials import CredentialPool
+from agents.hedging import hedged_call
+from agents.json_projection import Fields, expand_fields, read_json
+from agents.response_cache import CachePolicy, response_cache
+from agents.singleflight import SingleFlight
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, servers fall back to gzip
+    brotli = None
+
+# Shared request path of the upstream API clients (Booking.com, TripAdvisor,
+# Geoapify): asks for a compressed body and decompresses it as it is read,
+# so the JSON parser starts on the first chunk.
+ACCEPT_ENCODING = 'br, gzip, deflate' if brotli else 'gzip, deflate'
+READ_CHUNK_BYTES = 16 * 1024
+# Socket timeout of a request made outside any deadline; inside one, the
+# time left is used instead (see deadline.py)
+UPSTREAM_TIMEOUT_SECONDS = 20
+
+# Bytes transferred per upstream host since the process started
+_transfer_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+# Identical concurrent requests share one call; with UPSTREAM_COALESCE_DIR
+# set, so do the worker processes using that directory
+_single_flight = SingleFlight(shared_dir=os.getenv('UPSTREAM_COALESCE_DIR') or None)
+
+# GETs without a cache policy of their own are still written to the response
+# cache, never served from it except as the last good response while the
+# host's circuit breaker is open (kept EXPIRED_KEEP_SECONDS)
+FALLBACK_POLICY = CachePolicy(ttl=0)
+_served_from_fallback: Dict[str, int] = {}
+
+
+class ResponseBody:
+    """
+    File-like view of an http.client response that undoes its
+    Content-Encoding while being read and counts bytes on the wire and
+    after decoding. Uncompressed bodies are passed through as they are.
+    """
+
+    def __init__(self, response, encoding: Optional[str] = None):
+        self._response = response
+        self.encoding = (encoding or '').strip().lower()
+        if self.encoding in ('gzip', 'x-gzip'):
+            self._decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == 'deflate':
+            self._decoder = zlib.decompressobj()
+        elif self.encoding == 'br' and brotli is not None:
+            self._decoder = brotli.Decompressor()
+        elif self.encoding in ('', 'identity'):
+            self._decoder = None
+        else:
+            raise ValueError(f"Unsupported Content-Encoding: {encoding}")
+        self._buffer = bytearray()
+        self._eof = False
+        self._first_chunk = True
+        self.wire_bytes = 0
+        self.decoded_bytes = 0
+
+    @property
+    def length(self) -> Optional[int]:
+        """Decoded body length when known up front (uncompressed with a Content-Length)."""
+        return getattr(self._response, 'length', None) if self._decoder is None else None
+
+    def _decode(self, chunk: bytes) -> bytes:
+        if self.encoding == 'br':
+            return self._decoder.process(chunk)
+        try:
+            return self._decoder.decompress(chunk)
+        except zlib.error:
+            # Some servers send raw deflate without the zlib header
+            if self.encoding != 'deflate' or not self._first_chunk:
+                raise
+            self._decoder = zlib.decompressobj(-zlib.MAX_WBITS)
+            return self._decoder.decompress(chunk)
+        finally:
+            self._first_chunk = False
+
+    def _fill(self, size: Optional[int]):
+        while not self._eof and (size is None or len(self._buffer) < size):
+            chunk = self._response.read(READ_CHUNK_BYTES)
+            self.wire_bytes += len(chunk)
+            if not chunk:
+                self._eof = True
+                if self.encoding != 'br':
+                    self._buffer += self._decoder.flush()
+                break
+            self._buffer += self._decode(chunk)
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if size is not None and size < 0:
+            size = None
+        if self._decoder is None:
+            chunk = self._response.read(size)
+            self.wire_bytes += len(chunk)
+            self.decoded_bytes += len(chunk)
+            return chunk
+
+        self._fill(size)
+        if size is None:
+            size = len(self._buffer)
+        chunk = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self.decoded_bytes += len(chunk)
+        return chunk
+
+
+def _record_transfer(host: str, body: ResponseBody):
+    with _stats_lock:
+        stats = _transfer_stats.setdefault(host, {
+            'requests': 0, 'compressed_responses': 0, 'wire_bytes': 0, 'decoded_bytes': 0
+        })
+        stats['requests'] += 1
+        stats['compressed_responses'] += 1 if body.encoding not in ('', 'identity') else 0
+        stats['wire_bytes'] += body.wire_bytes
+        stats['decoded_bytes'] += body.decoded_bytes
+
+
+def request_key(host: str, method: str, endpoint: str, fields: Optional[Fields] = None) -> str:
+    """Identifies a request regardless of query parameter order, for coalescing."""
+    parts = urlsplit(endpoint)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    projection = ','.join(sorted(expand_fields(fields))) if fields else '*'
+    return f"{method.upper()} {host}{parts.path}?{query} [{projection}]"
+
+
+def request_json(host: str, method: str, endpoint: str, headers: Optional[Dict[str, str]] = None,
+                 fields: Optional[Fields] = None,
+                 rate_wait: float = rate_limit.RATE_LIMIT_WAIT_SECONDS, hedge: bool = False,
+                 credentials: Optional[CredentialPool] = None,
+                 cache: Optional[CachePolicy] = None) -> Tuple[int, Any]:
+    """
+    Makes one HTTPS request and returns (status, parsed JSON body). With
+    fields, only those paths are parsed (see json_projection.read_json).
+    Identical GETs already in flight are joined instead of repeated.
+
+    With credentials, each request goes out with the pool's best key
+    (see credentials.CredentialPool), and one rejected with a 401 or 429
+    is tried once more with another key. Each request then takes a token
+    from the shared per host+key rate limit, waiting up to rate_wait
+    seconds (rate_limit.RateLimitTimeout after that). Inside a
+    deadline.within() block, no wait or socket timeout goes past the
+    deadline and deadline.DeadlineExceeded is raised once it has passed;
+    a request cut short that way doesn't count against the host's circuit
+    breaker or concurrency limit.
+    While the host's circuit breaker is open, the last good response to
+    the same GET is returned from the response cache if it still has one
+    (see response_cache.EXPIRED_KEEP_SECONDS), otherwise CircuitOpenError
+    is raised without sending anything. Connection and parse errors are
+    raised for the caller to report.
+
+    With hedge, a GET still unanswered after the endpoint's usual p90 is
+    sent a second time and the first answer used (see hedging.hedged_call).
+    The second copy only goes out while the host has a spare concurrency
+    slot and a rate limit token is free right away.
+
+    With cache (a client's CACHE_POLICIES entry, see response_cache), a
+    GET's 200 response is kept in the tiered response cache and reused
+    while fresh; once stale it is still returned while one background call
+    refreshes it.
+    """
+    if method.upper() != 'GET':
+        return _request(host, method, endpoint, headers, fields, rate_wait, credentials)
+    key = request_key(host, method, endpoint, fields)
+
+    def fetch():
+        if not hedge:
+            return _request(host, method, endpoint, headers, fields, rate_wait, credentials)
+        return hedged_call(
+            host + urlsplit(endpoint).path,
+            lambda: _request(host, method, endpoint, headers, fields, rate_wait, credentials),
+            hedge_fn=lambda: _request(host, method, endpoint, headers, fields, 0, credentials),
+            can_hedge=lambda: upstream_limiter(host).spare() > 0
+        )
+
+    def load():
+        status, result = _single_flight.do(key, fetch, shareable=lambda response: response[0] == 200)
+        if status == 200 and cache is None:
+            response_cache().set(key, result, FALLBACK_POLICY)
+        return status, result
+
+    try:
+        return load() if cache is None else response_cache().fetch(key, cache, load)
+    except CircuitOpenError:
+        hit = response_cache().get(key, cache or FALLBACK_POLICY, allow_expired=True)
+        if hit is None:
+            raise
+        with _stats_lock:
+            _served_from_fallback[host] = _served_from_fallback.get(host, 0) + 1
+        print(f"   ↪ {host} is unavailable, using the last good response")
+        return 200, hit[1]
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None  # missing, or an HTTP date
+
+
+def _request(host: str, method: str, endpoint: str, headers: Optional[Dict[str, str]],
+             fields: Optional[Fields], rate_wait: float,
+             credentials: Optional[CredentialPool] = None) -> Tuple[int, Any]:
+    if credentials is None:
+        return _send(host, method, endpoint, headers, fields, rate_wait)
+    for attempt in range(2):
+        deadline.check(f"calling {host}")
+        api_key = credentials.acquire()
+        try:
+            keyed_endpoint, keyed_headers = credentials.apply(api_key, endpoint, headers)
+            status, result = _send(host, method, keyed_endpoint, keyed_headers, fields, rate_wait,
+                                   credentials, api_key)
+        finally:
+            credentials.release(api_key)
+        if status not in (401, 429) or attempt or not credentials.available():
+            return status, result
+        print(f"   ↪ Retrying {host} with another {credentials.name} key")
+
+
+def _send(host: str, method: str, endpoint: str, headers: Optional[Dict[str, str]],
+          fields: Optional[Fields], rate_wait: float, credentials: Optional[CredentialPool] = None,
+          api_key: Optional[str] = None) -> Tuple[int, Any]:
+    deadline.check(f"calling {host}")
+    breaker = circuit_breaker(host)
+    if not breaker.allow():
+        raise CircuitOpenError(f"{host} is failing, not sending requests to it for now")
+    api_key = api_key or (headers or {}).get('x-rapidapi-key')
+    sent = False
+    try:
+        rate_limit.acquire(host, api_key, timeout=deadline.remaining(rate_wait))
+        # Checked before taking a slot, so running out of time isn't taken for host overload
+        deadline.check(f"calling {host}")
+        with upstream_limiter(host).slot(timeout=deadline.remaining(SLOT_WAIT_SECONDS)) as slot:
+            sent = True
+            timeout, clamped = _socket_timeout()
+            conn = http.client.HTTPSConnection(host, timeout=timeout)
+            body = None
+            status = None
+            caller_timeout = False
+            try:
+                conn.request(method, endpoint, headers={**(headers or {}), 'Accept-Encoding': ACCEPT_ENCODING})
+                res = conn.getresponse()
+                slot.responded()
+                if getattr(conn, 'sock', None) is not None:
+                    timeout, clamped = _socket_timeout()  # the body gets what is left
+                    conn.sock.settimeout(timeout)
+                status = res.status
+                retry_after = _retry_after_seconds(res.getheader('Retry-After'))
+                if credentials is not None:
+                    credentials.report(api_key, status, res.getheader, retry_after)
+                if status == 429:
+                    slot.overloaded()
+                    rate_limit.backoff(host, api_key, retry_after)
+                body = ResponseBody(res, res.getheader('Content-Encoding'))
+                return status, read_json(body, fields)
+            except TimeoutError as e:
+                if not clamped:
+                    raise
+                # Cut short by this caller's deadline, not slowness of the host
+                caller_timeout = True
+                raise deadline.DeadlineExceeded(f"Out of time waiting for {host}") from e
+            finally:
+                if caller_timeout:
+                    breaker.release()
+                else:
+                    # Server errors and failed connections count against the host; 429s are the rate limiter's job
+                    breaker.record(status is not None and status < 500)
+                if body is not None:
+                    _record_transfer(host, body)
+                conn.close()
+    finally:
+        if not sent:
+            breaker.release()  # no rate limit token or slot came, says nothing about the host
+
+
+def _socket_timeout() -> Tuple[float, bool]:
+    """
+    Socket timeout for the next blocking step of a request, and whether the
+    deadline shortened it below UPSTREAM_TIMEOUT_SECONDS.
+    """
+    left = deadline.remaining(UPSTREAM_TIMEOUT_SECONDS)
+    return max(0.01, left), left < UPSTREAM_TIMEOUT_SECONDS
+
+
+def transfer_stats() -> Dict[str, Dict[str, Any]]:
+    """Per-host request and byte counters, with the share of bytes compression saved."""
+    with _stats_lock:
+        stats = {host: dict(counters) for host, counters in _transfer_stats.items()}
+    for counters in stats.values():
+        decoded = counters['decoded_bytes']
+        counters['saved_percent'] = round(100 * (1 - counters['wire_bytes'] / decoded), 1) if decoded else 0.0
+    return stats
+
+
+def fallback_stats() -> Dict[str, int]:
+    """Per host, responses served from the response cache's last good result while its breaker was open."""
+    with _stats_lock:
+        return dict(_served_from_fallback)
+
+
+def coalescing_stats() -> Dict[str, int]:
+    """Upstream calls made, and identical requests that shared one instead."""
+    return {name: _single_flight.stats[name]
+            for name in ('calls', 'shared_in_process', 'shared_across_processes')}
@@ -1,5 +1,7 @@
 import json
 from database import db, TravelSuggestion, Conversation
+from suggestion_events import mark_suggestions_changed
+from unit_of_work import get_suggestions, invalidate_suggestions
 from agents.booking_agent import search_hotels
 from agents.flight_agent import search_flights
 
@@ -34,15 +36,15 @@ class ItineraryManager:
         print(f"ItineraryManager: Loading state from DB for conv_id: {self.conversation_id}")
         
         self.stays = []
+        self.shops = []
         self.journey_to = None
         self.journey_from = None
         
         trip_destination = self.prefs.get('destination')
         trip_origin = self.prefs.get('origin')
 
-        suggestions = TravelSuggestion.query.filter_by(
-            conversation_id=self.conversation_id
-        ).order_by(TravelSuggestion.created_at).all()
+        # Shared with every other layer handling this request
+        suggestions = get_suggestions(self.conversation_id)
 
         for s in suggestions:
             if s.type == 'hotel':
@@ -241,23 +243,15 @@ class ItineraryManager:
         """
         print(f"ItineraryManager: Executing 'select_ideal_choice' for ID: {suggestion_id}")
         
-        available_ids = TravelSuggestion.query.with_entities(TravelSuggestion.id).filter_by(
-            conversation_id=self.conversation_id
-        ).limit(20).all()
+        suggestions = get_suggestions(self.conversation_id)
         
         # Extract just the ID numbers
-        id_list = [id[0] for id in available_ids]
+        id_list = [s.id for s in suggestions[:20]]
         print(f"DEBUG: Available Suggestion IDs in DB session: {id_list}")
         
-        if suggestion_id not in id_list:
-            print(f"DEBUG ALERT: Requested ID {suggestion_id} is NOT in the available list.")
-
-        selected_suggestion = TravelSuggestion.query.filter_by(
-            conversation_id=self.conversation_id,
-            id=suggestion_id,
-        ).first()
-
+        selected_suggestion = next((s for s in suggestions if s.id == suggestion_id), None)
         if not selected_suggestion:
+            print(f"DEBUG ALERT: Requested ID {suggestion_id} is NOT in the available list.")
             return {"status": "error", "message": f"Suggestion with ID {suggestion_id} not found."}
 
         # Use the internal function to destroy all non-selected items of this type
@@ -282,12 +276,11 @@ class ItineraryManager:
         item_type = selected_suggestion.type
         item_id = selected_suggestion.id
         
-        # 1. Query for ALL items of the same type in this conversation
-        suggestions_to_delete = TravelSuggestion.query.filter(
-            TravelSuggestion.conversation_id == self.conversation_id,
-            TravelSuggestion.type == item_type,
-            TravelSuggestion.id != item_id # Exclude the one we want to keep
-        ).all()
+        # 1. Collect ALL items of the same type in this conversation
+        suggestions_to_delete = [
+            s for s in get_suggestions(self.conversation_id)
+            if s.type == item_type and s.id != item_id # Exclude the one we want to keep
+        ]
 
         deleted_count = 0
         for suggestion in suggestions_to_delete:
@@ -295,8 +288,19 @@ class ItineraryManager:
             deleted_count += 1
             print(f"ItineraryManager: Deleted unselected {item_type}: {suggestion.title}")
 
+        if deleted_count:
+            self._suggestions_changed()
+
         print(f"ItineraryManager: Successfully removed {deleted_count} unselected '{item_type}' suggestions.")
 
+    def _suggestions_changed(self):
+        """
+        Called after suggestions were added or deleted: drops the request's
+        memoized list and notifies subscribers once the session commits.
+        """
+        invalidate_suggestions(self.conversation_id)
+        mark_suggestions_changed(db.session, self.conversation_id)
+
     def _save_hotel_to_db(self, hotel_data: dict):
         """Internal method to save a hotel to the DB."""
         print(f"ItineraryManager: Saving hotel '{hotel_data.get('hotel_name')}' to DB.")
@@ -322,6 +326,7 @@ class ItineraryManager:
             location={'address': hotel_data.get('destination')}
         )
         db.session.add(suggestion)
+        self._suggestions_changed()
         # Note: We don't commit here. The main app request/response
         # cycle in 'process_message' will handle the commit.
 
@@ -340,9 +345,16 @@ class ItineraryManager:
             location={
                 'origin': flight_data.get('origin_code'), 
                 'destination': flight_data.get('destination_code')
+            },
+            details={
+                'duration_minutes': flight_data.get('duration_minutes'),
+                'stops': flight_data.get('stops'),
+                'alternatives': flight_data.get('alternatives', []),
+                'pareto_front': flight_data.get('pareto_front', [])
             }
         )
         db.session.add(suggestion)
+        self._suggestions_changed()
 
 
     def _save_shop_to_db(self, shop_data: dict):
@@ -357,11 +369,10 @@ class ItineraryManager:
             return
 
         # 1. 🔍 Check for existing shop (Duplicate Check)
-        existing_shop = TravelSuggestion.query.filter_by(
-            conversation_id=self.conversation_id,
-            type='shop',
-            title=shop_name  # Filter by the shop's name
-        ).first()
+        existing_shop = next((
+            s for s in get_suggestions(self.conversation_id)
+            if s.type == 'shop' and s.title == shop_name  # Match on the shop's name
+        ), None)
 
         if existing_shop:
             print(f"ItineraryManager: Shop '{shop_name}' already exists in DB. Skipping.")
@@ -393,6 +404,7 @@ class ItineraryManager:
             location=location_data
         )
         db.session.add(suggestion)
+        self._suggestions_changed()
         print(f"Added shop suggestion: {shop_name}")
 
     def _save_leisure_to_db(self, leisure_data: dict):
@@ -407,11 +419,10 @@ class ItineraryManager:
             return
 
         # 1. 🔍 Check for existing shop (Duplicate Check)
-        existing_leisure = TravelSuggestion.query.filter_by(
-            conversation_id=self.conversation_id,
-            type='leisure',
-            title=leisure_name  # Filter by the shop's name
-        ).first()
+        existing_leisure = next((
+            s for s in get_suggestions(self.conversation_id)
+            if s.type == 'leisure' and s.title == leisure_name  # Match on the shop's name
+        ), None)
 
         if existing_leisure:
             print(f"ItineraryManager: Leisure '{leisure_name}' already exists in DB. Skipping.")
@@ -443,4 +454,5 @@ class ItineraryManager:
             location=location_data
         )
         db.session.add(suggestion)
+        self._suggestions_changed()
         print(f"Added leisure suggestion: {leisure_name}")
\ No newline at end of file
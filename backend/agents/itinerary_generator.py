@@ -1,9 +1,13 @@
 import google.generativeai as genai
 import os
+from agents import deadline
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=GOOGLE_API_KEY)
 
+# Longest a single Gemini call may take; less when the request's deadline is closer
+LLM_TIMEOUT_SECONDS = 60
+
 def generate_detailed_itinerary(destination: str, arrival_date: str, departure_date: str, 
                                  activity_preferences: str = "mixed", **kwargs) -> str:
     """
@@ -79,7 +83,7 @@ def generate_detailed_itinerary(destination: str, arrival_date: str, departure_d
             system_instruction=system_instruction
         )
         
-        response = model.generate_content(user_prompt)
+        response = model.generate_content(user_prompt, request_options={'timeout': deadline.timeout(LLM_TIMEOUT_SECONDS)})
         itinerary_text = response.text
         
         # Add Google Maps links for better UX
@@ -144,7 +148,7 @@ def generate_quick_suggestions(destination: str, num_days: int, activity_type: s
     
     try:
         model = genai.GenerativeModel(model_name="gemini-2.0-flash-exp")
-        response = model.generate_content(prompt)
+        response = model.generate_content(prompt, request_options={'timeout': deadline.timeout(LLM_TIMEOUT_SECONDS)})
         return response.text
     except Exception as e:
         print(f"❌ Error generating suggestions: {e}")
@@ -0,0 +1,184 @@
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+try:
+    import ijson
+except ImportError:  # ijson is optional, the fallback parses the whole body and projects it
+    ijson = None
+
+# A projection is a list of dotted paths. "[*]" selects every item of an
+# array, "{a,b}" expands to one path per alternative (alternatives may be
+# dotted themselves), and everything below the last segment of a path is
+# kept whole:
+#   data.flightOffers[*].priceBreakdown.totalRounded
+#   data.hotels[*].property.{name,reviewScore,priceBreakdown.grossPrice}
+Fields = Union[str, Iterable[str]]
+
+# Bodies shorter than this (decoded) are cheaper to parse whole. When the
+# length isn't known up front (chunked or compressed), this much is read
+# first to find out
+STREAM_MIN_BYTES = 64 * 1024
+# ijson's C backend queues the events of a whole read before yielding them,
+# so small reads keep the event backlog (and peak memory) small
+STREAM_BUF_SIZE = 8 * 1024
+
+_BRACES = re.compile(r"\{([^{}]*)\}")
+_KEEP, _ANCESTOR, _SKIP = 0, 1, 2
+
+
+def expand_fields(fields: Fields) -> List[str]:
+    """Expands the {a,b} alternatives of a projection into plain dotted paths."""
+    pending = [fields] if isinstance(fields, str) else list(fields)
+    paths = []
+    while pending:
+        path = pending.pop(0)
+        match = _BRACES.search(path)
+        if not match:
+            paths.append(path)
+            continue
+        for alternative in match.group(1).split(','):
+            pending.append(path[:match.start()] + alternative.strip() + path[match.end():])
+    return paths
+
+
+def compile_fields(fields: Fields) -> Dict[str, Any]:
+    """
+    Turns a projection into a tree of keys ('*' for array items) where True
+    marks a subtree that is kept whole.
+    """
+    tree: Dict[str, Any] = {}
+    for path in expand_fields(fields):
+        segments = [s for s in path.replace('[*]', '.*').split('.') if s]
+        if not segments:
+            continue
+        node = tree
+        for segment in segments[:-1]:
+            child = node.get(segment)
+            if child is True:
+                break  # an enclosing path already keeps all of it
+            node = node.setdefault(segment, {})
+        else:
+            node[segments[-1]] = True
+    return tree
+
+
+def project(value: Any, tree: Union[Dict[str, Any], bool]) -> Any:
+    """Applies a compiled projection to an already parsed document."""
+    if tree is True:
+        return value
+    if isinstance(value, dict):
+        return {k: project(v, tree[k]) for k, v in value.items() if k in tree}
+    if isinstance(value, list):
+        items = tree.get('*')
+        return [project(v, items) for v in value] if items else []
+    return value
+
+
+def _prefix_sets(tree: Dict[str, Any]):
+    """ijson prefixes ('data.hotels.item.property') of kept subtrees and of the containers above them."""
+    keep, ancestors = set(), {''}
+    stack = [('', tree)]
+    while stack:
+        prefix, node = stack.pop()
+        for key, child in node.items():
+            name = 'item' if key == '*' else key
+            child_prefix = f"{prefix}.{name}" if prefix else name
+            if child is True:
+                keep.add(child_prefix)
+            else:
+                ancestors.add(child_prefix)
+                stack.append((child_prefix, child))
+    return keep, ancestors
+
+
+def _prefix_status(prefix: str, keep: set, ancestors: set) -> int:
+    if prefix in keep or any(prefix.startswith(k + '.') for k in keep):
+        return _KEEP
+    if prefix in ancestors:
+        return _ANCESTOR
+    return _SKIP
+
+
+def parse_projected(stream, fields: Fields) -> Any:
+    """
+    Parses JSON from a binary file-like object (e.g. an http.client response)
+    as it is read, materializing only the projected paths. Values outside
+    them are never built, so memory stays proportional to what is kept
+    rather than to the body. Needs ijson; see read_json for the fallback.
+    """
+    keep, ancestors = _prefix_sets(compile_fields(fields))
+    status_of: Dict[str, int] = {}
+    root: List[Any] = []
+    containers: List[Any] = [root]
+    keys: List[Optional[str]] = [None]
+
+    for prefix, event, value in ijson.parse(stream, buf_size=STREAM_BUF_SIZE, use_float=True):
+        status = status_of.get(prefix)
+        if status is None:
+            status = status_of[prefix] = _prefix_status(prefix, keep, ancestors)
+        if status == _SKIP:
+            continue
+        if event == 'map_key':
+            keys[-1] = value
+            continue
+        if event == 'end_map' or event == 'end_array':
+            containers.pop()
+            keys.pop()
+            continue
+
+        if event == 'start_map':
+            value = {}
+        elif event == 'start_array':
+            value = []
+        parent = containers[-1]
+        if type(parent) is list:
+            parent.append(value)
+        else:
+            parent[keys[-1]] = value
+        if event == 'start_map' or event == 'start_array':
+            containers.append(value)
+            keys.append(None)
+
+    return root[0] if root else None
+
+
+class _Rewound:
+    """A stream with the bytes already read from it put back in front."""
+
+    def __init__(self, head: bytes, stream):
+        self._head = head
+        self._stream = stream
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        if not self._head:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            chunk, self._head = self._head + self._stream.read(), b''
+        else:
+            chunk, self._head = self._head[:size], self._head[size:]
+        return chunk
+
+
+def read_json(stream, fields: Optional[Fields] = None) -> Any:
+    """
+    Reads and parses a JSON body. With fields, only those paths are returned:
+    streamed through ijson when it is installed and the body is at least
+    STREAM_MIN_BYTES, otherwise parsed whole and projected afterwards (same
+    result). A body of unknown length is read up to STREAM_MIN_BYTES first
+    to tell which it is.
+    """
+    if not fields or ijson is None:
+        document = json.loads(stream.read())
+        return project(document, compile_fields(fields)) if fields else document
+    length = getattr(stream, 'length', None)  # known unless chunked or compressed
+    if length is not None and length >= STREAM_MIN_BYTES:
+        return parse_projected(stream, fields)
+    if length is None:
+        head = stream.read(STREAM_MIN_BYTES)
+        if len(head) == STREAM_MIN_BYTES:  # short reads only happen at the end of the body
+            return parse_projected(_Rewound(head, stream), fields)
+        body = head
+    else:
+        body = stream.read()
+    return project(json.loads(body), compile_fields(fields))
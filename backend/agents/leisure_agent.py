@@ -15,12 +15,12 @@ def search_leisure(city: str, categories: str, radius: int = 5000, limit: int =
     try:
         # API_HOST = "api.geoapify.com"
         # # IMPORTANT: Register at Geoapify.com to get your free API key
-        # API_KEY = "65d47e40cf674629ba71ddd35290b8d8" 
-        # if not API_KEY:
+        # credentials = pool_from_env("GEOAPIFY_API_KEY", query_param="apiKey")
+        # if not credentials:
         #     print("Geoapify API key not set")
         #     return {"error": "API key not configured"}
           
-        # api_client = GeoapifyAPI(API_HOST, API_KEY)
+        # api_client = GeoapifyAPI(API_HOST, credentials)
     
         # location_data = api_client.geocode_address(city)
         # if not location_data:
@@ -1,9 +1,10 @@
 # shopclient.py
 
-import http.client
-import json
 from typing import Optional, Dict, Any, List
 from urllib.parse import urlencode
+from agents.credentials import CredentialPool
+from agents.http_client import request_json
+from agents.response_cache import CachePolicy, cache_policy
 
 class GeoapifyAPI:
     """
@@ -11,33 +12,36 @@ class GeoapifyAPI:
     handling address-to-coordinate lookup and category search.
     """
     
-    def __init__(self, api_host: str, api_key: str):
+    # Endpoints whose responses are cached (see response_cache.py); the rest
+    # always go upstream
+    CACHE_POLICIES = {
+        '/v1/geocode/search': CachePolicy(ttl=30 * 24 * 3600, stale=30 * 24 * 3600),
+        '/v2/places': CachePolicy(ttl=24 * 3600, stale=6 * 24 * 3600)
+    }
+
+    def __init__(self, api_host: str, credentials: CredentialPool):
         """
-        Initializes the API client with host and key.
+        Initializes the API client with host and key pool (the key goes in
+        the apiKey query parameter, see credentials.py).
         """
         self.api_host = api_host
-        self.api_key = api_key
+        self.credentials = credentials
         self.headers = {} 
 
     def _make_api_call(self, endpoint: str) -> Optional[Dict[str, Any]]:
         """Handles the connection and makes the API GET request."""
-        conn = http.client.HTTPSConnection(self.api_host)
-        
         # Ensure the endpoint starts with a '/'
         if not endpoint.startswith('/'):
             endpoint = '/' + endpoint
             
         print(f"\n--- Making GET request to: {self.api_host}{endpoint[:100]}... ---")
         try:
-            conn.request("GET", endpoint, headers=self.headers)
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
-            
-            response_json = json.loads(data.decode("utf-8"))
+            status, response_json = request_json(self.api_host, "GET", endpoint, self.headers,
+                                                 credentials=self.credentials,
+                                                 cache=cache_policy(self.CACHE_POLICIES, endpoint))
             
-            if res.status != 200:
-                print(f"❌ API Error (Status {res.status}): {response_json.get('message')}")
+            if status != 200:
+                print(f"❌ API Error (Status {status}): {response_json.get('message')}")
                 return None
                 
             return response_json
@@ -53,15 +57,14 @@ class GeoapifyAPI:
         
         Returns a dict with {'lat', 'lon', 'formatted'} or None.
         """
-        if not self.api_key:
+        if not self.credentials:
             print("❌ Cannot geocode: API_KEY is not set.")
             return None
         
         params = {
             'text': address_text,
             'limit': 1,       # We only want the top result
-            'format': 'json',
-            'apiKey': self.api_key
+            'format': 'json'
         }
         
         query_string = urlencode(params)
@@ -98,7 +101,7 @@ class GeoapifyAPI:
         """
         Searches for places (v2/places) matching a category within a circle.
         """
-        if not self.api_key:
+        if not self.credentials:
             print("❌ Cannot search places: API_KEY is not set.")
             return None
             
@@ -111,8 +114,7 @@ class GeoapifyAPI:
             'categories': categories,
             'filter': filter_str,
             'bias': bias_str,
-            'limit': limit,
-            'apiKey': self.api_key
+            'limit': limit
         }
         
         # Construct the query string from the parameters
@@ -1,4 +1,5 @@
 import os
+from agents.credentials import pool_from_env
 from agents.museum_client import TripAdvisorMuseumAPI
 
 def search_museums(city: str, **kwargs):
@@ -6,9 +7,9 @@ def search_museums(city: str, **kwargs):
     print(f"Starting museum search for {city}...")
     try:
         API_HOST = os.getenv("TRIPADVISOR_API_HOST")
-        API_KEY = os.getenv("TRIPADVISOR_API_KEY")
+        credentials = pool_from_env("TRIPADVISOR_API_KEY")
         
-        if not API_HOST or not API_KEY:
+        if not API_HOST or not credentials:
             print("TripAdvisor API credentials not set")
             return None
         
@@ -20,7 +21,7 @@ def search_museums(city: str, **kwargs):
         # Add any additional parameters from kwargs
         params.update(kwargs)
 
-        api_client = TripAdvisorMuseumAPI(API_HOST, API_KEY, **params)
+        api_client = TripAdvisorMuseumAPI(API_HOST, credentials, **params)
         
         # Search location
         if not api_client.search_location():
@@ -0,0 +1,174 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+
+# Requests per second and burst size allowed per upstream host and API key.
+# RapidAPI quotas are per key, so every worker process draws from the same
+# bucket (kept in SQLite, see UPSTREAM_RATE_LIMIT_DB).
+RATE_LIMITS = {
+    'booking-com15.p.rapidapi.com': (5, 10),
+    'tripadvisor16.p.rapidapi.com': (5, 10),
+    'api.geoapify.com': (5, 10),
+}
+DEFAULT_RATE_LIMIT = (5, 10)
+# How long a caller waits for a token by default before giving up
+RATE_LIMIT_WAIT_SECONDS = 10
+# Pause for the whole bucket after a 429 without a Retry-After header
+RATE_LIMIT_BACKOFF_SECONDS = 1.0
+# Bucket file when UPSTREAM_RATE_LIMIT_DB isn't set, in the app's instance folder
+DEFAULT_RATE_LIMIT_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                     'instance', 'upstream_rate_limits.db')
+
+
+class RateLimitTimeout(Exception):
+    """No token for the upstream became available before the caller's deadline."""
+
+
+class SqliteTokenBuckets:
+    """
+    Token buckets shared by every process using the same SQLite file. Each
+    reservation is one short write transaction; tokens can go negative, which
+    queues callers behind each other instead of having them poll.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            "  key TEXT PRIMARY KEY,"
+            "  tokens REAL NOT NULL,"
+            "  updated_at REAL NOT NULL"
+            ")"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=15, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def reserve(self, key: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        """Takes a token and returns how long to wait before using it, or None if that is over max_wait."""
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM buckets WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            tokens = burst if row is None else min(burst, row[0] + max(0.0, now - row[1]) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait > max_wait:
+                conn.execute("ROLLBACK")
+                return None
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+                         (key, tokens - 1, now))
+            conn.execute("COMMIT")
+            return wait
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def drain(self, key: str, rate: float, seconds: float):
+        """Empties the bucket so the next token is `seconds` away."""
+        self._connection().execute(
+            "INSERT OR REPLACE INTO buckets (key, tokens, updated_at) VALUES (?, ?, ?)",
+            (key, -seconds * rate, time.time())
+        )
+
+
+class MemoryTokenBuckets:
+    """Same buckets kept in this process only, used when the SQLite file can't be opened."""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key: str, rate: float, burst: float, max_wait: float) -> Optional[float]:
+        with self._lock:
+            now = time.time()
+            tokens, updated_at = self._buckets.get(key, (burst, now))
+            tokens = min(burst, tokens + max(0.0, now - updated_at) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if wait > max_wait:
+                return None
+            self._buckets[key] = (tokens - 1, now)
+            return wait
+
+    def drain(self, key: str, rate: float, seconds: float):
+        with self._lock:
+            self._buckets[key] = (-seconds * rate, time.time())
+
+
+_buckets = None
+_buckets_lock = threading.Lock()
+_stats: Dict[str, Dict[str, float]] = defaultdict(lambda: {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0,
+                                                          'timeouts': 0, 'backoffs': 0})
+_stats_lock = threading.Lock()
+
+
+def _get_buckets():
+    global _buckets
+    with _buckets_lock:
+        if _buckets is None:
+            path = os.getenv('UPSTREAM_RATE_LIMIT_DB') or DEFAULT_RATE_LIMIT_DB
+            try:
+                _buckets = SqliteTokenBuckets(path)
+            except (OSError, sqlite3.Error) as e:
+                print(f"⚠️ Rate limit store {path} unavailable ({e}), limiting per process only")
+                _buckets = MemoryTokenBuckets()
+        return _buckets
+
+
+def bucket_key(host: str, api_key: Optional[str] = None) -> str:
+    """host, plus a digest of the API key so the key itself isn't written to disk."""
+    if not api_key:
+        return host
+    return f"{host}:{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:12]}"
+
+
+def acquire(host: str, api_key: Optional[str] = None, timeout: float = RATE_LIMIT_WAIT_SECONDS):
+    """
+    Blocks until the host+key bucket has a token for this request. Raises
+    RateLimitTimeout if none would be available within timeout seconds.
+    """
+    key = bucket_key(host, api_key)
+    rate, burst = RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+    wait = _get_buckets().reserve(key, rate, burst, max(0.0, timeout))
+    with _stats_lock:
+        stats = _stats[key]
+        if wait is None:
+            stats['timeouts'] += 1
+        else:
+            stats['acquired'] += 1
+            if wait > 0:
+                stats['waited'] += 1
+                stats['wait_seconds'] += wait
+    if wait is None:
+        raise RateLimitTimeout(f"No request slot for {host} within {timeout:g}s")
+    if wait > 0:
+        time.sleep(wait)
+
+
+def backoff(host: str, api_key: Optional[str] = None, seconds: Optional[float] = None):
+    """Pauses every worker's requests to host+key, e.g. after a 429."""
+    key = bucket_key(host, api_key)
+    rate, _ = RATE_LIMITS.get(host, DEFAULT_RATE_LIMIT)
+    seconds = RATE_LIMIT_BACKOFF_SECONDS if seconds is None else seconds
+    print(f"⏳ Rate limited by {host}, pausing requests for {seconds:.1f}s")
+    _get_buckets().drain(key, rate, seconds)
+    with _stats_lock:
+        _stats[key]['backoffs'] += 1
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, float]]:
+    """Tokens taken, waits and timeouts per bucket in this process."""
+    with _stats_lock:
+        return {key: {**stats, 'wait_seconds': round(stats['wait_seconds'], 3)} for key, stats in _stats.items()}
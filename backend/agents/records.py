@@ -0,0 +1,124 @@
+from typing import Dict, Optional, Any, Tuple
+
+# Photo URLs kept per hotel; the suggestion only ever shows the first one
+MAX_HOTEL_PHOTOS = 3
+
+# The parts of a searchHotels response HotelCandidate.from_raw reads, for
+# json_projection (everything else on a page is skipped while parsing)
+HOTEL_SEARCH_FIELDS = [
+    'data.hotels[*].{hotel_id,accessibilityLabel}',
+    'data.hotels[*].property.{name,url,photoUrls,reviewScore,reviewCount,accessibilityLabel,priceBreakdown.grossPrice}',
+]
+# The parts of a getHotelDetails response hotel_details_summary reads. Rooms
+# are keyed by room id, which a projection path can't select, so they stay whole
+HOTEL_DETAILS_FIELDS = ['data.{url,rooms}']
+
+
+def hotel_details_summary(details: Optional[Dict[str, Any]]) -> Optional[Dict[str, Optional[str]]]:
+    """
+    The booking URL and first room photo ('url', 'room_photo_url') of a
+    getHotelDetails response, or None if it has no data. The rest of the
+    response isn't used, so only this is cached per hotel.
+    """
+    data = (details or {}).get('data')
+    if not data:
+        return None
+    room_photo_url = None
+    rooms = data.get('rooms')
+    if isinstance(rooms, dict) and rooms:
+        first_room = next(iter(rooms.values())) or {}
+        room_photo_url = next((photo['url_max1280'] for photo in first_room.get('photos') or []
+                               if photo.get('url_max1280')), None)
+    return {'url': data.get('url'), 'room_photo_url': room_photo_url}
+
+
+class HotelCandidate:
+    """
+    The fields of a Booking.com search result the ranking and the suggestion
+    need, projected from the raw hotel dict so the page can be freed.
+    """
+    __slots__ = ('hotel_id', 'name', 'description', 'url', 'photo_urls', 'price', 'currency',
+                 'rating', 'review_count', 'has_wifi', 'has_breakfast')
+
+    def __init__(self, hotel_id: Any, name: str, description: str, url: Optional[str],
+                 photo_urls: Tuple[str, ...], price: float, currency: str, rating: float,
+                 review_count: int, has_wifi: bool, has_breakfast: bool):
+        self.hotel_id = hotel_id
+        self.name = name
+        self.description = description
+        self.url = url
+        self.photo_urls = photo_urls
+        self.price = price
+        self.currency = currency
+        self.rating = rating
+        self.review_count = review_count
+        self.has_wifi = has_wifi
+        self.has_breakfast = has_breakfast
+
+    @classmethod
+    def from_raw(cls, hotel: Dict[str, Any]) -> Optional['HotelCandidate']:
+        """Projects a raw hotel dict; None for hotels without a usable price."""
+        property_data = hotel.get('property', {})
+        price_breakdown = property_data.get('priceBreakdown', {}).get('grossPrice', {})
+        price = price_breakdown.get('value', 0)
+        if price == 0:
+            return None
+
+        label = property_data.get('accessibilityLabel', '').lower()
+        return cls(
+            hotel_id=hotel.get('hotel_id'),
+            name=property_data.get('name', 'N/A'),
+            description=hotel.get('accessibilityLabel', 'N/A'),
+            url=property_data.get('url'),
+            photo_urls=tuple(property_data.get('photoUrls', [])[:MAX_HOTEL_PHOTOS]),
+            price=price,
+            currency=price_breakdown.get('currency', 'EUR'),
+            rating=property_data.get('reviewScore', 0),
+            review_count=property_data.get('reviewCount', 0),
+            has_wifi='free wifi' in label,
+            has_breakfast='breakfast' in label
+        )
+
+    def __repr__(self):
+        return f"HotelCandidate({self.hotel_id!r}, {self.name!r}, {self.price} {self.currency})"
+
+
+class FlightCandidate:
+    """
+    One searchFlights offer reduced to the fields used for ranking and
+    display, so the raw response can be dropped after parsing.
+    """
+    __slots__ = ('offer_index', 'price', 'currency', 'duration_minutes', 'stops', 'departure_time',
+                 'arrival_time', 'departure_hour', 'carrier_code', 'airline_name', 'airline_logo_url',
+                 'origin_code', 'destination_code', 'value_score')
+
+    def __init__(self, offer_index: int, price: float, currency: str, duration_minutes: Optional[int],
+                 stops: int, departure_time: str, arrival_time: str, departure_hour: Optional[int],
+                 carrier_code: str, airline_name: str, airline_logo_url: str, origin_code: str,
+                 destination_code: str, value_score: Optional[float] = None):
+        self.offer_index = offer_index
+        self.price = price
+        self.currency = currency
+        self.duration_minutes = duration_minutes
+        self.stops = stops
+        self.departure_time = departure_time
+        self.arrival_time = arrival_time
+        self.departure_hour = departure_hour
+        self.carrier_code = carrier_code
+        self.airline_name = airline_name
+        self.airline_logo_url = airline_logo_url
+        self.origin_code = origin_code
+        self.destination_code = destination_code
+        self.value_score = value_score
+
+    def with_score(self, value_score: float) -> 'FlightCandidate':
+        """Copy of this flight carrying a ranking score."""
+        copy = FlightCandidate.__new__(FlightCandidate)
+        for slot in self.__slots__:
+            setattr(copy, slot, getattr(self, slot))
+        copy.value_score = value_score
+        return copy
+
+    def __repr__(self):
+        return (f"FlightCandidate({self.origin_code}->{self.destination_code}, "
+                f"{self.departure_time}, {self.price} {self.currency})")
@@ -0,0 +1,313 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import redis
+except ImportError:  # only needed for UPSTREAM_CACHE_BACKEND=redis
+    redis = None
+
+# Responses kept in each worker's own memory, in front of the shared tier
+LRU_MAX_ENTRIES = 512
+# The shared SQLite tier deletes expired rows every this many writes
+SQLITE_PURGE_EVERY = 200
+# SQLite tier file unless UPSTREAM_CACHE_DB is set: the app's instance
+# directory, not a world-writable one
+DEFAULT_CACHE_DB = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'instance', 'upstream_response_cache.db')
+# Entries outlive their policy by this much, so that while an upstream is
+# failing get(..., allow_expired=True) can still return its last good response
+EXPIRED_KEEP_SECONDS = 6 * 3600
+
+
+class CachePolicy:
+    """
+    How long a cached response is used: fresh for ttl seconds, then served
+    stale for up to stale more seconds while one background call refreshes
+    it (stale-while-revalidate).
+    """
+    __slots__ = ('ttl', 'stale')
+
+    def __init__(self, ttl: float, stale: float = 0):
+        self.ttl = ttl
+        self.stale = stale
+
+    @property
+    def lifetime(self) -> float:
+        return self.ttl + self.stale
+
+    @property
+    def kept(self) -> float:
+        """How long the tiers keep an entry: its lifetime, then EXPIRED_KEEP_SECONDS as a fallback."""
+        return self.lifetime + EXPIRED_KEEP_SECONDS
+
+
+def cache_policy(policies: Mapping[str, CachePolicy], endpoint: str) -> Optional[CachePolicy]:
+    """The policy for endpoint's path in a client's CACHE_POLICIES, None if it isn't cached."""
+    return policies.get(urlsplit(endpoint).path)
+
+
+class LRUTier:
+    """Most recently used responses of this process, as JSON so every caller gets a copy."""
+    name = 'memory'
+
+    def __init__(self, max_entries: int = LRU_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[str, Tuple[float, float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                if entry is not None:
+                    del self._entries[key]
+                    self.stats['evictions'] += 1
+                self.stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats['hits'] += 1
+            return entry[0], entry[2]
+
+    def set(self, key: str, stored_at: float, expires_at: float, payload: bytes):
+        with self._lock:
+            self._entries[key] = (stored_at, expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def size(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class SqliteTier:
+    """Responses shared by every worker on the machine, in one SQLite file."""
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.stats = Counter()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "  key TEXT PRIMARY KEY,"
+            "  stored_at REAL NOT NULL,"
+            "  expires_at REAL NOT NULL,"
+            "  payload BLOB NOT NULL"
+            ")"
+        )
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        row = self._connection().execute(
+            "SELECT stored_at, payload FROM responses WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+        with self._lock:
+            self.stats['hits' if row else 'misses'] += 1
+        return (row[0], bytes(row[1])) if row else None
+
+    def set(self, key: str, stored_at: float, expires_at: float, payload: bytes):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO responses (key, stored_at, expires_at, payload) VALUES (?, ?, ?, ?)",
+                     (key, stored_at, expires_at, payload))
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % SQLITE_PURGE_EVERY == 0
+        if purge:
+            deleted = conn.execute("DELETE FROM responses WHERE expires_at <= ?", (time.time(),)).rowcount
+            with self._lock:
+                self.stats['evictions'] += max(0, deleted)
+
+    def size(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class RedisTier:
+    """Responses shared through any Redis-protocol server; it expires them itself."""
+    name = 'redis'
+
+    def __init__(self, url: str):
+        self._client = redis.from_url(url)
+        self._client.ping()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        value = self._client.get('upstream:' + key)
+        with self._lock:
+            self.stats['hits' if value else 'misses'] += 1
+        if not value:
+            return None
+        stored_at, _, payload = value.partition(b'\n')
+        return float(stored_at), payload
+
+    def set(self, key: str, stored_at: float, expires_at: float, payload: bytes):
+        ttl = max(1, int(expires_at - time.time()))
+        self._client.set('upstream:' + key, b'%.6f\n' % stored_at + payload, ex=ttl)
+
+    def size(self) -> int:
+        return sum(1 for _ in self._client.scan_iter('upstream:*'))
+
+
+class TieredCache:
+    """
+    Looks a response up in each tier in turn (memory, then the shared one)
+    and copies a hit into the tiers in front of it. Writes go to every tier.
+    Values are kept as JSON (they are parsed API responses), so reading a
+    shared tier never runs code from whoever wrote to it.
+    """
+
+    def __init__(self, tiers: List[Any]):
+        self.tiers = tiers
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.stats = Counter()
+
+    def get(self, key: str, policy: CachePolicy, allow_expired: bool = False) -> Optional[Tuple[float, Any]]:
+        """
+        (age in seconds, value) of a response younger than the policy's
+        lifetime, or None. With allow_expired, an older one the tiers still
+        keep is returned too (see EXPIRED_KEEP_SECONDS).
+        """
+        now = time.time()
+        for i, tier in enumerate(self.tiers):
+            try:
+                entry = tier.get(key)
+            except Exception as e:  # a broken shared tier shouldn't fail the request
+                print(f"⚠️ Response cache {tier.name} read failed: {e}")
+                continue
+            if entry is None or (not allow_expired and now - entry[0] > policy.lifetime):
+                continue
+            stored_at, payload = entry
+            try:
+                value = json.loads(payload)
+            except ValueError:
+                continue  # written by an older version, or not by us
+            for front in self.tiers[:i]:
+                front.set(key, stored_at, stored_at + policy.kept, payload)
+            return now - stored_at, value
+        return None
+
+    def set(self, key: str, value: Any, policy: CachePolicy):
+        stored_at = time.time()
+        payload = json.dumps(value).encode('utf-8')
+        for tier in self.tiers:
+            try:
+                tier.set(key, stored_at, stored_at + policy.kept, payload)
+            except Exception as e:
+                print(f"⚠️ Response cache {tier.name} write failed: {e}")
+
+    def fetch(self, key: str, policy: CachePolicy, load: Callable[[], Tuple[int, Any]]) -> Tuple[int, Any]:
+        """
+        (200, cached value) while fresh; while stale, the cached value too,
+        with load() run once in the background to refresh it; otherwise
+        load(), whose 200 responses are stored.
+        """
+        hit = self.get(key, policy)
+        if hit is not None:
+            age, value = hit
+            if age <= policy.ttl:
+                self._count('fresh_hits')
+                return 200, value
+            self._count('stale_hits')
+            self._refresh(key, policy, load)
+            return 200, value
+
+        self._count('misses')
+        status, value = load()
+        if status == 200:
+            self.set(key, value, policy)
+        return status, value
+
+    def _refresh(self, key: str, policy: CachePolicy, load: Callable[[], Tuple[int, Any]]):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def run():
+            try:
+                status, value = load()
+                if status == 200:
+                    self.set(key, value, policy)
+                    self._count('refreshes')
+            except Exception as e:
+                print(f"⚠️ Background refresh of a cached response failed: {e}")
+                self._count('refresh_errors')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        # A new thread starts without the caller's context, so the refresh
+        # isn't cut short by the request's deadline
+        threading.Thread(target=run, daemon=True).start()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def stats_by_tier(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        for tier in self.tiers:
+            try:
+                size = tier.size()
+            except Exception:
+                size = None
+            stats[tier.name] = {**{name: tier.stats[name] for name in ('hits', 'misses', 'evictions')},
+                                'entries': size}
+        return stats
+
+
+def _shared_tier():
+    backend = os.getenv('UPSTREAM_CACHE_BACKEND', 'sqlite')
+    try:
+        if backend == 'redis':
+            if redis is None:
+                raise ImportError("the redis package is not installed")
+            return RedisTier(os.getenv('UPSTREAM_CACHE_REDIS_URL', 'redis://localhost:6379/1'))
+        if backend == 'sqlite':
+            return SqliteTier(os.getenv('UPSTREAM_CACHE_DB') or DEFAULT_CACHE_DB)
+    except Exception as e:
+        print(f"⚠️ Shared response cache ({backend}) unavailable ({e}), caching per process only")
+    return None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def response_cache() -> TieredCache:
+    """The process-wide cache: the LRU tier plus the shared tier set by UPSTREAM_CACHE_BACKEND."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            shared = _shared_tier()
+            _cache = TieredCache([LRUTier()] + ([shared] if shared is not None else []))
+        return _cache
+
+
+def cache_stats() -> Dict[str, Any]:
+    """Fresh/stale hits, misses and refreshes, plus hits, misses and evictions per tier."""
+    with _cache_lock:
+        cache = _cache
+    return cache.stats_by_tier() if cache is not None else {}
@@ -1,6 +1,9 @@
-import http.client
 import json
 from typing import Dict, Any, Optional, List
+from agents.credentials import CredentialPool, pool_from_env
+from agents.http_client import request_json
+from agents.response_cache import CachePolicy, cache_policy
+from agents.tripadvisor_geo import resolve_location
 
 # --- Configuration Variables ---
 # REQUIRED VARIABLES
@@ -8,7 +11,6 @@ CITY_QUERY = "rome"
 
 # API VARIABLES
 API_HOST = "tripadvisor16.p.rapidapi.com"
-API_KEY = "251571329bmsh50fc0efaf150814p10a4b5jsn5753d34c7b48"
 
 
 class TripAdvisorAPI:
@@ -17,15 +19,23 @@ class TripAdvisorAPI:
     encapsulating different search and details calls for restaurants.
     """
     
-    def __init__(self, api_host: str, api_key: str, **kwargs):
+    # Endpoints whose responses are cached (see response_cache.py); the rest
+    # always go upstream
+    CACHE_POLICIES = {
+        '/api/v1/restaurant/searchRestaurants': CachePolicy(ttl=24 * 3600, stale=24 * 3600),
+        '/api/v1/restaurant/getRestaurantDetails': CachePolicy(ttl=7 * 24 * 3600, stale=7 * 24 * 3600)
+    }
+
+    def __init__(self, api_host: str, credentials: CredentialPool, **kwargs):
         """
-        Initializes the API client with host, key, and default search parameters.
+        Initializes the API client with host, key pool, and default search parameters.
         """
         self.API_HOST = api_host
         self.HEADERS = {
-            'x-rapidapi-key': api_key,
             'x-rapidapi-host': api_host
         }
+        # Each call takes its key from the pool (see credentials.py)
+        self.CREDENTIALS = credentials
         
         # Search Parameters (Default values, can be overridden per call if needed)
         self.CITY_QUERY = kwargs.get('CITY_QUERY', CITY_QUERY)
@@ -41,49 +51,34 @@ class TripAdvisorAPI:
 
     def _make_api_call(self, method: str, endpoint: str) -> Optional[Dict[str, Any]]:
         """Handles the connection and makes the API request."""
-        conn = http.client.HTTPSConnection(self.API_HOST)
         print(f"\n--- Making {method} request to: {endpoint} ---")
         try:
-            conn.request(method, endpoint, headers=self.HEADERS)
-            res = conn.getresponse()
-            data = res.read()
-            conn.close()
+            status, result = request_json(self.API_HOST, method, endpoint, self.HEADERS,
+                                          credentials=self.CREDENTIALS,
+                                          cache=cache_policy(self.CACHE_POLICIES, endpoint))
             
-            # Decode and print raw response for debugging
-            decoded_data = data.decode("utf-8")
-            print(f"📡 API Response Status: {res.status}")
-            print(f"📡 API Response (first 500 chars): {decoded_data[:500]}")
+            # Print the response for debugging
+            print(f"📡 API Response Status: {status}")
+            print(f"📡 API Response (first 500 chars): {json.dumps(result)[:500]}")
             
-            # Parse JSON
-            return json.loads(decoded_data)
+            return result
             
         except Exception as e:
             print(f"❌ An error occurred: {e}")
-            print(f"📡 Raw data: {data.decode('utf-8') if data else 'No data'}")
             return None
 
     def search_location(self) -> bool:
-        """Finds the location ID based on CITY_QUERY."""
-        location_endpoint = f"/api/v1/restaurant/searchLocation?query={self.CITY_QUERY}"
-        location_data_dict = self._make_api_call("GET", location_endpoint)
-
-        if location_data_dict and location_data_dict.get('data'):
-            location_results = location_data_dict['data']
-            
-            if location_results:
-                first_result = location_results[0]
-                self.LOCATION_ID = first_result.get('locationId')
-                self.LOCATION_NAME = first_result.get('localizedName', self.CITY_QUERY)
-                
-                print(f"✅ Location Search Success: Using '{self.LOCATION_NAME}'")
-                print(f"   -> LOCATION_ID: {self.LOCATION_ID}")
-                return True
-            else:
-                print(f"❌ Location Search Failed: No results found for '{self.CITY_QUERY}'.")
-        else:
-            print("❌ Location Search Failed: API error or empty response.")
-        
-        return False
+        """Finds the location ID based on CITY_QUERY (see tripadvisor_geo.py)."""
+        location = resolve_location(self.API_HOST, self.CREDENTIALS, 'restaurant', self.CITY_QUERY)
+        if location is None:
+            print(f"❌ Location Search Failed: No results found for '{self.CITY_QUERY}'.")
+            return False
+
+        self.LOCATION_ID = location.location_id
+        self.LOCATION_NAME = location.name
+        print(f"✅ Location Search Success: Using '{self.LOCATION_NAME}'")
+        print(f"   -> LOCATION_ID: {self.LOCATION_ID}")
+        return True
 
     def search_restaurants(self) -> Optional[Dict[str, Any]]:
         """Searches for restaurants based on location ID."""
@@ -126,7 +121,7 @@ class TripAdvisorAPI:
 def main() -> Optional[Dict[str, Any]]:
     """Executes the API flow and returns the final restaurant data dictionary."""
     
-    api_client = TripAdvisorAPI(API_HOST, API_KEY, CITY_QUERY=CITY_QUERY)
+    api_client = TripAdvisorAPI(API_HOST, pool_from_env("TRIPADVISOR_API_KEY"), CITY_QUERY=CITY_QUERY)
     
     # Initialize variables for the final dictionary
     result_data = {
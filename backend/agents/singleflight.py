@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import pickle
+import stat
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Optional
+from agents import deadline
+
+try:
+    import fcntl
+except ImportError:  # not on Windows, calls are then only coalesced within a process
+    fcntl = None
+
+# How long a result written by one process is reused by others that were
+# waiting on the same call
+SHARED_RESULT_SECONDS = 5
+# Longest wait for another process's call before making our own
+SHARED_LOCK_WAIT_SECONDS = 30
+# Result files older than this are deleted now and then
+SHARED_FILE_MAX_AGE_SECONDS = 600
+# Longest wait for an identical call in this process before making our own,
+# for callers without a deadline of their own
+IN_PROCESS_WAIT_SECONDS = 60
+
+
+def _private_dir(path: Optional[str]) -> bool:
+    """Creates path with mode 0700 if missing; True if only this user can write to it."""
+    if not path:
+        return False
+    try:
+        os.makedirs(path, mode=0o700, exist_ok=True)
+        info = os.stat(path)
+    except OSError as e:
+        print(f"⚠️ Coalescing directory {path} unavailable ({e}), coalescing within this process only")
+        return False
+    if info.st_uid != os.getuid() or info.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+        print(f"⚠️ Coalescing directory {path} is not private to this user, coalescing within this process only")
+        return False
+    return True
+
+
+class _Call:
+    """One in-flight call and the threads waiting for it."""
+    __slots__ = ('done', 'waiters', 'payload', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.waiters = 0
+        self.payload = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent calls: the first caller of a key runs the
+    function, callers arriving while it runs wait and get a copy of its
+    result (or its exception) instead of repeating the call.
+
+    With shared_dir set, callers in other processes are coalesced too: a
+    lock file per key lets one process make the call while the others
+    wait, and it leaves the result in the directory for them to read.
+    Other users must not be able to plant results there, so the directory
+    is created private, and an existing one must belong to this user and
+    not be writable by anyone else; otherwise sharing stays off.
+    """
+
+    def __init__(self, shared_dir: Optional[str] = None):
+        self.shared_dir = shared_dir if fcntl is not None and _private_dir(shared_dir) else None
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        self.stats = Counter()
+
+    def do(self, key: str, fn: Callable[[], Any],
+           shareable: Callable[[Any], bool] = lambda result: True) -> Any:
+        """
+        Runs fn once for all concurrent callers of key. Only results passing
+        shareable are handed to other processes (they must be JSON).
+
+        A leader that ran out of its own deadline doesn't pass that on:
+        its waiters, which may have time left, start the call again (one of
+        them leading). A waiter stops waiting at its deadline, or after
+        IN_PROCESS_WAIT_SECONDS without one, and then makes its own call.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.waiters += 1
+            if leader:
+                break
+
+            if not call.done.wait(deadline.remaining(IN_PROCESS_WAIT_SECONDS)):
+                deadline.check("an identical request finished")
+                self._count('calls')
+                return fn()
+            if call.error is not None:
+                self._count('shared_in_process')
+                raise call.error
+            if call.payload is not None:
+                self._count('shared_in_process')
+                print("   ↪ Shared the result of an identical in-flight request")
+                return pickle.loads(call.payload)
+            # The leader was out of time or interrupted: try again, maybe as the leader
+
+        self._count('calls')
+        try:
+            result = self._run_shared(key, fn, shareable) if self.shared_dir else fn()
+        except Exception as e:
+            # Running out of the leader's own time is no answer for the others
+            if not (isinstance(e, deadline.DeadlineExceeded) or deadline.expired()):
+                call.error = e
+            raise
+        else:
+            # Waiters each get their own copy, so nobody sees another's edits
+            with self._lock:
+                del self._calls[key]
+                waiters = call.waiters
+            if waiters:
+                call.payload = pickle.dumps(result)
+            return result
+        finally:
+            with self._lock:
+                if self._calls.get(key) is call:  # not a newer call for the key
+                    del self._calls[key]
+            call.done.set()
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def _run_shared(self, key: str, fn: Callable[[], Any], shareable: Callable[[Any], bool]) -> Any:
+        path = os.path.join(self.shared_dir, hashlib.sha1(key.encode('utf-8')).hexdigest())
+        with open(path + '.lock', 'a+') as lock_file:
+            locked = self._acquire(lock_file)
+            try:
+                result = self._read_result(path + '.json')
+                if result is not None:
+                    self._count('shared_across_processes')
+                    print("   ↪ Reused the result of an identical request from another worker")
+                    return result
+                result = fn()
+                if locked and shareable(result):
+                    self._write_result(path + '.json', result)
+                return result
+            finally:
+                if locked:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _acquire(lock_file) -> bool:
+        """Waits up to SHARED_LOCK_WAIT_SECONDS for the key's lock; False if it never came."""
+        give_up_at = time.monotonic() + deadline.remaining(SHARED_LOCK_WAIT_SECONDS)
+        while True:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                if time.monotonic() >= give_up_at:
+                    return False
+                time.sleep(0.05)
+
+    @staticmethod
+    def _read_result(path: str) -> Any:
+        try:
+            if time.time() - os.path.getmtime(path) > SHARED_RESULT_SECONDS:
+                return None
+            with open(path, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_result(self, path: str, result: Any):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"⚠️ Could not share upstream result: {e}")
+        self._purge_old_files()
+
+    def _purge_old_files(self):
+        now = time.time()
+        if now - self._last_purge < SHARED_FILE_MAX_AGE_SECONDS:
+            return
+        self._last_purge = now
+        for name in os.listdir(self.shared_dir):
+            file_path = os.path.join(self.shared_dir, name)
+            try:
+                if now - os.path.getmtime(file_path) > SHARED_FILE_MAX_AGE_SECONDS:
+                    os.remove(file_path)
+            except OSError:
+                pass
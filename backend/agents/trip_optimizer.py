@@ -0,0 +1,126 @@
+import heapq
+import time
+from typing import Dict, List, Optional, Any
+from agents.booking_agent import search_hotels
+from agents.flight_agent import search_flight_options
+
+# How much each part's value score (0-100) counts in a package score
+PACKAGE_WEIGHTS = {'outbound': 0.25, 'return': 0.25, 'hotel': 0.5}
+# Candidates searched per list; every combination is considered
+CANDIDATES_PER_LIST = 5
+
+
+def optimize_packages(outbound: List[Dict[str, Any]], inbound: List[Dict[str, Any]],
+                      hotels: List[Dict[str, Any]], total_budget: float, top_n: int = 3,
+                      weights: Dict[str, float] = PACKAGE_WEIGHTS) -> List[Dict[str, Any]]:
+    """
+    Best outbound flight + return flight + hotel packages within total_budget.
+
+    Each candidate needs a 'price' and a 'value_score'. Branch and bound over
+    flight pairs (best first) and hotels (best first): a pair is skipped once
+    even the best hotel can't lift it into the current top N, and a pair's
+    hotel scan stops at the first hotel that can't. Equal scores prefer the
+    cheaper package.
+    """
+    hotels_by_score = sorted(hotels, key=lambda h: h['value_score'], reverse=True)
+    pairs = sorted((
+        (weights['outbound'] * o['value_score'] + weights['return'] * r['value_score'], o, r)
+        for o in outbound for r in inbound
+        if o['price'] + r['price'] <= total_budget
+    ), key=lambda pair: pair[0], reverse=True)
+    if not hotels_by_score or not pairs:
+        return []
+
+    best_hotel_part = weights['hotel'] * hotels_by_score[0]['value_score']
+    heap = []  # min-heap of ((score, -total price), sequence, package)
+    sequence = 0
+
+    for pair_score, out_flight, ret_flight in pairs:
+        if len(heap) == top_n and pair_score + best_hotel_part < heap[0][0][0]:
+            break  # pairs are sorted, no later pair can do better
+
+        remaining = total_budget - out_flight['price'] - ret_flight['price']
+        for hotel in hotels_by_score:
+            score = pair_score + weights['hotel'] * hotel['value_score']
+            if len(heap) == top_n and score < heap[0][0][0]:
+                break
+            if hotel['price'] > remaining:
+                continue
+
+            total = out_flight['price'] + ret_flight['price'] + hotel['price']
+            key = (score, -total)
+            package = {
+                'package_score': score,
+                'total_price': total,
+                'remaining_budget': total_budget - total,
+                'outbound': out_flight,
+                'return': ret_flight,
+                'hotel': hotel
+            }
+            sequence += 1
+            if len(heap) < top_n:
+                heapq.heappush(heap, (key, sequence, package))
+            elif key > heap[0][0]:
+                heapq.heapreplace(heap, (key, sequence, package))
+
+    return [package for _, _, package in sorted(heap, key=lambda item: (item[0], -item[1]), reverse=True)]
+
+
+def plan_trip_packages(origin_city: str, destination_city: str, arrival_date: str, departure_date: str,
+                       total_budget: float, adults: int = 1, top_n: int = 3) -> Optional[Dict[str, Any]]:
+    """
+    Searches flights both ways, then hotels with whatever budget the cheapest
+    flights leave, and returns the best packages under total_budget.
+    """
+    print(f"🧮 Planning trip packages {origin_city} <-> {destination_city} within {total_budget} EUR...")
+
+    outbound = search_flight_options(origin_city, destination_city, arrival_date,
+                                     top_n=CANDIDATES_PER_LIST, ADULTS=adults) or []
+    inbound = search_flight_options(destination_city, origin_city, departure_date,
+                                    top_n=CANDIDATES_PER_LIST, ADULTS=adults) or []
+    if not outbound or not inbound:
+        return {'status': 'error', 'message': 'No flights found for one of the legs.'}
+
+    hotel_budget = total_budget - min(f['price'] for f in outbound) - min(f['price'] for f in inbound)
+    if hotel_budget <= 0:
+        return {'status': 'error', 'message': f'The cheapest flights alone exceed the budget of {total_budget} EUR.'}
+
+    hotels = search_hotels(destination_city, arrival_date, departure_date, int(hotel_budget),
+                           ADULTS=adults, top_n=CANDIDATES_PER_LIST) or []
+    if not hotels:
+        return {'status': 'error', 'message': f'No hotels found within the remaining {int(hotel_budget)} EUR.'}
+
+    started = time.perf_counter()
+    packages = optimize_packages(outbound, inbound, hotels, total_budget, top_n=top_n)
+    print(f"✅ Compared {len(outbound) * len(inbound) * len(hotels)} combinations "
+          f"in {(time.perf_counter() - started) * 1000:.2f} ms, {len(packages)} packages within budget")
+    if not packages:
+        return {'status': 'error', 'message': f'No flight and hotel combination fits {total_budget} EUR.'}
+
+    return {'total_budget': total_budget, 'packages': packages}
+
+
+def summarize_package(package: Dict[str, Any]) -> Dict[str, Any]:
+    """Compact view of a package for the chat model."""
+    def flight_summary(f):
+        return {
+            'title': f['title'],
+            'airline': f['airline_name'],
+            'departure_time': f['departure_time'],
+            'price': f['price']
+        }
+
+    hotel = package['hotel']
+    return {
+        'total_price': round(package['total_price'], 2),
+        'remaining_budget': round(package['remaining_budget'], 2),
+        'package_score': round(package['package_score'], 1),
+        'outbound': flight_summary(package['outbound']),
+        'return': flight_summary(package['return']),
+        'hotel': {
+            'name': hotel['hotel_name'],
+            'rating': hotel['rating'],
+            'price': hotel['price'],
+            'booking_url': hotel['booking_url']
+        }
+    }
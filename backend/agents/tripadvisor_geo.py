@@ -0,0 +1,63 @@
+from typing import Optional
+from urllib.parse import quote
+
+from agents.credentials import CredentialPool
+from agents.http_client import request_json
+from agents.response_cache import CachePolicy, response_cache
+
+# searchLocation endpoint of each kind of TripAdvisor search. The restaurant
+# and attraction searches each take the locationId of their own endpoint
+LOCATION_ENDPOINTS = {
+    'restaurant': '/api/v1/restaurant/searchLocation',
+    'attraction': '/api/v1/attraction/searchLocation'
+}
+# Cities don't move: a resolved location is kept for a month, then used for
+# another month while it is looked up again in the background
+LOCATION_POLICY = CachePolicy(ttl=30 * 24 * 3600, stale=30 * 24 * 3600)
+# Only the first result is used
+LOCATION_FIELDS = ['data[*].{locationId,localizedName}']
+
+
+class TripAdvisorLocation:
+    """A city resolved by one of the searchLocation endpoints."""
+    __slots__ = ('location_id', 'name')
+
+    def __init__(self, location_id: str, name: str):
+        self.location_id = location_id
+        self.name = name
+
+    def __repr__(self):
+        return f"TripAdvisorLocation({self.location_id}, {self.name!r})"
+
+
+def _cache_key(kind: str, city: str) -> str:
+    return f"tripadvisor_location:{kind}:{' '.join(city.lower().split())}"
+
+
+def resolve_location(api_host: str, credentials: CredentialPool, kind: str,
+                     city: str) -> Optional[TripAdvisorLocation]:
+    """
+    The location of city for kind ('restaurant' or 'attraction'), or None if
+    TripAdvisor knows no such place. Kept in the shared response cache, so
+    every client and worker resolves a city once.
+    """
+    endpoint = f"{LOCATION_ENDPOINTS[kind]}?query={quote(city.strip())}"
+
+    def load():
+        print(f"\n--- Resolving {kind} location for '{city}' ---")
+        _, result = request_json(api_host, 'GET', endpoint, {'x-rapidapi-host': api_host}, LOCATION_FIELDS,
+                                 credentials=credentials)
+        first_result = next(iter((result or {}).get('data') or []), None)
+        if not (first_result and first_result.get('locationId')):
+            return 404, None
+        location = {'location_id': first_result['locationId'],
+                    'name': first_result.get('localizedName') or city}
+        return 200, location
+
+    try:
+        _, location = response_cache().fetch(_cache_key(kind, city), LOCATION_POLICY, load)
+    except Exception as e:
+        print(f"❌ Location lookup for '{city}' failed: {e}")
+        return None
+    return TripAdvisorLocation(location['location_id'], location['name']) if location else None
+
@@ -1,14 +1,16 @@
 from flask import Flask
 from flask_cors import CORS
-from flask_session import Session
-from database import db
+from database import db, configure_engine
 from config import Config
+from session_store import init_session_store
+from query_stats import init_query_stats
 import os
 
 from routes.auth_routes import auth_bp
 from routes.profile_routes import profile_bp
 from routes.chat_routes import chat_bp
 from routes.selection_routes import selection_bp
+from routes.health_routes import health_bp
 
 def create_app():
     app = Flask(__name__)
@@ -22,7 +24,7 @@ def create_app():
              "http://localhost:8081",
          ]
     )
-    Session(app)
+    init_session_store(app)
     db.init_app(app)
 
     # Register Blueprints
@@ -30,9 +32,12 @@ def create_app():
     app.register_blueprint(profile_bp, url_prefix='/api/profile')
     app.register_blueprint(chat_bp, url_prefix='/api')
     app.register_blueprint(selection_bp, url_prefix='/api')
+    app.register_blueprint(health_bp, url_prefix='/api/health')
 
     # Create tables
     with app.app_context():
+        configure_engine(app)
+        init_query_stats(app)
         db.create_all()
 
     return app
@@ -0,0 +1,178 @@
+"""
+Memory held by a hotel and a flight search, raw JSON vs compact records.
+
+Replays synthetic Booking.com responses shaped like the real ones (same
+nesting and field count) through:
+  - hotels, before: all pages kept as raw dicts plus a wrapper dict per
+    hotel (the old search_multiple_pages + filter_and_rank_hotels)
+  - hotels, after: each page ranked by HotelRanker as it is parsed and freed
+  - flights, before: the whole searchFlights response kept
+  - flights, after: the offers parsed into FlightCandidate records
+and reports peak and retained (still referenced after the search) memory
+measured with tracemalloc.
+
+Usage (from the backend directory):
+    python benchmarks/candidate_memory.py --pages 5 --offers 40
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.hotel_ranking import HotelRanker
+from agents.flight_ranking import parse_flight_offers
+from agents.records import HotelCandidate
+
+HOTELS_PER_PAGE = 20
+
+
+def hotel_page_json(page: int, rng: random.Random) -> str:
+    hotels = []
+    for i in range(HOTELS_PER_PAGE):
+        hotel_id = page * 1000 + i
+        price = round(rng.uniform(60, 600), 2)
+        hotels.append({
+            'hotel_id': hotel_id,
+            'accessibilityLabel': f"Hotel {hotel_id}. 4 out of 5 stars. Very good {rng.uniform(7, 9.5):.1f}, "
+                                  f"{rng.randint(50, 3000)} reviews. Private suite, 1 bed, free cancellation, "
+                                  f"no prepayment needed. {'Free WiFi. ' if i % 2 else ''}"
+                                  f"{'Breakfast included. ' if i % 3 == 0 else ''}Original price {price * 1.2:.0f} EUR.",
+            'property': {
+                'reviewScoreWord': 'Very good', 'isPreferred': True, 'isPreferredPlus': False,
+                'position': i, 'rankingPosition': i, 'isFirstPage': page == 1, 'propertyClass': 4,
+                'accuratePropertyClass': 4, 'countryCode': 'fr', 'wishlistName': 'Paris', 'qualityClass': 0,
+                'longitude': 2.35 + rng.random() / 10, 'latitude': 48.85 + rng.random() / 10,
+                'optOutFromGalleryChanges': 0, 'ufi': -1456928, 'id': hotel_id, 'mainPhotoId': hotel_id * 7,
+                'name': f"Hotel {hotel_id} Paris Centre", 'currency': 'EUR',
+                'reviewScore': round(rng.uniform(6, 9.8), 1), 'reviewCount': rng.randint(0, 3000),
+                'checkin': {'fromTime': '15:00', 'untilTime': '00:00'},
+                'checkout': {'fromTime': '00:00', 'untilTime': '11:00'},
+                'checkinDate': '2025-11-10', 'checkoutDate': '2025-11-15',
+                'blockIds': [f"{hotel_id}0{n}_3856_2_0_0" for n in range(3)],
+                'photoUrls': [f"https://cf.bstatic.com/xdata/images/hotel/square500/{hotel_id}{n}.jpg?k=abcdef0123456789"
+                              for n in range(4)],
+                'accessibilityLabel': 'Free WiFi. Breakfast included.' if i % 2 else 'Non-refundable.',
+                'priceBreakdown': {
+                    'grossPrice': {'value': price, 'currency': 'EUR'},
+                    'excludedPrice': {'value': round(price * 0.05, 2), 'currency': 'EUR'},
+                    'strikethroughPrice': {'value': round(price * 1.2, 2), 'currency': 'EUR'},
+                    'benefitBadges': [{'variant': 'constructive', 'identifier': 'Mobile Rate',
+                                       'text': 'Mobile-only price', 'explanation': 'Mobile-only price'}],
+                    'taxExceptions': []
+                }
+            }
+        })
+    return json.dumps({'status': True, 'message': 'Success', 'timestamp': 1730000000000,
+                       'data': {'hotels': hotels, 'meta': [{'title': '1,234 properties'}]}})
+
+
+def flight_response_json(offers: int, rng: random.Random) -> str:
+    flight_offers = []
+    for i in range(offers):
+        legs = []
+        for n in range(rng.randint(1, 2)):
+            legs.append({
+                'departureTime': f"2025-12-01T{8 + n * 4:02d}:15:00", 'arrivalTime': f"2025-12-01T{10 + n * 4:02d}:40:00",
+                'departureAirport': {'type': 'AIRPORT', 'code': 'AMS', 'name': 'Amsterdam Airport Schiphol',
+                                     'city': 'AMS', 'cityName': 'Amsterdam', 'country': 'NL', 'countryName': 'Netherlands'},
+                'arrivalAirport': {'type': 'AIRPORT', 'code': 'FCO', 'name': 'Rome Fiumicino Airport',
+                                   'city': 'ROM', 'cityName': 'Rome', 'country': 'IT', 'countryName': 'Italy'},
+                'cabinClass': 'ECONOMY',
+                'flightInfo': {'facilities': [], 'flightNumber': 1600 + i, 'planeType': '',
+                               'carrierInfo': {'operatingCarrier': 'KL', 'marketingCarrier': 'KL'}},
+                'carriersData': [{'name': 'KLM', 'code': 'KL', 'logo': 'https://r-xx.bstatic.com/data/airlines_logo/KL.png'}],
+                'totalTime': 8700, 'flightStops': [], 'amenities': []
+            })
+        price = rng.randint(80, 400)
+        flight_offers.append({
+            'token': f"d6a1f_H4sIAAAAAAAA_{i:04d}" + 'x' * 200,
+            'segments': [{'departureAirport': legs[0]['departureAirport'], 'arrivalAirport': legs[-1]['arrivalAirport'],
+                          'departureTime': legs[0]['departureTime'], 'arrivalTime': legs[-1]['arrivalTime'],
+                          'legs': legs, 'totalTime': 8700 * len(legs), 'travellerCheckedLuggage': [],
+                          'travellerCabinLuggage': [{'travellerReference': '1', 'luggageAllowance': {
+                              'luggageType': 'HAND', 'maxPiece': 1, 'maxWeightPerPiece': 12, 'massUnit': 'KG'}}],
+                          'isAtolProtected': False}],
+            'priceBreakdown': {
+                'total': {'currencyCode': 'EUR', 'units': price, 'nanos': 0},
+                'baseFare': {'currencyCode': 'EUR', 'units': price - 40, 'nanos': 0},
+                'fee': {'currencyCode': 'EUR', 'units': 0, 'nanos': 0},
+                'tax': {'currencyCode': 'EUR', 'units': 40, 'nanos': 0},
+                'totalRounded': {'currencyCode': 'EUR', 'units': price, 'nanos': 0},
+                'carrierTaxBreakdown': [], 'showPriceStrikethrough': False
+            },
+            'travellerPrices': [{'travellerPriceBreakdown': {'total': {'currencyCode': 'EUR', 'units': price}},
+                                 'travellerReference': '1', 'travellerType': 'ADULT'}],
+            'pointOfSale': 'nl', 'tripType': 'ONEWAY', 'posMismatch': {'detectedPointOfSale': 'nl'},
+            'includedProductsBySegment': [[{'travellerReference': '1', 'travellerProducts': []}]],
+            'seatAvailability': {'numberOfSeatsAvailable': 9}
+        })
+    return json.dumps({'status': True, 'message': 'Success', 'data': {
+        'aggregation': {'totalCount': offers, 'airlines': [{'name': 'KLM', 'iataCode': 'KL', 'logoUrl': 'https://x/KL.png'}]},
+        'flightOffers': flight_offers}})
+
+
+def measure(fn):
+    """Runs fn under tracemalloc, returns (result, peak bytes, retained bytes)."""
+    gc.collect()
+    tracemalloc.start()
+    result = fn()
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak, retained
+
+
+def hotels_before(pages):
+    all_hotels = []
+    for page in pages:
+        all_hotels.extend(json.loads(page)['data']['hotels'])
+    ranked = []
+    for hotel in all_hotels:
+        property_data = hotel['property']
+        price = property_data['priceBreakdown']['grossPrice']['value']
+        ranked.append({'hotel': hotel, 'price': price, 'currency': 'EUR',
+                       'rating': property_data['reviewScore'], 'review_count': property_data['reviewCount'],
+                       'has_wifi': False, 'has_breakfast': False, 'value_score': 0.0})
+    return all_hotels, ranked
+
+
+def hotels_after(pages, top_n):
+    ranker = HotelRanker(400, top_n=top_n, vectorize=False)
+    for page in pages:
+        ranker.add(json.loads(page)['data']['hotels'])
+    return ranker
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=5, help='Hotel pages of 20 per search')
+    parser.add_argument('--offers', type=int, default=40, help='Offers per flight response')
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    pages = [hotel_page_json(page, rng) for page in range(1, args.pages + 1)]
+    flights = flight_response_json(args.offers, rng)
+    hotel_count = args.pages * HOTELS_PER_PAGE
+
+    rows = [
+        ('hotels, raw pages + wrappers', measure(lambda: hotels_before(pages))),
+        ('hotels, ranked top 3 records', measure(lambda: hotels_after(pages, 3))),
+        (f'hotels, all {hotel_count} as records',
+         measure(lambda: [HotelCandidate.from_raw(h) for p in pages for h in json.loads(p)['data']['hotels']])),
+        ('flights, raw response', measure(lambda: json.loads(flights))),
+        ('flights, FlightCandidate records', measure(lambda: parse_flight_offers(json.loads(flights)['data']))),
+    ]
+
+    print(f"{hotel_count} hotels over {args.pages} pages, {args.offers} flight offers\n")
+    print(f"{'':<32} {'peak KiB':>10} {'retained KiB':>13}")
+    for label, (_, peak, retained) in rows:
+        print(f"{label:<32} {peak / 1024:>10.1f} {retained / 1024:>13.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""
+Transfer size and time of a flight / hotel search body, plain vs compressed.
+
+Uses the synthetic responses of candidate_memory.py, compresses them the way
+a server would (gzip level 6, brotli quality 5 if installed) and streams
+each through http_client.ResponseBody into json_projection.read_json with
+the fields the clients ask for, the body arriving at --mbps. Reports bytes
+on the wire and wall time until the parsed result is ready.
+
+Usage (from the backend directory):
+    python benchmarks/compressed_responses.py --offers 200 --mbps 20
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.flight_ranking import FLIGHT_OFFER_FIELDS
+from agents.http_client import ResponseBody, brotli
+from agents.json_projection import read_json
+from agents.records import HOTEL_SEARCH_FIELDS
+from candidate_memory import flight_response_json, hotel_page_json
+from json_projection import ArrivingBody
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=200, help='Offers in the flight response')
+    parser.add_argument('--pages', type=int, default=1, help='Hotel pages, parsed one after the other')
+    parser.add_argument('--mbps', type=float, default=20, help='Simulated download speed in Mbit/s')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    bodies = [
+        (f'flights ({args.offers} offers)', [flight_response_json(args.offers, rng).encode()], FLIGHT_OFFER_FIELDS),
+        (f'hotels ({args.pages} pages)', [hotel_page_json(page, rng).encode() for page in range(1, args.pages + 1)],
+         HOTEL_SEARCH_FIELDS),
+    ]
+    encodings = [('identity', lambda body: body), ('gzip', lambda body: gzip.compress(body, compresslevel=6))]
+    if brotli is not None:
+        encodings.append(('br', lambda body: brotli.compress(body, quality=5)))
+    rate = args.mbps * 1_000_000 / 8
+
+    print(f"{'':<32} {'wire KiB':>9} {'saved':>7} {'wall ms':>8}")
+    for label, pages, fields in bodies:
+        plain_size = sum(len(page) for page in pages)
+        for encoding, compress in encodings:
+            wire = [compress(page) for page in pages]
+            wire_size = sum(len(page) for page in wire)
+            wall = best_time(lambda: [read_json(ResponseBody(ArrivingBody(page, rate), encoding), fields)
+                                      for page in wire], args.repeat)
+            print(f"{label + ', ' + encoding:<32} {wire_size / 1024:>9.1f} "
+                  f"{100 * (1 - wire_size / plain_size):>6.1f}% {wall:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""
+Writer-contention benchmark for the database profiles.
+
+Simulates concurrent /api/travel-chat requests (status commit mid-request,
+history read, final commit) next to suggestion polling readers, once with
+the 'development' profile and once with 'production'.
+
+Usage (from the backend directory):
+    python benchmarks/db_concurrency.py --workers 8 --requests 25
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask
+from sqlalchemy.exc import OperationalError
+from config import Config, build_engine_options
+from database import db, configure_engine, User, Conversation, Message, TravelSuggestion
+
+
+def create_benchmark_app(database_uri: str, profile: str) -> Flask:
+    """Builds a minimal app that shares the real models and engine setup."""
+    app = Flask(__name__)
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=database_uri,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+        DB_PROFILE=profile,
+        SQLALCHEMY_ENGINE_OPTIONS=build_engine_options(database_uri, profile),
+        SQLITE_PRAGMAS=Config.SQLITE_PRAGMAS
+    )
+    db.init_app(app)
+    with app.app_context():
+        configure_engine(app)
+        db.create_all()
+    return app
+
+
+def seed(app: Flask, suggestions: int = 200) -> str:
+    """Creates one conversation with a realistic number of suggestions."""
+    with app.app_context():
+        user = User(email='bench@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        conversation = Conversation(user_id=user.id)
+        db.session.add(conversation)
+        db.session.flush()
+        for i in range(suggestions):
+            db.session.add(TravelSuggestion(
+                conversation_id=conversation.id,
+                type='hotel',
+                title=f'Hotel {i}',
+                description='x' * 200,
+                price=100 + i,
+                location={'address': 'Somewhere'}
+            ))
+        db.session.commit()
+        return conversation.id
+
+
+def chat_request(app: Flask, conversation_id: str):
+    """Mirrors the write pattern of ChatService.process_message."""
+    with app.app_context():
+        db.session.add(Message(conversation_id=conversation_id, role='user', content='hello'))
+        db.session.add(Message(conversation_id=conversation_id, role='status', content='working'))
+        db.session.commit()
+
+        Message.query.filter_by(conversation_id=conversation_id).order_by(Message.created_at).all()
+        time.sleep(0.005)  # Stand-in for the LLM round trip
+
+        db.session.add(Message(conversation_id=conversation_id, role='assistant', content='done'))
+        db.session.commit()
+
+
+def poll_suggestions(app: Flask, conversation_id: str, stop: threading.Event):
+    """Mirrors the read pattern of GET /api/suggestions/<id>."""
+    with app.app_context():
+        while not stop.is_set():
+            TravelSuggestion.query.filter_by(conversation_id=conversation_id).all()
+            db.session.rollback()
+
+
+def run_profile(profile: str, workers: int, requests: int, readers: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_uri = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        app = create_benchmark_app(database_uri, profile)
+        conversation_id = seed(app)
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+        stop = threading.Event()
+
+        def writer():
+            for _ in range(requests):
+                started = time.perf_counter()
+                try:
+                    chat_request(app, conversation_id)
+                    with lock:
+                        latencies.append(time.perf_counter() - started)
+                except OperationalError as e:
+                    with lock:
+                        errors.append(str(e.orig))
+
+        reader_threads = [threading.Thread(target=poll_suggestions, args=(app, conversation_id, stop))
+                          for _ in range(readers)]
+        writer_threads = [threading.Thread(target=writer) for _ in range(workers)]
+
+        started = time.perf_counter()
+        for t in reader_threads + writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+        stop.set()
+        for t in reader_threads:
+            t.join()
+
+        with app.app_context():
+            db.engine.dispose()
+
+    latencies.sort()
+    return {
+        'profile': profile,
+        'completed': len(latencies),
+        'errors': len(errors),
+        'throughput': len(latencies) / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000 if latencies else 0,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000 if latencies else 0,
+        'max_ms': latencies[-1] * 1000 if latencies else 0
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8, help='Concurrent chat requests')
+    parser.add_argument('--requests', type=int, default=25, help='Requests per worker')
+    parser.add_argument('--readers', type=int, default=4, help='Concurrent suggestion pollers')
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'done':>6} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for profile in ('development', 'production'):
+        r = run_profile(profile, args.workers, args.requests, args.readers)
+        print(f"{r['profile']:<12} {r['completed']:>6} {r['errors']:>7} {r['throughput']:>8.1f} "
+              f"{r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['max_ms']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency of a long-tailed upstream endpoint with and without hedged GETs.
+
+Replaces http.client.HTTPSConnection with a fake whose responses take
+--fast-ms, except a --slow-share of them that take --slow-ms, and sends
+--requests sequential GETs through http_client.request_json, first plain
+and then with hedge=True. Reports p50/p90/p99 and how many hedges went out.
+
+Usage (from the backend directory):
+    python benchmarks/hedged_requests.py --requests 400 --slow-share 0.05
+"""
+import argparse
+import http.client
+import io
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('UPSTREAM_RATE_LIMIT_DB', os.path.join(tempfile.mkdtemp(), 'rate_limits.db'))
+
+from agents import http_client, rate_limit
+from agents.hedging import hedging_stats
+
+HOST = 'upstream.benchmark'
+
+
+class FakeResponse:
+    status = 200
+
+    def __init__(self, body: bytes):
+        self._body = io.BytesIO(body)
+        self.length = len(body)
+
+    def read(self, size=None):
+        return self._body.read(size)
+
+    def getheader(self, name, default=None):
+        return default
+
+
+def fake_connection(args, rng):
+    lock = threading.Lock()
+
+    class FakeConnection:
+        def __init__(self, host, **kwargs):
+            pass
+
+        def request(self, method, endpoint, headers=None):
+            pass
+
+        def getresponse(self):
+            with lock:
+                slow = rng.random() < args.slow_share
+            time.sleep((args.slow_ms if slow else args.fast_ms) / 1000)
+            return FakeResponse(b'{"data": {"hotels": []}}')
+
+        def close(self):
+            pass
+
+    return FakeConnection
+
+
+def percentile(ordered, share):
+    return ordered[int(share * (len(ordered) - 1))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--fast-ms', type=float, default=20)
+    parser.add_argument('--slow-ms', type=float, default=800)
+    parser.add_argument('--slow-share', type=float, default=0.05, help='Share of responses in the slow tail')
+    args = parser.parse_args()
+
+    http.client.HTTPSConnection = fake_connection(args, random.Random(7))
+    rate_limit.RATE_LIMITS[HOST] = (100000, 100000)
+
+    print(f"{'':<10} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+    for hedge in (False, True):
+        latencies = []
+        for i in range(args.requests):
+            started = time.perf_counter()
+            http_client.request_json(HOST, 'GET', f"/api/v1/hotels/searchHotels?page_number={i}", hedge=hedge)
+            latencies.append(time.perf_counter() - started)
+        latencies.sort()
+        print(f"{'hedged' if hedge else 'plain':<10} {percentile(latencies, 0.5):>8.0f} "
+              f"{percentile(latencies, 0.9):>8.0f} {percentile(latencies, 0.99):>8.0f}")
+
+    stats = hedging_stats()[HOST + '/api/v1/hotels/searchHotels']
+    print(f"\nhedges sent: {stats['hedged']} of {stats['requests']} requests, won: {stats['hedge_wins']}")
+
+
+if __name__ == '__main__':
+    main()
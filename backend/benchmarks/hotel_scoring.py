@@ -0,0 +1,112 @@
+"""
+Scalar vs vectorized hotel scoring.
+
+Generates synthetic Booking.com hotel results and ranks them with the scalar
+HotelRanker path and the numpy path, checking both return the same hotels
+with identical scores. Reports end-to-end ranking time (including reading the
+raw hotel dicts) and the time for scoring, budget masks and top-k alone.
+
+Usage (from the backend directory):
+    python benchmarks/hotel_scoring.py --sizes 100 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents.hotel_ranking import (HotelRanker, extract_hotel_columns, resolve_weights, score_hotel,
+                                  score_hotel_columns, top_k_indices, np)
+from agents.records import HotelCandidate
+
+LABELS = ['Free WiFi. Breakfast included.', 'Free WiFi.', 'Breakfast included.', '']
+
+
+def make_hotels(count: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        hotels.append({
+            'hotel_id': i,
+            'property': {
+                'priceBreakdown': {'grossPrice': {
+                    # A few hotels without a price, and plenty of ties
+                    'value': 0 if rng.random() < 0.02 else round(rng.uniform(40, 600), 2),
+                    'currency': 'EUR'
+                }},
+                'reviewScore': rng.choice([0, round(rng.uniform(5, 10), 1)]),
+                'reviewCount': rng.randint(0, 400),
+                'accessibilityLabel': rng.choice(LABELS)
+            }
+        })
+    return hotels
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def rank(hotels: list, price_max: int, top_n: int, vectorize: bool) -> list:
+    ranker = HotelRanker(price_max, top_n=top_n, vectorize=vectorize)
+    ranker.add(hotels)
+    return ranker.ranked()
+
+
+def scalar_scores_only(features: list, price_max: int, top_n: int, weights: dict) -> list:
+    scored = [(score_hotel(f, price_max, weights), i) for i, f in enumerate(features)
+              if f is not None and f.price <= price_max]
+    scored.sort(key=lambda item: item[0], reverse=True)
+    return scored[:top_n]
+
+
+def vector_scores_only(columns: dict, price_max: int, top_n: int, weights: dict):
+    scores = score_hotel_columns(columns, price_max, weights)
+    return top_k_indices(scores, columns['valid'] & (columns['price'] <= price_max), top_n)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 10_000, 100_000])
+    parser.add_argument('--price-max', type=int, default=250)
+    parser.add_argument('--top-n', type=int, default=3)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    if np is None:
+        print("❌ numpy is not installed, nothing to compare against.")
+        return
+
+    weights = resolve_weights(None)
+    print(f"{'hotels':>8} {'scalar ms':>10} {'numpy ms':>10} {'speedup':>8} "
+          f"{'score-only scalar':>18} {'score-only numpy':>17} {'speedup':>8}")
+    for size in args.sizes:
+        hotels = make_hotels(size)
+
+        scalar = rank(hotels, args.price_max, args.top_n, vectorize=False)
+        vector = rank(hotels, args.price_max, args.top_n, vectorize=True)
+        assert [(h['hotel'].hotel_id, h['value_score']) for h in scalar] == \
+               [(h['hotel'].hotel_id, h['value_score']) for h in vector], "rankings differ"
+
+        features = [HotelCandidate.from_raw(h) for h in hotels]
+        columns = extract_hotel_columns(hotels)
+        assert [i for _, i in scalar_scores_only(features, args.price_max, args.top_n, weights)] == \
+               list(vector_scores_only(columns, args.price_max, args.top_n, weights)), "top-k differs"
+
+        scalar_s = best_of(lambda: rank(hotels, args.price_max, args.top_n, False), args.repeat)
+        vector_s = best_of(lambda: rank(hotels, args.price_max, args.top_n, True), args.repeat)
+        scalar_core = best_of(lambda: scalar_scores_only(features, args.price_max, args.top_n, weights), args.repeat)
+        vector_core = best_of(lambda: vector_scores_only(columns, args.price_max, args.top_n, weights), args.repeat)
+
+        print(f"{size:>8} {scalar_s * 1000:>10.2f} {vector_s * 1000:>10.2f} {scalar_s / vector_s:>7.1f}x "
+              f"{scalar_core * 1000:>18.2f} {vector_core * 1000:>17.2f} {scalar_core / vector_core:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Parsing a searchFlights / searchHotels body whole vs with a field projection.
+
+Uses the synthetic responses of candidate_memory.py and, for each, compares
+  - whole: read the body, json.loads all of it (the old _make_api_call)
+  - projected: json_projection.read_json with FLIGHT_OFFER_FIELDS /
+    HOTEL_SEARCH_FIELDS, streamed through ijson
+on peak memory (tracemalloc, body included), CPU time with the body already
+in memory, and wall time with the body arriving at --mbps, where the
+streaming parse runs while the rest of the body is still on its way.
+
+Usage (from the backend directory):
+    python benchmarks/json_projection.py --offers 200 --mbps 20
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from agents import json_projection
+from agents.flight_ranking import FLIGHT_OFFER_FIELDS
+from agents.records import HOTEL_SEARCH_FIELDS
+from candidate_memory import flight_response_json, hotel_page_json
+
+
+class ArrivingBody:
+    """A body that arrives at a fixed rate from construction on, like a socket buffer filling up."""
+
+    def __init__(self, body: bytes, bytes_per_second: float):
+        self.body = body
+        self.rate = bytes_per_second
+        self.offset = 0
+        self.started = time.perf_counter()
+
+    def read(self, size=-1):
+        end = len(self.body) if size is None or size < 0 else min(self.offset + size, len(self.body))
+        arrives = self.started + end / self.rate
+        delay = arrives - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        chunk = self.body[self.offset:end]
+        self.offset = end
+        return chunk
+
+
+def parse_whole(stream):
+    return json.loads(stream.read())
+
+
+def parse_projected(stream, fields):
+    return json_projection.read_json(stream, fields)
+
+
+def best_time(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best * 1000
+
+
+def peak_memory(fn):
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--offers', type=int, default=200, help='Offers in the flight response')
+    parser.add_argument('--mbps', type=float, default=20, help='Simulated download speed in Mbit/s')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if json_projection.ijson is None:
+        print("ijson is not installed, read_json would fall back to json.loads + projection.")
+        return
+
+    rng = random.Random(7)
+    bodies = [
+        (f'flights ({args.offers} offers)', flight_response_json(args.offers, rng).encode(), FLIGHT_OFFER_FIELDS),
+        ('hotels (1 page)', hotel_page_json(1, rng).encode(), HOTEL_SEARCH_FIELDS),
+    ]
+    rate = args.mbps * 1_000_000 / 8
+
+    print(f"{'':<30} {'body KiB':>9} {'peak KiB':>9} {'CPU ms':>8} {'wall ms':>8}")
+    for label, body, fields in bodies:
+        for mode, parse in (('whole', parse_whole),
+                            ('projected', lambda stream: parse_projected(stream, fields))):
+            peak = peak_memory(lambda: parse(io.BytesIO(body)))
+            cpu = best_time(lambda: parse(io.BytesIO(body)), args.repeat)
+            wall = best_time(lambda: parse(ArrivingBody(body, rate)), args.repeat)
+            print(f"{label + ', ' + mode:<30} {len(body) / 1024:>9.1f} {peak / 1024:>9.1f} {cpu:>8.2f} {wall:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Per-request overhead of the configurable session backends.
+
+Logs in once, then issues authenticated read-only requests (the common case
+for /api/suggestions polling and chat) and reports the mean and p95 time per
+request for each backend. The redis backend is skipped when no server
+answers at SESSION_REDIS_URL.
+
+Usage (from the backend directory):
+    python benchmarks/session_overhead.py --requests 2000
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from flask import Flask, jsonify, session
+from session_store import init_session_store
+
+
+def create_benchmark_app(backend: str, tmp_dir: str) -> Flask:
+    """Builds a minimal app with the selected session backend."""
+    app = Flask(__name__, instance_path=tmp_dir)
+    app.config.update(
+        SECRET_KEY='benchmark',
+        SESSION_BACKEND=backend,
+        SESSION_FILE_DIR=os.path.join(tmp_dir, 'flask_session'),
+        SESSION_SQLITE_PATH=os.path.join(tmp_dir, 'sessions.db'),
+        SESSION_REDIS_URL=os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/15'),
+        PERMANENT_SESSION_LIFETIME=timedelta(days=31)
+    )
+    init_session_store(app)
+
+    @app.route('/login', methods=['POST'])
+    def login():
+        session['user_id'] = 'user-1'
+        return jsonify({'ok': True})
+
+    @app.route('/whoami')
+    def whoami():
+        return jsonify({'user_id': session.get('user_id')})
+
+    return app
+
+
+def run_backend(backend: str, requests: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_benchmark_app(backend, tmp)
+        client = app.test_client()
+        client.post('/login')
+
+        # Warm up connections and caches before measuring
+        for _ in range(20):
+            client.get('/whoami')
+
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            response = client.get('/whoami')
+            timings.append(time.perf_counter() - started)
+            assert response.json['user_id'] == 'user-1'
+
+    timings.sort()
+    return {
+        'backend': backend,
+        'mean_us': statistics.mean(timings) * 1e6,
+        'p95_us': timings[int(len(timings) * 0.95) - 1] * 1e6
+    }
+
+
+def redis_available() -> bool:
+    try:
+        import redis
+        redis.from_url(os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/15')).ping()
+        return True
+    except Exception:
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=2000, help='Authenticated requests per backend')
+    args = parser.parse_args()
+
+    backends = ['filesystem', 'cookie', 'sqlite']
+    if redis_available():
+        backends.append('redis')
+    else:
+        print("⚠️ No Redis server reachable, skipping the redis backend.")
+
+    print(f"{'backend':<12} {'mean us':>10} {'p95 us':>10}")
+    for backend in backends:
+        r = run_backend(backend, args.requests)
+        print(f"{r['backend']:<12} {r['mean_us']:>10.1f} {r['p95_us']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,93 @@
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv(override=True)
 
+
+def build_engine_options(database_uri: str, profile: str) -> dict:
+    """
+    Returns SQLAlchemy engine options for the given database URI and profile.
+    The 'development' profile keeps SQLAlchemy's defaults; 'production'
+    tunes pooling and lock/statement timeouts for concurrent chat requests.
+    """
+    if profile != 'production':
+        return {}
+
+    if database_uri.startswith('sqlite'):
+        # In-memory databases use a single shared connection, nothing to pool
+        if database_uri in ('sqlite://', 'sqlite:///:memory:'):
+            return {}
+        return {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+            # Seconds the sqlite3 driver waits on a locked database
+            'connect_args': {'timeout': int(os.getenv('DB_BUSY_TIMEOUT_MS', 15000)) / 1000}
+        }
+
+    if database_uri.startswith('postgresql'):
+        statement_timeout_ms = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 15000))
+        return {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.getenv('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(os.getenv('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+            'connect_args': {'options': f'-c statement_timeout={statement_timeout_ms}'}
+        }
+
+    return {}
+
+
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'your-secret-key-here')
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///travel_agent.db')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SESSION_TYPE = 'filesystem'
-    
-    # API Keys
+
+    # Session store: 'filesystem', 'cookie', 'sqlite' or 'redis' (see session_store.py)
+    SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'filesystem')
+    SESSION_SQLITE_PATH = os.getenv('SESSION_SQLITE_PATH')
+    SESSION_REDIS_URL = os.getenv('SESSION_REDIS_URL', 'redis://localhost:6379/0')
+    PERMANENT_SESSION_LIFETIME = timedelta(seconds=int(os.getenv('SESSION_TTL_SECONDS', 31 * 24 * 3600)))
+
+    # Database profile: 'development' (SQLAlchemy defaults) or 'production'
+    DB_PROFILE = os.getenv('DB_PROFILE', 'development')
+    SQLALCHEMY_ENGINE_OPTIONS = build_engine_options(SQLALCHEMY_DATABASE_URI, DB_PROFILE)
+    # Applied to every new SQLite connection in the production profile
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'busy_timeout': int(os.getenv('DB_BUSY_TIMEOUT_MS', 15000)),
+        'synchronous': 'NORMAL'
+    }
+
+    # SQL instrumentation (see query_stats.py)
+    SQL_SLOW_REQUEST_QUERY_COUNT = int(os.getenv('SQL_SLOW_REQUEST_QUERY_COUNT', 20))
+    SQL_SLOW_REQUEST_DB_MS = float(os.getenv('SQL_SLOW_REQUEST_DB_MS', 200))
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 5))
+    # X-DB-Query-Count / X-DB-Time-Ms headers are always sent in debug mode
+    SQL_STATS_HEADERS = os.getenv('SQL_STATS_HEADERS', '0') == '1'
+    # Maximum statements per endpoint; exceeding one is logged
+    QUERY_BUDGETS = {
+        'chat.travel_chat': 30,
+        'chat.get_suggestions': 3,
+        'selection_api.select_suggestion_route': 6
+    }
+
+    # Time budget of one /api/travel-chat request, shared by the model calls,
+    # tools and upstream API requests it makes (see agents/deadline.py)
+    TRAVEL_CHAT_DEADLINE_SECONDS = float(os.getenv('TRAVEL_CHAT_DEADLINE_SECONDS', 60))
+
+    # Suggestion streams (/api/suggestions/<id>/stream) served at once per
+    # worker process; each holds a server thread while open
+    SUGGESTION_STREAM_MAX_OPEN = int(os.getenv('SUGGESTION_STREAM_MAX_OPEN', 8))
+
+    # API Keys. The upstream API keys may list several keys, comma-separated;
+    # calls are spread across them (see agents/credentials.py)
     OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     BOOKING_API_HOST = os.getenv("BOOKING_API_HOST")
-    BOOKING_API_KEY = os.getenv("BOOKING_API_KEY")
\ No newline at end of file
+    BOOKING_API_KEY = os.getenv("BOOKING_API_KEY")
+    TRIPADVISOR_API_KEY = os.getenv("TRIPADVISOR_API_KEY")
+    GEOAPIFY_API_KEY = os.getenv("GEOAPIFY_API_KEY")
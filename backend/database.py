@@ -1,9 +1,29 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
 import uuid
 
 db = SQLAlchemy()
 
+
+def configure_engine(app):
+    """
+    Applies per-connection settings for the configured DB profile.
+    Must be called inside an app context after db.init_app(app).
+    """
+    engine = db.engine
+    if app.config.get('DB_PROFILE') != 'production' or engine.dialect.name != 'sqlite':
+        return
+
+    pragmas = app.config.get('SQLITE_PRAGMAS', {})
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
 class User(db.Model):
     __tablename__ = 'users'
     
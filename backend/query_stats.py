@@ -0,0 +1,106 @@
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List
+from flask import Flask, g, has_app_context, request
+from sqlalchemy import event
+from database import db
+
+# Explicit collectors opened with count_queries(), per thread
+_local = threading.local()
+
+
+class QueryStats:
+    """Number of SQL statements and total DB time for one request or block."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements[statement] += 1
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated_statements(self, threshold: int) -> List[tuple]:
+        """Statements executed at least `threshold` times, the usual N+1 signature."""
+        return [(sql, n) for sql, n in self.statements.most_common() if n >= threshold]
+
+
+def _active_collectors() -> List[QueryStats]:
+    collectors = list(getattr(_local, 'collectors', []))
+    if has_app_context() and 'query_stats' in g:
+        collectors.append(g.query_stats)
+    return collectors
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    duration = time.perf_counter() - conn.info['query_start_time'].pop()
+    for stats in _active_collectors():
+        stats.record(statement, duration)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryStats]:
+    """
+    Counts the SQL statements run inside the block, e.g. in tests:
+
+        with count_queries() as stats:
+            client.get(f'/api/suggestions/{conversation_id}')
+        assert stats.count <= app.config['QUERY_BUDGETS']['chat.get_suggestions']
+    """
+    stats = QueryStats()
+    if not hasattr(_local, 'collectors'):
+        _local.collectors = []
+    _local.collectors.append(stats)
+    try:
+        yield stats
+    finally:
+        _local.collectors.remove(stats)
+
+
+def init_query_stats(app: Flask):
+    """
+    Hooks statement counting into the app's engine and reports per request.
+    Must be called inside an app context after db.init_app(app).
+    """
+    engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def _start_query_stats():
+        g.query_stats = QueryStats()
+
+    @app.after_request
+    def _report_query_stats(response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+
+        budget = app.config.get('QUERY_BUDGETS', {}).get(request.endpoint)
+        over_budget = budget is not None and stats.count > budget
+        too_many = stats.count > app.config.get('SQL_SLOW_REQUEST_QUERY_COUNT', 20)
+        too_slow = stats.duration_ms > app.config.get('SQL_SLOW_REQUEST_DB_MS', 200)
+
+        if over_budget or too_many or too_slow:
+            budget_note = f" (budget {budget})" if budget is not None else ""
+            print(f"⚠️ SQL: {request.method} {request.path} ran {stats.count} statements{budget_note} "
+                  f"in {stats.duration_ms:.1f} ms")
+        for statement, times in stats.repeated_statements(app.config.get('SQL_N_PLUS_ONE_THRESHOLD', 5)):
+            print(f"⚠️ SQL: possible N+1 in {request.path}, ran {times}x: {statement[:200]}")
+
+        if app.debug or app.config.get('SQL_STATS_HEADERS'):
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-Ms'] = f"{stats.duration_ms:.2f}"
+        return response
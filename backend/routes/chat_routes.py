@@ -1,11 +1,31 @@
-from flask import Blueprint, request, jsonify, session
+from flask import Blueprint, current_app, request, jsonify, session, Response, stream_with_context
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
 from database import db, User, Conversation, Message, TravelSuggestion
 from agents.chat_agent import ChatService # The new "brain"
-from agents.iternerary_manager import ItineraryManager
+from agents import deadline
+from suggestion_events import suggestion_broker
+from unit_of_work import get_conversation, get_itinerary_manager
+from unit_of_work import get_suggestions as get_conversation_suggestions
+import json
+import threading
+import time
 import uuid
 
 chat_bp = Blueprint('chat', __name__)
 
+# How long a single suggestion stream stays open before the browser
+# reconnects, and how often an idle stream sends a keep-alive comment.
+SUGGESTION_STREAM_MAX_SECONDS = 300
+SUGGESTION_STREAM_HEARTBEAT_SECONDS = 15
+# How often a stream checks the database for changes committed by other
+# worker processes (changes made in this one wake it up at once)
+SUGGESTION_STREAM_POLL_SECONDS = 2
+
+# Suggestion streams open in this process, capped by SUGGESTION_STREAM_MAX_OPEN
+_open_streams = 0
+_open_streams_lock = threading.Lock()
+
 @chat_bp.route('/travel-chat', methods=['POST'])
 def travel_chat():
     """
@@ -21,7 +41,7 @@ def travel_chat():
     conversation_id = data.get('conversationId')
 
     # 1. Get conversation
-    conversation = Conversation.query.get(conversation_id)
+    conversation = get_conversation(conversation_id)
     if not conversation or conversation.user_id != user_id:
         return jsonify({'error': 'Conversation not found'}), 404
     
@@ -33,12 +53,19 @@ def travel_chat():
         # Initialize the service with the current conversation state
         chat_service = ChatService(conversation)
         
-        # Process the message (this handles LLM calls, tool use, and DB saving)
-        assistant_response = chat_service.process_message(user_message_content)
+        # Process the message (this handles LLM calls, tool use, and DB saving).
+        # Every model call, tool and upstream request below sizes its
+        # timeouts from this deadline.
+        with deadline.within(current_app.config['TRAVEL_CHAT_DEADLINE_SECONDS']):
+            assistant_response = chat_service.process_message(user_message_content)
         
         # Return the final text response to the user
         return jsonify({'response': assistant_response})
 
+    except deadline.DeadlineExceeded as e:
+        print(f"travel_chat ran out of time: {e}")
+        return jsonify({'error': 'The request took too long, please try again'}), 504
+
     except Exception as e:
         print(f"Error in travel_chat route: {e}")
         # Add more specific error logging here for production
@@ -74,38 +101,139 @@ def get_suggestions(conversation_id):
     if not user_id:
         return jsonify({'error': 'Not authenticated'}), 401
     
-    conversation = db.session.get(Conversation, conversation_id)
+    conversation = get_conversation(conversation_id)
     if not conversation or conversation.user_id != user_id:
         return jsonify({'error': 'Conversation not found'}), 404
     
-    suggestions = TravelSuggestion.query.filter_by(conversation_id=conversation_id).all()
+    return jsonify({'suggestions': _serialize_suggestions(get_conversation_suggestions(conversation_id))})
+
+
+@chat_bp.route('/suggestions/<conversation_id>/stream', methods=['GET'])
+def stream_suggestions(conversation_id):
+    """
+    Server-Sent Events stream of travel suggestions for a conversation.
+    Sends the current list immediately, then a new list every time
+    suggestions for this conversation are committed or deleted, by this
+    worker process or another one.
+
+    Each open stream holds a server thread, so only
+    SUGGESTION_STREAM_MAX_OPEN are served per process; past that the
+    client gets a 503 and falls back to polling /suggestions.
+    """
+    user_id = session.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Not authenticated'}), 401
     
-    return jsonify({
-        'suggestions': [{
-            'id': s.id,
-            'type': s.type,
-            'title': s.title,
-            'description': s.description,
-            'price': float(s.price) if s.price else None,
-            'rating': float(s.rating) if s.rating else None,
-            'image_url': s.image_url,
-            'booking_url': s.booking_url,
-            'location': s.location
-        } for s in suggestions]
-    })
+    conversation = db.session.get(Conversation, conversation_id)
+    if not conversation or conversation.user_id != user_id:
+        return jsonify({'error': 'Conversation not found'}), 404
+
+    if not _open_stream(current_app.config['SUGGESTION_STREAM_MAX_OPEN']):
+        return jsonify({'error': 'Too many open suggestion streams'}), 503
+
+    def generate():
+        version = suggestion_broker.version(conversation_id)
+        fingerprint = _suggestions_fingerprint(conversation_id)
+        event_id = 1
+        yield _format_sse('suggestions', event_id, _load_suggestions(conversation_id))
+        
+        closes_at = time.monotonic() + SUGGESTION_STREAM_MAX_SECONDS
+        last_sent = time.monotonic()
+        while time.monotonic() < closes_at:
+            latest = suggestion_broker.wait_for_change(
+                conversation_id, version, timeout=SUGGESTION_STREAM_POLL_SECONDS
+            )
+            latest_fingerprint = _suggestions_fingerprint(conversation_id)
+            if latest == version and latest_fingerprint == fingerprint:
+                if time.monotonic() - last_sent >= SUGGESTION_STREAM_HEARTBEAT_SECONDS:
+                    # Comment lines keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+                    last_sent = time.monotonic()
+                continue
+            
+            version, fingerprint = latest, latest_fingerprint
+            event_id += 1
+            yield _format_sse('suggestions', event_id, _load_suggestions(conversation_id))
+            last_sent = time.monotonic()
+
+    response = Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    response.call_on_close(_close_stream)
+    return response
+
+
+def _open_stream(max_open):
+    """Takes one of the process's stream slots; False if all are in use."""
+    global _open_streams
+    with _open_streams_lock:
+        if _open_streams >= max_open:
+            return False
+        _open_streams += 1
+        return True
+
+
+def _close_stream():
+    global _open_streams
+    with _open_streams_lock:
+        _open_streams -= 1
+
+
+# Streams read through their own short sessions, so they never end or roll
+# back the request's shared session and don't hold a connection between reads.
+
+def _suggestions_fingerprint(conversation_id):
+    """Row count and newest creation time; any add or delete changes one of them."""
+    with Session(db.engine) as read_session:
+        return tuple(read_session.execute(
+            select(func.count(TravelSuggestion.id), func.max(TravelSuggestion.created_at))
+            .where(TravelSuggestion.conversation_id == conversation_id)
+        ).one())
+
+
+def _load_suggestions(conversation_id):
+    """Loads and serializes fresh suggestions for a long-lived stream."""
+    with Session(db.engine) as read_session:
+        return _serialize_suggestions(read_session.scalars(
+            select(TravelSuggestion).where(TravelSuggestion.conversation_id == conversation_id)
+        ).all())
+
+
+def _serialize_suggestions(suggestions):
+    """Converts TravelSuggestion rows to the JSON shape used by the frontend."""
+    return [{
+        'id': s.id,
+        'type': s.type,
+        'title': s.title,
+        'description': s.description,
+        'price': float(s.price) if s.price else None,
+        'rating': float(s.rating) if s.rating else None,
+        'image_url': s.image_url,
+        'booking_url': s.booking_url,
+        'location': s.location,
+        'details': s.details
+    } for s in suggestions]
+
 
+def _format_sse(event_name, event_id, payload):
+    """Formats a single Server-Sent Event frame."""
+    return f"event: {event_name}\nid: {event_id}\ndata: {json.dumps({'suggestions': payload})}\n\n"
 
 @chat_bp.route('/suggestions/<conversation_id>/itinerary-summary', methods=['GET'])
 def get_itinerary(conversation_id):
     """Get travel suggestions for a conversation"""
     try:
         # 1. Load Conversation and Itinerary Manager
-        conversation = Conversation.query.get(id)
-        print("Hello World!")
+        conversation = get_conversation(conversation_id)
         if not conversation:
             return jsonify({"error": "Conversation not found"}), 404
             
-        itinerary_manager = ItineraryManager(conversation)
+        itinerary_manager = get_itinerary_manager(conversation)
         
         summary_string = itinerary_manager.get_final_itinerary_summary()
         print(summary_string)
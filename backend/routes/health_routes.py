@@ -0,0 +1,34 @@
+from flask import Blueprint, jsonify
+from agents.circuit_breaker import OPEN, breaker_stats
+from agents.concurrency import concurrency_stats
+from agents.credentials import credential_stats
+from agents.hedging import hedging_stats
+from agents.http_client import coalescing_stats, fallback_stats, transfer_stats
+from agents.rate_limit import rate_limit_stats
+from agents.response_cache import cache_stats
+
+health_bp = Blueprint('health', __name__)
+
+@health_bp.route('/', methods=['GET'])
+def health():
+    """Overall status: degraded while any upstream's circuit breaker is open"""
+    open_circuits = sorted(host for host, stats in breaker_stats().items() if stats['state'] == OPEN)
+    return jsonify({
+        'status': 'degraded' if open_circuits else 'ok',
+        'open_circuits': open_circuits
+    }), 200
+
+@health_bp.route('/upstreams', methods=['GET'])
+def upstreams():
+    """Request, byte, coalescing, rate limit, concurrency, breaker, hedging, API key and cache counters for the upstream APIs"""
+    return jsonify({
+        'transfer': transfer_stats(),
+        'coalescing': coalescing_stats(),
+        'rate_limits': rate_limit_stats(),
+        'concurrency': concurrency_stats(),
+        'circuit_breakers': breaker_stats(),
+        'fallback_responses': fallback_stats(),
+        'hedging': hedging_stats(),
+        'credentials': credential_stats(),
+        'cache': cache_stats()
+    })
@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify
 from database import db, Conversation, TravelSuggestion
-from agents.iternerary_manager import ItineraryManager # Import the manager
+from unit_of_work import get_conversation, get_itinerary_manager
 import json
 
 # Define a blueprint for your API endpoints
@@ -24,12 +24,12 @@ def select_suggestion_route(conversation_id):
 
     try:
         # 1. Fetch the conversation object
-        conversation = Conversation.query.filter_by(id=conversation_id).first()
+        conversation = get_conversation(conversation_id)
         if not conversation:
             return jsonify({"status": "error", "message": f"Conversation with ID {conversation_id} not found."}), 404
 
         # 2. Initialize the ItineraryManager
-        manager = ItineraryManager(conversation)
+        manager = get_itinerary_manager(conversation)
 
         # 3. Execute the selection logic
         result = manager.select_ideal_choice(suggestion_id)
@@ -0,0 +1,161 @@
+import os
+import random
+import secrets
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional
+from flask import Flask
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from itsdangerous import Signer, BadSignature
+from werkzeug.datastructures import CallbackDict
+
+# Fraction of session writes that also purge expired rows
+_PURGE_PROBABILITY = 0.01
+
+
+class SqliteSession(CallbackDict, SessionMixin):
+    """Server-side session whose payload lives in the SQLite session store."""
+
+    def __init__(self, initial=None, sid: str = None, expires_at: float = 0, new: bool = False):
+        def on_update(self):
+            self.modified = True
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.expires_at = expires_at
+        self.new = new
+        self.modified = False
+
+
+class SqliteSessionInterface(SessionInterface):
+    """
+    Stores sessions in a dedicated SQLite file with TTL expiry.
+
+    Only a signed session ID travels in the cookie. Rows are rewritten when
+    the session changes or when more than half of its TTL has elapsed, so
+    read-only requests cost a single indexed SELECT.
+    """
+
+    serializer = TaggedJSONSerializer()
+
+    def __init__(self, path: str, ttl_seconds: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "  sid TEXT PRIMARY KEY,"
+            "  data TEXT NOT NULL,"
+            "  expires_at REAL NOT NULL"
+            ")"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_sessions_expires_at ON sessions (expires_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=15, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _signer(self, app: Flask) -> Signer:
+        return Signer(app.secret_key, salt='sqlite-session')
+
+    def _new_session(self) -> SqliteSession:
+        return SqliteSession(sid=secrets.token_urlsafe(32), new=True)
+
+    def open_session(self, app: Flask, request) -> Optional[SqliteSession]:
+        cookie = request.cookies.get(self.get_cookie_name(app))
+        if not cookie:
+            return self._new_session()
+
+        try:
+            sid = self._signer(app).unsign(cookie).decode()
+        except BadSignature:
+            return self._new_session()
+
+        row = self._connection().execute(
+            "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+            (sid, time.time())
+        ).fetchone()
+        if not row:
+            return self._new_session()
+
+        return SqliteSession(self.serializer.loads(row[0]), sid=sid, expires_at=row[1])
+
+    def save_session(self, app: Flask, session: SqliteSession, response):
+        cookie_name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        conn = self._connection()
+
+        if not session:
+            if session.modified and not session.new:
+                conn.execute("DELETE FROM sessions WHERE sid = ?", (session.sid,))
+                response.delete_cookie(cookie_name, domain=domain, path=path)
+            return
+
+        now = time.time()
+        needs_refresh = session.expires_at - now < self.ttl_seconds / 2
+        if not (session.modified or session.new or needs_refresh):
+            return
+
+        expires_at = now + self.ttl_seconds
+        conn.execute(
+            "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+            (session.sid, self.serializer.dumps(dict(session)), expires_at)
+        )
+        if random.random() < _PURGE_PROBABILITY:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+
+        response.set_cookie(
+            cookie_name,
+            self._signer(app).sign(session.sid).decode(),
+            expires=datetime.fromtimestamp(expires_at, tz=timezone.utc),
+            httponly=self.get_cookie_httponly(app),
+            domain=domain,
+            path=path,
+            secure=self.get_cookie_secure(app),
+            samesite=self.get_cookie_samesite(app)
+        )
+
+
+def init_session_store(app: Flask):
+    """
+    Installs the session backend selected by SESSION_BACKEND:
+
+    - 'filesystem': Flask-Session files under flask_session/ (default)
+    - 'cookie': Flask's built-in signed, stateless cookie session
+    - 'sqlite': SqliteSessionInterface with TTL expiry
+    - 'redis': Flask-Session against any Redis-protocol server
+    """
+    backend = app.config.get('SESSION_BACKEND', 'filesystem')
+
+    if backend == 'cookie':
+        # Flask's default SecureCookieSessionInterface, nothing to install
+        return
+
+    if backend == 'sqlite':
+        path = app.config.get('SESSION_SQLITE_PATH') or os.path.join(app.instance_path, 'sessions.db')
+        ttl = int(app.config['PERMANENT_SESSION_LIFETIME'].total_seconds())
+        app.session_interface = SqliteSessionInterface(path, ttl)
+        return
+
+    from flask_session import Session
+
+    if backend == 'redis':
+        import redis
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.from_url(app.config['SESSION_REDIS_URL'])
+    elif backend == 'filesystem':
+        app.config['SESSION_TYPE'] = 'filesystem'
+    else:
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+
+    Session(app)
@@ -0,0 +1,73 @@
+import threading
+from typing import Dict, Set
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+# Key used to stash pending conversation IDs on the SQLAlchemy session
+# until the surrounding transaction is actually committed.
+_PENDING_KEY = 'changed_suggestion_conversations'
+
+
+class SuggestionBroker:
+    """
+    In-process change feed for TravelSuggestion rows.
+
+    Every conversation has a monotonically increasing version number that is
+    bumped whenever suggestions for it are committed or deleted in this
+    process. Streaming clients block on `wait_for_change` between their
+    database checks, so changes made here reach them at once; changes
+    committed by other worker processes show up at the next check.
+    """
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._versions: Dict[str, int] = {}
+
+    def version(self, conversation_id: str) -> int:
+        """Returns the current version for a conversation (0 if never changed)."""
+        with self._condition:
+            return self._versions.get(conversation_id, 0)
+
+    def publish(self, conversation_id: str) -> int:
+        """Bumps the version for a conversation and wakes up all waiters."""
+        with self._condition:
+            new_version = self._versions.get(conversation_id, 0) + 1
+            self._versions[conversation_id] = new_version
+            self._condition.notify_all()
+            return new_version
+
+    def wait_for_change(self, conversation_id: str, since: int, timeout: float) -> int:
+        """
+        Blocks until the conversation version moves past `since` or the
+        timeout expires. Returns the latest version either way.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self._versions.get(conversation_id, 0) != since,
+                timeout=timeout
+            )
+            return self._versions.get(conversation_id, 0)
+
+
+suggestion_broker = SuggestionBroker()
+
+
+def mark_suggestions_changed(session: Session, conversation_id: str):
+    """
+    Records that suggestions for a conversation were added or removed.
+    Subscribers are only notified once the session commits, so they never
+    see rows that are later rolled back.
+    """
+    pending: Set[str] = session.info.setdefault(_PENDING_KEY, set())
+    pending.add(conversation_id)
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_pending_changes(session: Session):
+    for conversation_id in session.info.pop(_PENDING_KEY, set()):
+        suggestion_broker.publish(conversation_id)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending_changes(session: Session):
+    session.info.pop(_PENDING_KEY, None)
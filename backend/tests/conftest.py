@@ -0,0 +1,144 @@
+import io
+import json
+import os
+import sys
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Read by config.py at import time
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['SESSION_BACKEND'] = 'cookie'
+os.environ['DB_PROFILE'] = 'development'
+
+from app import create_app
+from database import db, User, Conversation, Message, TravelSuggestion
+import agents.chat_agent as chat_agent
+from agents import circuit_breaker, concurrency, hedging, http_client, rate_limit, response_cache
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['TESTING'] = True
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def conversation_id(app):
+    """A conversation with some chat history, two hotel and two flight suggestions."""
+    with app.app_context():
+        user = User(email='traveller@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        conversation = Conversation(user_id=user.id, preferences={})
+        db.session.add(conversation)
+        db.session.flush()
+        db.session.add_all([
+            Message(conversation_id=conversation.id, role='user', content='Rome in May?'),
+            Message(conversation_id=conversation.id, role='assistant', content='Sure, when exactly?'),
+            *[TravelSuggestion(conversation_id=conversation.id, type='hotel', title=f"Hotel {i}", price=100 + i,
+                               location={'address': 'Rome'}, details={}) for i in range(2)],
+            *[TravelSuggestion(conversation_id=conversation.id, type='flight', title=f"Flight {i}", price=200 + i,
+                               location={'origin': 'AMS', 'destination': 'FCO', 'departure': '2026-05-01'},
+                               details={}) for i in range(2)]
+        ])
+        db.session.commit()
+        return conversation.id
+
+
+@pytest.fixture
+def client(app, conversation_id):
+    client = app.test_client()
+    with app.app_context():
+        user_id = db.session.get(Conversation, conversation_id).user_id
+    with client.session_transaction() as session:
+        session['user_id'] = user_id
+    return client
+
+
+class FakeModel:
+    """Stands in for the Gemini model: answers every turn with plain text, no tool calls."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def generate_content(self, contents, **kwargs):
+        part = SimpleNamespace(text='Here is your plan.', function_call=None)
+        return SimpleNamespace(candidates=[SimpleNamespace(content=SimpleNamespace(parts=[part]))])
+
+
+@pytest.fixture
+def fake_model(monkeypatch):
+    monkeypatch.setattr(chat_agent.genai, 'GenerativeModel', FakeModel)
+
+
+class FakeResponse(io.BytesIO):
+    """An http.client response with a JSON body."""
+
+    def __init__(self, status, body, headers):
+        payload = json.dumps(body).encode('utf-8')
+        super().__init__(payload)
+        self.status = status
+        self.length = len(payload)
+        self._headers = {name.lower(): value for name, value in (headers or {}).items()}
+
+    def getheader(self, name, default=None):
+        return self._headers.get(name.lower(), default)
+
+
+class FakeUpstream:
+    """
+    Stands in for http.client.HTTPSConnection: each request gets the next
+    queued response (an exception is raised instead), and is recorded as
+    (host, method, endpoint, headers).
+    """
+
+    def __init__(self):
+        self.responses = deque()
+        self.requests = []
+
+    def respond(self, status=200, body=None, headers=None):
+        self.responses.append(FakeResponse(status, body if body is not None else {}, headers))
+
+    def fail(self, error):
+        self.responses.append(error)
+
+    def __call__(self, host, timeout=None):
+        upstream = self
+
+        class Connection:
+            sock = None
+
+            def request(self, method, endpoint, headers=None):
+                upstream.requests.append((host, method, endpoint, headers or {}))
+
+            def getresponse(self):
+                response = upstream.responses.popleft()
+                if isinstance(response, BaseException):
+                    raise response
+                return response
+
+            def close(self):
+                pass
+
+        return Connection()
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    """A fake upstream behind request_json, with fresh breakers, limits and an in-memory response cache."""
+    fake = FakeUpstream()
+    monkeypatch.setattr(http_client.http.client, 'HTTPSConnection', fake)
+    monkeypatch.setattr(response_cache, '_cache', response_cache.TieredCache([response_cache.LRUTier()]))
+    monkeypatch.setattr(rate_limit, '_buckets', rate_limit.MemoryTokenBuckets())
+    monkeypatch.setattr(circuit_breaker, '_breakers', {})
+    monkeypatch.setattr(concurrency, '_limiters', {})
+    monkeypatch.setattr(hedging, '_policies', {})
+    monkeypatch.setattr(http_client, '_served_from_fallback', {})
+    return fake
@@ -0,0 +1,120 @@
+import time
+
+import pytest
+
+from agents import circuit_breaker as breakers
+from agents.circuit_breaker import (CLOSED, COOL_DOWN_SECONDS, HALF_OPEN, MIN_REQUESTS, OPEN, CircuitBreaker,
+                                    CircuitOpenError)
+from agents.http_client import fallback_stats, request_json
+from agents.response_cache import CachePolicy, EXPIRED_KEEP_SECONDS
+
+HOST = 'api.test'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(breakers.time, 'monotonic', clock)
+    return clock
+
+
+def open_breaker(breaker):
+    while breaker.state != OPEN:
+        assert breaker.allow()
+        breaker.record(False)
+
+
+def test_opens_once_enough_requests_fail(clock):
+    breaker = CircuitBreaker(HOST)
+    for success in [True, False] * (MIN_REQUESTS // 2 - 1) + [True]:
+        breaker.record(success)
+    assert breaker.state == CLOSED
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+    assert breaker.stats()['rejected'] == 1
+
+
+def test_few_failures_keep_it_closed(clock):
+    breaker = CircuitBreaker(HOST)
+    for _ in range(MIN_REQUESTS - 1):
+        breaker.record(False)
+    assert breaker.state == CLOSED
+
+
+def test_half_open_trial_success_closes(clock):
+    breaker = CircuitBreaker(HOST)
+    open_breaker(breaker)
+    clock.now += COOL_DOWN_SECONDS
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # one trial at a time
+    breaker.record(True)
+    assert breaker.state == CLOSED
+    assert breaker.stats()['window'] == 0
+
+
+def test_half_open_trial_failure_reopens(clock):
+    breaker = CircuitBreaker(HOST)
+    open_breaker(breaker)
+    clock.now += COOL_DOWN_SECONDS
+    assert breaker.allow()
+    breaker.record(False)
+    assert breaker.state == OPEN
+    assert breaker.times_opened == 2
+    assert breaker.stats()['retry_in_seconds'] == COOL_DOWN_SECONDS
+
+
+def test_released_trial_lets_another_through(clock):
+    breaker = CircuitBreaker(HOST)
+    open_breaker(breaker)
+    clock.now += COOL_DOWN_SECONDS
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.allow()
+
+
+def test_server_errors_open_the_breaker(upstream):
+    for _ in range(MIN_REQUESTS):
+        upstream.respond(503)
+        request_json(HOST, 'POST', '/search')
+    assert breakers.circuit_breaker(HOST).state == OPEN
+    with pytest.raises(CircuitOpenError):
+        request_json(HOST, 'POST', '/search')
+    assert len(upstream.requests) == MIN_REQUESTS
+
+
+def test_open_breaker_serves_last_good_response(upstream):
+    upstream.respond(200, {'hotels': [1]})
+    assert request_json(HOST, 'GET', '/hotels?city=Rome') == (200, {'hotels': [1]})
+    open_breaker(breakers.circuit_breaker(HOST))
+
+    assert request_json(HOST, 'GET', '/hotels?city=Rome') == (200, {'hotels': [1]})
+    assert fallback_stats() == {HOST: 1}
+    with pytest.raises(CircuitOpenError):
+        request_json(HOST, 'GET', '/hotels?city=Paris')
+    assert len(upstream.requests) == 1
+
+
+def test_open_breaker_serves_expired_cache_entry(upstream, monkeypatch):
+    policy = CachePolicy(ttl=60)
+    upstream.respond(200, {'hotels': [1]})
+    request_json(HOST, 'GET', '/hotels?city=Rome', cache=policy)
+    open_breaker(breakers.circuit_breaker(HOST))
+
+    # Past the policy's lifetime, so only served as a fallback
+    cached_at = time.time()
+    monkeypatch.setattr(time, 'time', lambda: cached_at + 3600)
+    assert request_json(HOST, 'GET', '/hotels?city=Rome', cache=policy) == (200, {'hotels': [1]})
+
+    monkeypatch.setattr(time, 'time', lambda: cached_at + 60 + EXPIRED_KEEP_SECONDS + 1)
+    with pytest.raises(CircuitOpenError):
+        request_json(HOST, 'GET', '/hotels?city=Rome', cache=policy)
@@ -0,0 +1,125 @@
+import contextlib
+import threading
+
+import pytest
+
+from agents import concurrency, deadline
+from agents.concurrency import AIMDLimiter, ConcurrencyLimitTimeout
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(concurrency.time, 'monotonic', clock)
+    return clock
+
+
+def respond(limiter, clock, latency=0.1, overload=False, alongside=0):
+    """One request through the limiter, with `alongside` others in flight (they never answer)."""
+    with contextlib.ExitStack() as others:
+        for _ in range(alongside):
+            others.enter_context(limiter.slot())
+        with limiter.slot() as slot:
+            clock.now += latency
+            if overload:
+                slot.overloaded()
+            else:
+                slot.responded()
+
+
+def test_limit_grows_by_about_one_per_limit_of_good_responses(clock):
+    limiter = AIMDLimiter('api.test', initial=2)
+    for _ in range(3):
+        respond(limiter, clock, alongside=1)
+    assert int(limiter.limit) == 3
+    for _ in range(3):
+        respond(limiter, clock, alongside=1)
+    assert int(limiter.limit) == 4
+    assert limiter.increases == 2
+
+
+def test_limit_does_not_grow_while_mostly_idle(clock):
+    limiter = AIMDLimiter('api.test', initial=4)
+    for _ in range(20):
+        respond(limiter, clock)  # one in flight out of four
+    assert int(limiter.limit) == 4
+
+
+def test_limit_stops_at_max(clock):
+    limiter = AIMDLimiter('api.test', initial=2, max_limit=3)
+    for _ in range(20):
+        respond(limiter, clock, alongside=1)
+    assert limiter.limit == 3
+
+
+def test_overload_halves_the_limit_once_per_round_trip(clock):
+    limiter = AIMDLimiter('api.test', initial=8)
+    respond(limiter, clock, latency=0.1)
+    respond(limiter, clock, overload=True)
+    assert limiter.limit == 4
+    # Part of the same burst of failures
+    respond(limiter, clock, latency=0.01, overload=True)
+    assert limiter.limit == 4
+    clock.now += 1
+    respond(limiter, clock, overload=True)
+    assert limiter.limit == 2
+    assert limiter.decreases == 2
+
+
+def test_latency_spike_counts_as_overload(clock):
+    limiter = AIMDLimiter('api.test', initial=8)
+    respond(limiter, clock, latency=0.1)
+    respond(limiter, clock, latency=1.0)
+    assert limiter.limit == 4
+
+
+def test_limit_stops_at_min(clock):
+    limiter = AIMDLimiter('api.test', initial=2, min_limit=1)
+    for _ in range(5):
+        clock.now += 10
+        respond(limiter, clock, overload=True)
+    assert limiter.limit == 1
+
+
+def test_timeout_counts_as_overload_but_deadline_does_not(clock):
+    limiter = AIMDLimiter('api.test', initial=8)
+    with pytest.raises(deadline.DeadlineExceeded):
+        with limiter.slot():
+            raise deadline.DeadlineExceeded('caller out of time')
+    assert limiter.limit == 8
+    with pytest.raises(TimeoutError):
+        with limiter.slot():
+            raise TimeoutError('read timed out')
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+def test_request_over_the_limit_waits_and_times_out():
+    limiter = AIMDLimiter('api.test', initial=1)
+    holding, release = threading.Event(), threading.Event()
+
+    def hold():
+        with limiter.slot():
+            holding.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    holding.wait(5)
+    assert limiter.spare() == 0
+    with pytest.raises(ConcurrencyLimitTimeout):
+        with limiter.slot(timeout=0.05):
+            pass
+    release.set()
+    thread.join(5)
+    assert limiter.max_queued == 1
+    with limiter.slot(timeout=0.05):
+        assert limiter.in_flight == 1
@@ -0,0 +1,122 @@
+import pytest
+
+from agents import credentials as credentials_module
+from agents.credentials import (AUTH_QUARANTINE_SECONDS, LIMIT_HEADER, QUOTA_QUARANTINE_SECONDS, REMAINING_HEADER,
+                                RESET_HEADER, CredentialPool, NoCredentialsAvailable, key_id, pool_from_env)
+from agents.http_client import request_json
+
+HOST = 'api.test'
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(credentials_module.time, 'monotonic', clock)
+    return clock
+
+
+def headers(**values):
+    return lambda name: values.get(name)
+
+
+def use(pool):
+    key = pool.acquire()
+    pool.release(key)
+    return key
+
+
+def test_keys_take_turns_while_quotas_are_unknown():
+    pool = CredentialPool('TEST_KEYS', ['a', 'b', 'c', 'a'])
+    assert len(pool) == 3
+    assert [use(pool) for _ in range(6)] == ['a', 'b', 'c', 'a', 'b', 'c']
+
+
+def test_key_in_flight_is_not_picked_again():
+    pool = CredentialPool('TEST_KEYS', ['a', 'b'])
+    assert {pool.acquire(), pool.acquire()} == {'a', 'b'}
+
+
+def test_key_with_most_quota_left_is_picked():
+    pool = CredentialPool('TEST_KEYS', ['a', 'b'])
+    pool.report('a', 200, headers(**{REMAINING_HEADER: '5', LIMIT_HEADER: '100'}))
+    pool.report('b', 200, headers(**{REMAINING_HEADER: '50'}))
+    assert use(pool) == 'b'
+    assert pool.stats()[key_id('a')]['limit'] == 100
+
+
+@pytest.mark.parametrize('status, getheader, retry_after, seconds', [
+    (401, headers(), None, AUTH_QUARANTINE_SECONDS),
+    (429, headers(), None, QUOTA_QUARANTINE_SECONDS),
+    (429, headers(), 7, 7),
+    (429, headers(**{REMAINING_HEADER: '0', RESET_HEADER: '900'}), 7, 900),
+])
+def test_rejected_key_sits_out(clock, status, getheader, retry_after, seconds):
+    pool = CredentialPool('TEST_KEYS', ['a', 'b'])
+    pool.report('a', status, getheader, retry_after)
+    assert pool.available() == 1
+    assert [use(pool) for _ in range(3)] == ['b', 'b', 'b']
+    clock.now += seconds
+    assert pool.available() == 2
+    assert pool.stats()[key_id('a')]['rejected'] == 1
+
+
+def test_all_keys_quarantined(clock):
+    pool = CredentialPool('TEST_KEYS', ['a'])
+    pool.report('a', 401, headers())
+    with pytest.raises(NoCredentialsAvailable, match='quarantined'):
+        pool.acquire()
+    with pytest.raises(NoCredentialsAvailable, match='No API key'):
+        CredentialPool('TEST_KEYS', []).acquire()
+
+
+def test_keys_go_in_a_header_or_the_query():
+    header_pool = CredentialPool('TEST_KEYS', ['a'])
+    assert header_pool.apply('a', '/search?q=1', {'x-rapidapi-host': HOST}) == (
+        '/search?q=1', {'x-rapidapi-host': HOST, 'x-rapidapi-key': 'a'})
+    query_pool = CredentialPool('TEST_KEYS', ['a'], query_param='apiKey')
+    assert query_pool.apply('a', '/search?q=1', None) == ('/search?q=1&apiKey=a', {})
+    assert query_pool.header is None
+
+
+def test_stats_do_not_show_the_keys():
+    pool = CredentialPool('TEST_KEYS', ['secret-key'])
+    use(pool)
+    assert list(pool.stats()) == [key_id('secret-key')]
+    assert 'secret-key' not in repr(pool.stats())
+
+
+def test_pool_from_env_is_shared_and_refuses_other_options(monkeypatch):
+    monkeypatch.setattr(credentials_module, '_pools', {})
+    monkeypatch.setenv('TEST_KEYS', 'a, b,,c')
+    pool = pool_from_env('TEST_KEYS', query_param='apiKey')
+    assert len(pool) == 3
+    assert pool_from_env('TEST_KEYS', query_param='apiKey') is pool
+    with pytest.raises(ValueError):
+        pool_from_env('TEST_KEYS')
+
+
+def test_rejected_request_is_retried_with_another_key(upstream):
+    pool = CredentialPool('TEST_KEYS', ['a', 'b'])
+    upstream.respond(429, {'message': 'Too many requests'}, {'Retry-After': '30'})
+    upstream.respond(200, {'ok': True})
+    assert request_json(HOST, 'GET', '/search', credentials=pool) == (200, {'ok': True})
+    assert [request[3]['x-rapidapi-key'] for request in upstream.requests] == ['a', 'b']
+    assert pool.available() == 1
+    assert pool.stats()[key_id('a')]['in_flight'] == 0
+
+
+def test_second_rejection_is_returned(upstream):
+    pool = CredentialPool('TEST_KEYS', ['a', 'b', 'c'])
+    upstream.respond(401)
+    upstream.respond(401)
+    assert request_json(HOST, 'GET', '/search', credentials=pool)[0] == 401
+    assert len(upstream.requests) == 2
+    assert pool.available() == 1
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from agents import deadline
+from agents.circuit_breaker import circuit_breaker
+from agents.concurrency import upstream_limiter
+from agents.http_client import UPSTREAM_TIMEOUT_SECONDS, _socket_timeout, request_json
+
+HOST = 'api.test'
+
+
+def test_no_deadline_uses_defaults():
+    assert deadline.remaining() is None
+    assert deadline.remaining(5) == 5
+    assert not deadline.expired()
+    deadline.check()
+
+
+def test_remaining_is_capped_by_default_and_deadline():
+    with deadline.within(2):
+        assert 1.9 < deadline.remaining() <= 2
+        assert deadline.remaining(0.5) == 0.5
+        assert 1.9 < deadline.remaining(10) <= 2
+    assert deadline.remaining() is None
+
+
+def test_inner_deadline_cannot_outlast_outer():
+    with deadline.within(1) as outer:
+        with deadline.within(60) as inner:
+            assert inner == outer
+        with deadline.within(0.5) as inner:
+            assert inner < outer
+
+
+def test_timeout_has_a_floor():
+    with deadline.within(0.01):
+        time.sleep(0.02)
+        assert deadline.remaining() == 0
+        assert deadline.timeout(10) == 1.0
+        assert deadline.timeout(10, floor=0.1) == 0.1
+
+
+def test_check_raises_once_expired():
+    with deadline.within(0):
+        assert deadline.expired()
+        with pytest.raises(deadline.DeadlineExceeded, match='before searching'):
+            deadline.check('searching')
+    assert issubclass(deadline.DeadlineExceeded, TimeoutError)
+
+
+def test_in_context_carries_the_deadline_to_a_thread():
+    seen = {}
+
+    def worker():
+        seen['remaining'] = deadline.remaining()
+
+    with deadline.within(5):
+        thread = threading.Thread(target=deadline.in_context(worker))
+    thread.start()
+    thread.join()
+    assert 4 < seen['remaining'] <= 5
+
+    plain = threading.Thread(target=worker)
+    with deadline.within(5):
+        plain.start()
+    plain.join()
+    assert seen['remaining'] is None
+
+
+def test_socket_timeout_is_clamped_to_the_deadline():
+    assert _socket_timeout() == (UPSTREAM_TIMEOUT_SECONDS, False)
+    with deadline.within(2):
+        timeout, clamped = _socket_timeout()
+    assert clamped and 1.9 < timeout <= 2
+
+
+def test_expired_request_is_not_sent(upstream):
+    with deadline.within(0):
+        with pytest.raises(deadline.DeadlineExceeded):
+            request_json(HOST, 'GET', '/search')
+    assert upstream.requests == []
+
+
+def test_timeout_cut_short_by_the_deadline_does_not_count_against_the_host(upstream):
+    limit = upstream_limiter(HOST).limit
+    upstream.fail(TimeoutError('timed out'))
+    with deadline.within(2):
+        with pytest.raises(deadline.DeadlineExceeded):
+            request_json(HOST, 'GET', '/search')
+    assert circuit_breaker(HOST).stats()['window'] == 0
+    assert upstream_limiter(HOST).limit == limit
+
+
+def test_timeout_without_a_deadline_counts_against_the_host(upstream):
+    limit = upstream_limiter(HOST).limit
+    upstream.fail(TimeoutError('timed out'))
+    with pytest.raises(TimeoutError) as raised:
+        request_json(HOST, 'GET', '/search')
+    assert not isinstance(raised.value, deadline.DeadlineExceeded)
+    assert circuit_breaker(HOST).stats()['failure_rate'] == 1.0
+    assert upstream_limiter(HOST).limit < limit
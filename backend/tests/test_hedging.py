@@ -0,0 +1,110 @@
+import threading
+import time
+
+import pytest
+
+from agents import hedging
+from agents.hedging import (HEDGE_BUDGET_MAX, HEDGE_BUDGET_PERCENT, MIN_HEDGE_DELAY_SECONDS, MIN_SAMPLES,
+                            HedgePolicy, hedge_policy, hedged_call)
+
+ENDPOINT = 'api.test/search'
+
+
+@pytest.fixture(autouse=True)
+def fresh_policies(monkeypatch):
+    monkeypatch.setattr(hedging, '_policies', {})
+
+
+def warmed_up(endpoint=ENDPOINT, latency=0.01, budget_requests=0):
+    """The endpoint's policy with enough fast samples to hedge, and budget_requests worth of budget."""
+    policy = hedge_policy(endpoint)
+    for _ in range(MIN_SAMPLES):
+        policy.observe(latency)
+    for _ in range(budget_requests):
+        policy.started()
+    return policy
+
+
+def slow(result, seconds=0.5):
+    def call():
+        time.sleep(seconds)
+        return result
+    return call
+
+
+def failing(message, seconds=0.0):
+    def call():
+        time.sleep(seconds)
+        raise ConnectionError(message)
+    return call
+
+
+def test_no_hedge_delay_until_enough_samples():
+    policy = HedgePolicy(ENDPOINT)
+    for _ in range(MIN_SAMPLES - 1):
+        policy.observe(1.0)
+    assert policy.delay() is None
+    policy.observe(1.0)
+    assert policy.delay() == 1.0
+
+
+def test_hedge_delay_is_the_p90_with_a_floor():
+    policy = HedgePolicy(ENDPOINT)
+    for latency in range(1, 101):
+        policy.observe(latency / 1000)
+    assert policy.delay() == pytest.approx(0.09, abs=0.001)
+    fast = HedgePolicy(ENDPOINT)
+    for _ in range(MIN_SAMPLES):
+        fast.observe(0.001)
+    assert fast.delay() == MIN_HEDGE_DELAY_SECONDS
+
+
+def test_budget_earns_a_hedge_per_hundred_over_percent_requests():
+    policy = HedgePolicy(ENDPOINT)
+    per_hedge = 100 // HEDGE_BUDGET_PERCENT
+    for _ in range(per_hedge - 1):
+        policy.started()
+    assert not policy.take_hedge()
+    policy.started()
+    assert policy.take_hedge()
+    assert not policy.take_hedge()
+    assert (policy.hedged, policy.over_budget) == (1, 2)
+
+
+def test_budget_saves_up_to_its_max():
+    policy = HedgePolicy(ENDPOINT)
+    for _ in range(1000):
+        policy.started()
+    hedges = 0
+    while policy.take_hedge():
+        hedges += 1
+    assert hedges == int(HEDGE_BUDGET_MAX)
+
+
+def test_slow_call_is_hedged_and_first_answer_wins():
+    policy = warmed_up(budget_requests=100)
+    assert hedged_call(ENDPOINT, slow('primary'), hedge_fn=lambda: 'hedge') == 'hedge'
+    assert (policy.hedged, policy.hedge_wins) == (1, 1)
+
+
+def test_fast_call_is_not_hedged():
+    policy = warmed_up(budget_requests=100)
+    hedge = threading.Event()
+    assert hedged_call(ENDPOINT, lambda: 'primary', hedge_fn=hedge.set) == 'primary'
+    assert policy.hedged == 0
+    assert not hedge.is_set()
+
+
+@pytest.mark.parametrize('budget_requests, can_hedge', [(0, True), (100, False)])
+def test_no_hedge_over_budget_or_without_capacity(budget_requests, can_hedge):
+    policy = warmed_up(budget_requests=budget_requests)
+    assert hedged_call(ENDPOINT, slow('primary', 0.2), hedge_fn=lambda: 'hedge',
+                       can_hedge=lambda: can_hedge) == 'primary'
+    assert policy.hedged == 0
+
+
+def test_error_raised_only_when_both_calls_fail():
+    warmed_up(budget_requests=100)
+    assert hedged_call(ENDPOINT, failing('primary failed', 0.2), hedge_fn=slow('hedge', 0.3)) == 'hedge'
+    with pytest.raises(ConnectionError, match='primary failed'):
+        hedged_call(ENDPOINT, failing('primary failed', 0.2), hedge_fn=failing('hedge failed'))
@@ -0,0 +1,68 @@
+from agents.booking_client import BookingComAPI
+from agents.credentials import CredentialPool
+from agents.records import hotel_details_summary
+
+HOST = 'booking.test'
+
+
+def details(url='https://www.booking.com/hotel/it/roma.html', rooms=None):
+    return {'status': True, 'data': {
+        'url': url,
+        'hotel_name': 'Roma',
+        'facilities_block': {'facilities': [{'name': 'Free WiFi'}] * 50},
+        'rooms': rooms if rooms is not None else {
+            '101': {'photos': [{'url_original': 'https://photo/101-small'},
+                               {'url_max1280': 'https://photo/101'}]},
+            '102': {'photos': [{'url_max1280': 'https://photo/102'}]}
+        }
+    }}
+
+
+def client(**kwargs):
+    return BookingComAPI(HOST, CredentialPool('TEST_BOOKING_KEYS', ['k']), **kwargs)
+
+
+def test_summary_has_url_and_first_room_photo():
+    assert hotel_details_summary(details()) == {'url': 'https://www.booking.com/hotel/it/roma.html',
+                                                'room_photo_url': 'https://photo/101'}
+
+
+def test_summary_without_rooms_or_photos():
+    assert hotel_details_summary(details(rooms={}))['room_photo_url'] is None
+    assert hotel_details_summary(details(rooms={'101': None}))['room_photo_url'] is None
+    assert hotel_details_summary(details(rooms={'101': {'photos': [{}]}}))['room_photo_url'] is None
+
+
+def test_summary_without_data():
+    assert hotel_details_summary(None) is None
+    assert hotel_details_summary({'status': False, 'data': None}) is None
+
+
+def test_summary_is_fetched_once_per_hotel_whatever_the_dates(upstream):
+    upstream.respond(200, details())
+    first = client(ARRIVAL_DATE='2026-05-01', DEPARTURE_DATE='2026-05-04').get_hotel_summary(42)
+    again = client(ARRIVAL_DATE='2026-09-10', DEPARTURE_DATE='2026-09-12').get_hotel_summary(42)
+
+    assert first == again == {'url': 'https://www.booking.com/hotel/it/roma.html',
+                              'room_photo_url': 'https://photo/101'}
+    assert len(upstream.requests) == 1
+    assert 'hotel_id=42' in upstream.requests[0][2]
+
+
+def test_missing_details_are_not_cached(upstream):
+    upstream.respond(200, {'status': False, 'data': None})
+    upstream.respond(200, details())
+    api = client()
+    assert api.get_hotel_summary(7) is None
+    assert api.get_hotel_summary(7)['room_photo_url'] == 'https://photo/101'
+    assert len(upstream.requests) == 2
+
+
+def test_each_hotel_has_its_own_summary(upstream):
+    upstream.respond(200, details(url='https://www.booking.com/hotel/a.html'))
+    upstream.respond(200, details(url='https://www.booking.com/hotel/b.html'))
+    api = client()
+    assert api.get_hotel_summary(1)['url'].endswith('/a.html')
+    assert api.get_hotel_summary(2)['url'].endswith('/b.html')
+    assert api.get_hotel_summary(1)['url'].endswith('/a.html')
+    assert len(upstream.requests) == 2
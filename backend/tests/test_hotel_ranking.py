@@ -0,0 +1,90 @@
+import copy
+
+import pytest
+
+from agents.hotel_ranking import HotelRanker, VECTORIZE_MIN_BATCH, np
+
+
+def raw_hotel(hotel_id, price, rating=8.0, reviews=100, label='Free WiFi', photos=('https://photo',)):
+    return {
+        'hotel_id': hotel_id,
+        'property': {
+            'name': f"Hotel {hotel_id}",
+            'photoUrls': list(photos) if photos is not None else None,
+            'reviewScore': rating,
+            'reviewCount': reviews,
+            'accessibilityLabel': label,
+            'priceBreakdown': {'grossPrice': {'value': price, 'currency': 'EUR'}}
+        }
+    }
+
+
+def ranked_ids(ranker, budget=None):
+    return [entry['hotel'].hotel_id for entry in ranker.ranked(budget)]
+
+
+def ranked_scores(ranker, budget=None):
+    return [(entry['hotel'].hotel_id, entry['value_score']) for entry in ranker.ranked(budget)]
+
+
+def page(size):
+    return [raw_hotel(i, price=40 + (i * 37) % 120, rating=5 + (i * 13) % 50 / 10, reviews=(i * 7) % 300)
+            for i in range(size)]
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+def test_vectorized_page_skips_hotel_that_fails_as_record():
+    hotels = page(VECTORIZE_MIN_BATCH + 44)
+    # Passes the numeric columns but makes HotelCandidate.from_raw raise
+    hotels[0] = raw_hotel(0, price=41, rating=9.9, reviews=300, photos=None)
+
+    vectorized = HotelRanker(price_max=100, vectorize=True)
+    vectorized.add(copy.deepcopy(hotels))
+    scalar = HotelRanker(price_max=100, vectorize=False)
+    scalar.add(copy.deepcopy(hotels))
+
+    assert 0 not in ranked_ids(vectorized)
+    assert len(vectorized.ranked()) == 3
+    assert ranked_scores(vectorized) == ranked_scores(scalar)
+    assert vectorized._in_budget == scalar._in_budget
+
+
+def test_each_tier_keeps_its_own_top_k():
+    ranker = HotelRanker(price_max=100, top_n=2, relax_factors=(1.2,), vectorize=False)
+    ranker.add([raw_hotel(1, 90), raw_hotel(2, 110, rating=9.5), raw_hotel(3, 60), raw_hotel(4, 130)])
+
+    assert ranker.budgets == [100, 120]
+    assert set(ranked_ids(ranker)) == {1, 3}
+    assert 2 in ranked_ids(ranker, 120)
+    assert 4 not in ranked_ids(ranker, 120)
+    assert ranker._in_budget == {100: 2, 120: 3}
+
+
+def test_best_tier_falls_back_to_relaxed_budget():
+    ranker = HotelRanker(price_max=100, relax_factors=(1.2,), vectorize=False)
+    ranker.add([raw_hotel(1, 110)])
+    budget, ranked = ranker.best_tier()
+    assert budget == 120
+    assert [entry['hotel'].hotel_id for entry in ranked] == [1]
+
+
+def test_earlier_hotel_wins_ties():
+    ranker = HotelRanker(price_max=100, top_n=2, vectorize=False)
+    ranker.add([raw_hotel(i, 80) for i in range(5)])
+    assert ranked_ids(ranker) == [0, 1]
+
+
+@pytest.mark.skipif(np is None, reason="numpy not installed")
+def test_vectorized_matches_scalar_across_pages_and_tiers():
+    pages = [page(VECTORIZE_MIN_BATCH + 10), page(20), page(VECTORIZE_MIN_BATCH)]
+    rankers = [HotelRanker(price_max=100, top_n=5, relax_factors=(1.2, 1.5), vectorize=vectorize)
+               for vectorize in (True, False)]
+    for ranker in rankers:
+        for hotels in pages:
+            ranker.add(copy.deepcopy(hotels))
+
+    vectorized, scalar = rankers
+    for budget in scalar.budgets:
+        assert ranked_scores(vectorized, budget) == ranked_scores(scalar, budget)
+    assert vectorized._in_budget == scalar._in_budget
+    assert vectorized.hotels_seen == scalar.hotels_seen
@@ -0,0 +1,73 @@
+import io
+import json
+
+import pytest
+
+from agents import json_projection
+from agents.json_projection import STREAM_MIN_BYTES, compile_fields, expand_fields, ijson, project, read_json
+
+DOCUMENT = {
+    'status': True,
+    'data': {
+        'hotels': [
+            {'hotel_id': i, 'property': {'name': f"Hotel {i}", 'reviewScore': 8.5,
+                                         'priceBreakdown': {'grossPrice': {'value': 100.5 + i}},
+                                         'description': 'x' * 200}}
+            for i in range(400)
+        ],
+        'meta': {'total': 400}
+    }
+}
+FIELDS = ['data.hotels[*].{hotel_id,property.{name,priceBreakdown.grossPrice}}']
+EXPECTED = {'data': {'hotels': [
+    {'hotel_id': i, 'property': {'name': f"Hotel {i}", 'priceBreakdown': {'grossPrice': {'value': 100.5 + i}}}}
+    for i in range(400)
+]}}
+
+
+class Body(io.BytesIO):
+    """A response body, with a Content-Length (length) or without one (chunked or compressed)."""
+
+    def __init__(self, document, known_length=True):
+        payload = json.dumps(document).encode('utf-8')
+        super().__init__(payload)
+        self.length = len(payload) if known_length else None
+
+
+@pytest.fixture
+def streamed(monkeypatch):
+    """Counts the bodies that went through ijson."""
+    calls = []
+    parse_projected = json_projection.parse_projected
+    monkeypatch.setattr(json_projection, 'parse_projected',
+                        lambda stream, fields: calls.append(fields) or parse_projected(stream, fields))
+    return calls
+
+
+def test_expand_fields():
+    assert set(expand_fields('a[*].{b,c.{d,e}}')) == {'a[*].b', 'a[*].c.d', 'a[*].c.e'}
+
+
+def test_project_keeps_only_the_fields():
+    assert project(DOCUMENT, compile_fields(FIELDS)) == EXPECTED
+
+
+def test_read_json_without_fields_returns_everything():
+    assert read_json(Body(DOCUMENT)) == DOCUMENT
+
+
+@pytest.mark.skipif(ijson is None, reason="ijson not installed")
+@pytest.mark.parametrize('known_length', [True, False])
+def test_large_body_is_streamed(streamed, known_length):
+    body = Body(DOCUMENT, known_length)
+    assert len(body.getvalue()) > STREAM_MIN_BYTES
+    assert read_json(body, FIELDS) == EXPECTED
+    assert len(streamed) == 1
+
+
+@pytest.mark.skipif(ijson is None, reason="ijson not installed")
+@pytest.mark.parametrize('known_length', [True, False])
+def test_small_body_is_parsed_whole(streamed, known_length):
+    small = {'data': {'hotels': DOCUMENT['data']['hotels'][:2]}}
+    assert read_json(Body(small, known_length), FIELDS) == {'data': {'hotels': EXPECTED['data']['hotels'][:2]}}
+    assert streamed == []
@@ -0,0 +1,34 @@
+from database import db, TravelSuggestion
+from query_stats import count_queries
+
+
+def test_travel_chat_within_budget(app, client, conversation_id, fake_model):
+    with count_queries() as stats:
+        response = client.post('/api/travel-chat', json={
+            'conversationId': conversation_id,
+            'messages': [{'role': 'user', 'content': 'A hotel near the Colosseum please'}]
+        })
+    assert response.status_code == 200
+    assert stats.count <= app.config['QUERY_BUDGETS']['chat.travel_chat']
+
+
+def test_get_suggestions_within_budget(app, client, conversation_id):
+    with count_queries() as stats:
+        response = client.get(f'/api/suggestions/{conversation_id}')
+    assert response.status_code == 200
+    assert len(response.get_json()['suggestions']) == 4
+    assert stats.count <= app.config['QUERY_BUDGETS']['chat.get_suggestions']
+
+
+def test_select_suggestion_within_budget(app, client, conversation_id):
+    with app.app_context():
+        hotel_id = TravelSuggestion.query.filter_by(conversation_id=conversation_id, type='hotel').first().id
+
+    with count_queries() as stats:
+        response = client.post(f'/api/select_suggestion/{conversation_id}', json={'suggestion_id': hotel_id})
+    assert response.status_code == 200
+    assert stats.count <= app.config['QUERY_BUDGETS']['selection_api.select_suggestion_route']
+
+    with app.app_context():
+        assert [s.id for s in TravelSuggestion.query.filter_by(conversation_id=conversation_id,
+                                                               type='hotel')] == [hotel_id]
@@ -0,0 +1,85 @@
+import pytest
+
+from agents import rate_limit
+from agents.rate_limit import MemoryTokenBuckets, RateLimitTimeout, SqliteTokenBuckets, bucket_key
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def buckets(request, tmp_path):
+    return MemoryTokenBuckets() if request.param == 'memory' else SqliteTokenBuckets(str(tmp_path / 'buckets.db'))
+
+
+def test_burst_then_one_token_per_interval(clock, buckets):
+    # 2 per second, burst of 3
+    assert [buckets.reserve('k', 2, 3, 10) for _ in range(3)] == [0, 0, 0]
+    assert buckets.reserve('k', 2, 3, 10) == pytest.approx(0.5)
+    # Tokens can go negative: the next caller queues behind the last
+    assert buckets.reserve('k', 2, 3, 10) == pytest.approx(1.0)
+
+
+def test_tokens_refill_up_to_burst(clock, buckets):
+    for _ in range(3):
+        buckets.reserve('k', 2, 3, 10)
+    clock.now += 1.0
+    assert [buckets.reserve('k', 2, 3, 10) for _ in range(2)] == [0, 0]
+    assert buckets.reserve('k', 2, 3, 10) == pytest.approx(0.5)
+
+    clock.now += 3600
+    assert [buckets.reserve('k', 2, 3, 10) for _ in range(3)] == [0, 0, 0]
+    assert buckets.reserve('k', 2, 3, 10) > 0
+
+
+def test_wait_over_max_wait_takes_no_token(clock, buckets):
+    buckets.reserve('k', 1, 1, 10)
+    assert buckets.reserve('k', 1, 1, 0.5) is None
+    assert buckets.reserve('k', 1, 1, 10) == pytest.approx(1.0)
+
+
+def test_drain_pauses_the_bucket(clock, buckets):
+    buckets.drain('k', 2, 3.0)
+    assert buckets.reserve('k', 2, 3, 10) == pytest.approx(3.5)
+
+
+def test_buckets_are_per_key(clock, buckets):
+    buckets.reserve('a', 1, 1, 10)
+    assert buckets.reserve('b', 1, 1, 10) == 0
+
+
+def test_sqlite_buckets_are_shared_through_the_file(clock, tmp_path):
+    path = str(tmp_path / 'buckets.db')
+    first, second = SqliteTokenBuckets(path), SqliteTokenBuckets(path)
+    first.reserve('k', 1, 1, 10)
+    assert second.reserve('k', 1, 1, 10) == pytest.approx(1.0)
+
+
+def test_acquire_raises_when_no_token_in_time(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit, '_buckets', MemoryTokenBuckets())
+    monkeypatch.setitem(rate_limit.RATE_LIMITS, 'api.test', (1, 1))
+    rate_limit.acquire('api.test', 'secret-key')
+    with pytest.raises(RateLimitTimeout):
+        rate_limit.acquire('api.test', 'secret-key', timeout=0.5)
+    stats = rate_limit.rate_limit_stats()[bucket_key('api.test', 'secret-key')]
+    assert stats['acquired'] == 1
+    assert stats['timeouts'] == 1
+
+
+def test_bucket_key_does_not_contain_the_api_key():
+    key = bucket_key('api.test', 'secret-key')
+    assert key.startswith('api.test:')
+    assert 'secret-key' not in key
+    assert bucket_key('api.test') == 'api.test'
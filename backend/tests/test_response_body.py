@@ -0,0 +1,70 @@
+import gzip
+import io
+import json
+import zlib
+
+import pytest
+
+from agents.http_client import READ_CHUNK_BYTES, ResponseBody, brotli
+from agents.json_projection import read_json
+
+DOCUMENT = {'data': [{'id': i, 'name': f"Item {i}"} for i in range(2000)]}
+PAYLOAD = json.dumps(DOCUMENT).encode('utf-8')
+
+
+class Response(io.BytesIO):
+    """What http.client hands over: the body as sent, with no length when it is compressed."""
+    length = None
+
+
+def raw_deflate(data):
+    compressor = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush()
+
+
+ENCODINGS = [
+    pytest.param('gzip', gzip.compress, id='gzip'),
+    pytest.param('x-gzip', gzip.compress, id='x-gzip'),
+    pytest.param('deflate', zlib.compress, id='deflate'),
+    # Without the zlib header, as some servers send it
+    pytest.param('deflate', raw_deflate, id='raw-deflate'),
+    pytest.param('br', brotli and brotli.compress, id='br',
+                 marks=pytest.mark.skipif(brotli is None, reason="brotli not installed")),
+]
+
+
+@pytest.mark.parametrize('encoding, compress', ENCODINGS)
+def test_decodes_while_reading(encoding, compress):
+    wire = compress(PAYLOAD)
+    body = ResponseBody(Response(wire), encoding)
+    chunks = iter(lambda: body.read(READ_CHUNK_BYTES // 4), b'')
+    assert b''.join(chunks) == PAYLOAD
+    assert body.length is None
+    assert body.wire_bytes == len(wire)
+    assert body.decoded_bytes == len(PAYLOAD)
+
+
+@pytest.mark.parametrize('encoding, compress', ENCODINGS[:3])
+def test_compressed_body_parses_with_projection(encoding, compress):
+    body = ResponseBody(Response(compress(PAYLOAD)), encoding)
+    assert read_json(body, 'data[*].id') == {'data': [{'id': item['id']} for item in DOCUMENT['data']]}
+
+
+def test_identity_body_passes_through():
+    response = Response(PAYLOAD)
+    response.length = len(PAYLOAD)
+    body = ResponseBody(response, None)
+    assert body.length == len(PAYLOAD)
+    assert body.read() == PAYLOAD
+    assert body.wire_bytes == body.decoded_bytes == len(PAYLOAD)
+
+
+def test_unsupported_encoding_is_refused():
+    with pytest.raises(ValueError):
+        ResponseBody(Response(PAYLOAD), 'compress')
+
+
+def test_corrupt_gzip_raises():
+    body = ResponseBody(Response(b'not gzip at all'), 'gzip')
+    with pytest.raises(zlib.error):
+        body.read()
@@ -0,0 +1,144 @@
+import threading
+import time
+
+import pytest
+
+from agents import response_cache as cache_module
+from agents.response_cache import (EXPIRED_KEEP_SECONDS, CachePolicy, LRUTier, SqliteTier, TieredCache,
+                                   cache_policy)
+
+POLICY = CachePolicy(ttl=60, stale=60)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TieredCache([LRUTier(), SqliteTier(str(tmp_path / 'cache.db'))])
+
+
+class Loader:
+    """A load() for TieredCache.fetch, returning each queued response in turn."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+        self.done = threading.Event()
+
+    def __call__(self):
+        self.calls += 1
+        response = self.responses.pop(0)
+        self.done.set()
+        return response
+
+
+def test_miss_loads_and_stores(clock, cache):
+    load = Loader((200, {'v': 1}))
+    assert cache.fetch('k', POLICY, load) == (200, {'v': 1})
+    assert cache.fetch('k', POLICY, load) == (200, {'v': 1})
+    assert load.calls == 1
+    assert (cache.stats['misses'], cache.stats['fresh_hits']) == (1, 1)
+
+
+def test_error_responses_are_not_stored(clock, cache):
+    load = Loader((500, None), (200, {'v': 1}))
+    assert cache.fetch('k', POLICY, load) == (500, None)
+    assert cache.fetch('k', POLICY, load) == (200, {'v': 1})
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock, cache):
+    cache.fetch('k', POLICY, Loader((200, {'v': 1})))
+    clock.now += POLICY.ttl + 1
+    refresh = Loader((200, {'v': 2}))
+    assert cache.fetch('k', POLICY, refresh) == (200, {'v': 1})
+    assert refresh.done.wait(5)
+    for _ in range(100):
+        if cache.stats['refreshes']:
+            break
+        time.sleep(0.01)
+    assert cache.fetch('k', POLICY, Loader()) == (200, {'v': 2})
+    assert cache.stats['stale_hits'] == 1
+
+
+def test_failed_refresh_keeps_the_stale_entry(clock, cache):
+    cache.fetch('k', POLICY, Loader((200, {'v': 1})))
+    clock.now += POLICY.ttl + 1
+
+    def failing():
+        raise ConnectionError('upstream down')
+
+    assert cache.fetch('k', POLICY, failing) == (200, {'v': 1})
+    for _ in range(100):
+        if cache.stats['refresh_errors']:
+            break
+        time.sleep(0.01)
+    assert cache.stats['refresh_errors'] == 1
+    assert cache.get('k', POLICY)[1] == {'v': 1}
+
+
+def test_entry_past_its_lifetime_is_loaded_again(clock, cache):
+    cache.fetch('k', POLICY, Loader((200, {'v': 1})))
+    clock.now += POLICY.lifetime + 1
+    load = Loader((200, {'v': 2}))
+    assert cache.fetch('k', POLICY, load) == (200, {'v': 2})
+    assert load.calls == 1
+
+
+def test_expired_entry_is_kept_for_fallbacks(clock, cache):
+    cache.set('k', {'v': 1}, POLICY)
+    clock.now += POLICY.lifetime + 1
+    assert cache.get('k', POLICY) is None
+    assert cache.get('k', POLICY, allow_expired=True) == (POLICY.lifetime + 1, {'v': 1})
+    clock.now += EXPIRED_KEEP_SECONDS
+    assert cache.get('k', POLICY, allow_expired=True) is None
+
+
+def test_values_are_copies(clock, cache):
+    cache.set('k', {'hotels': [1]}, POLICY)
+    cache.get('k', POLICY)[1]['hotels'].append(2)
+    assert cache.get('k', POLICY)[1] == {'hotels': [1]}
+
+
+def test_shared_tier_hit_is_copied_to_memory(clock, tmp_path):
+    path = str(tmp_path / 'cache.db')
+    TieredCache([LRUTier(), SqliteTier(path)]).set('k', {'v': 1}, POLICY)
+    other_worker = TieredCache([LRUTier(), SqliteTier(path)])
+    assert other_worker.get('k', POLICY)[1] == {'v': 1}
+    assert other_worker.get('k', POLICY)[1] == {'v': 1}
+    stats = other_worker.stats_by_tier()
+    assert stats['memory']['hits'] == 1
+    assert stats['sqlite']['hits'] == 1
+
+
+def test_unreadable_shared_entry_is_a_miss(clock, tmp_path):
+    tier = SqliteTier(str(tmp_path / 'cache.db'))
+    tier.set('k', clock.now, clock.now + 60, b'\x80\x04not json')
+    assert TieredCache([LRUTier(), tier]).get('k', POLICY) is None
+
+
+def test_lru_tier_evicts_least_recently_used(clock):
+    tier = LRUTier(max_entries=2)
+    for key in 'abc':
+        tier.set(key, clock.now, clock.now + 60, b'1')
+    assert tier.get('a') is None
+    assert tier.size() == 2
+    assert tier.stats['evictions'] == 1
+
+
+def test_cache_policy_is_looked_up_by_path():
+    policies = {'/api/search': POLICY}
+    assert cache_policy(policies, '/api/search?city=Rome&page=2') is POLICY
+    assert cache_policy(policies, '/api/details?id=1') is None
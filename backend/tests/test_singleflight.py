@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+import pytest
+
+from agents import deadline
+from agents.singleflight import SingleFlight, fcntl
+
+WAITERS = 4
+
+
+def run_concurrently(flight, key, fn, waiters=WAITERS):
+    """Calls flight.do(key, fn) from a leader and `waiters` threads that join it; returns each outcome."""
+    release = threading.Event()
+    outcomes = []
+
+    def leader_fn():
+        release.wait(5)
+        return fn()
+
+    def call(target):
+        try:
+            outcomes.append(('ok', flight.do(key, target)))
+        except Exception as e:
+            outcomes.append(('error', e))
+
+    threads = [threading.Thread(target=call, args=(leader_fn,))]
+    threads[0].start()
+    while key not in flight._calls:
+        time.sleep(0.001)
+    threads += [threading.Thread(target=call, args=(fn,)) for _ in range(waiters)]
+    for thread in threads[1:]:
+        thread.start()
+    while flight._calls[key].waiters < waiters:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        return {'hotels': [1, 2]}
+
+    outcomes = run_concurrently(flight, 'k', fn)
+    assert len(calls) == 1
+    assert [kind for kind, _ in outcomes] == ['ok'] * (WAITERS + 1)
+    results = [result for _, result in outcomes]
+    assert all(result == {'hotels': [1, 2]} for result in results)
+    # Every caller gets its own copy
+    results[0]['hotels'].append(3)
+    assert results[1]['hotels'] == [1, 2]
+    assert flight.stats['calls'] == 1
+    assert flight.stats['shared_in_process'] == WAITERS
+    assert flight._calls == {}
+
+
+def test_failure_is_shared_with_waiters():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        raise ConnectionError('upstream down')
+
+    outcomes = run_concurrently(flight, 'k', fn)
+    assert len(calls) == 1
+    assert all(kind == 'error' and isinstance(e, ConnectionError) for kind, e in outcomes)
+
+
+def test_leader_deadline_is_not_shared():
+    flight = SingleFlight()
+    calls = []
+
+    def fn():
+        calls.append(1)
+        if len(calls) == 1:
+            raise deadline.DeadlineExceeded('leader out of time')
+        time.sleep(0.2)  # long enough for the other waiters to join
+        return 'ok'
+
+    outcomes = run_concurrently(flight, 'k', fn)
+    # The leader fails, the waiters start over and share the second call
+    assert len(calls) == 2
+    assert sorted(kind for kind, _ in outcomes) == ['error'] + ['ok'] * WAITERS
+
+
+def test_later_calls_are_not_coalesced():
+    flight = SingleFlight()
+    assert [flight.do('k', lambda: i) for i in range(3)] == [0, 1, 2]
+    assert flight.stats['calls'] == 3
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_result_is_shared_across_processes(tmp_path):
+    shared_dir = str(tmp_path / 'coalesce')
+    first, second = SingleFlight(shared_dir), SingleFlight(shared_dir)
+    assert first.do('k', lambda: {'a': 1}) == {'a': 1}
+    assert second.do('k', lambda: pytest.fail('called again')) == {'a': 1}
+    assert second.stats['shared_across_processes'] == 1
+    assert oct(os.stat(shared_dir).st_mode & 0o777) == oct(0o700)
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_unshareable_result_is_not_written(tmp_path):
+    shared_dir = str(tmp_path)
+    os.chmod(shared_dir, 0o700)
+    first, second = SingleFlight(shared_dir), SingleFlight(shared_dir)
+    first.do('k', lambda: (429, None), shareable=lambda response: response[0] == 200)
+    assert second.do('k', lambda: (200, 'fresh')) == (200, 'fresh')
+
+
+@pytest.mark.skipif(fcntl is None, reason="needs fcntl")
+def test_directory_writable_by_others_is_refused(tmp_path):
+    os.chmod(tmp_path, 0o777)
+    assert SingleFlight(str(tmp_path)).shared_dir is None
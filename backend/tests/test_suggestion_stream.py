@@ -0,0 +1,40 @@
+from sqlalchemy.orm import Session
+from database import db, TravelSuggestion
+import routes.chat_routes as chat_routes
+
+
+def _events(response):
+    """Yields the SSE frames of a streamed response, skipping keep-alives."""
+    buffer = ''
+    for chunk in response.response:
+        buffer += chunk.decode() if isinstance(chunk, bytes) else chunk
+        while '\n\n' in buffer:
+            frame, buffer = buffer.split('\n\n', 1)
+            if not frame.startswith(':'):
+                yield frame
+
+
+def test_stream_sees_commits_from_another_process(app, client, conversation_id, monkeypatch):
+    monkeypatch.setattr(chat_routes, 'SUGGESTION_STREAM_POLL_SECONDS', 0.05)
+    response = client.get(f'/api/suggestions/{conversation_id}/stream', buffered=False)
+    events = _events(response)
+    assert next(events).count('"title"') == 4
+
+    # A session of its own commits without notifying this process's broker,
+    # like a commit made by another worker
+    with app.app_context(), Session(db.engine) as other_worker:
+        other_worker.add(TravelSuggestion(conversation_id=conversation_id, type='hotel', title='Hotel 2'))
+        other_worker.commit()
+    assert next(events).count('"title"') == 5
+    response.close()
+
+
+def test_streams_are_capped_per_process(app, client, conversation_id):
+    app.config['SUGGESTION_STREAM_MAX_OPEN'] = 1
+    first = client.get(f'/api/suggestions/{conversation_id}/stream', buffered=False)
+    assert first.status_code == 200
+    assert client.get(f'/api/suggestions/{conversation_id}/stream', buffered=False).status_code == 503
+    first.close()
+    second = client.get(f'/api/suggestions/{conversation_id}/stream', buffered=False)
+    assert second.status_code == 200
+    second.close()
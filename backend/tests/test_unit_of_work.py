@@ -0,0 +1,33 @@
+from database import TravelSuggestion
+from query_stats import count_queries
+
+
+def _selects_from(stats, table):
+    return sum(times for statement, times in stats.statements.items()
+               if statement.startswith('SELECT') and f"FROM {table}" in statement)
+
+
+def test_travel_chat_turn_loads_conversation_and_suggestions_once(client, conversation_id, fake_model):
+    with count_queries() as stats:
+        response = client.post('/api/travel-chat', json={
+            'conversationId': conversation_id,
+            'messages': [{'role': 'user', 'content': 'What about hotels?'}]
+        })
+    assert response.status_code == 200
+    # The route, ChatService and ItineraryManager share one load of each
+    assert _selects_from(stats, 'conversations') == 1
+    assert _selects_from(stats, 'travel_suggestions') == 1
+    # Conversation, suggestions, chat history, and the user and assistant messages
+    assert stats.count == 5
+
+
+def test_selection_runs_four_statements(app, client, conversation_id):
+    with app.app_context():
+        flight_id = TravelSuggestion.query.filter_by(conversation_id=conversation_id, type='flight').first().id
+
+    with count_queries() as stats:
+        response = client.post(f'/api/select_suggestion/{conversation_id}', json={'suggestion_id': flight_id})
+    assert response.status_code == 200
+    # Conversation, suggestions, the delete, and the suggestions again for the reloaded itinerary
+    assert _selects_from(stats, 'conversations') == 1
+    assert stats.count == 4
@@ -0,0 +1,67 @@
+from typing import Dict, List, Optional
+from flask import g, has_app_context
+from database import db, Conversation, TravelSuggestion
+
+
+def _store() -> Optional[Dict]:
+    """
+    Returns the per-request memo, or None outside an app context.
+    Flask pushes a fresh app context for every request, so anything kept
+    on `g` is shared by routes, services and managers of that request only.
+    """
+    if not has_app_context():
+        return None
+    if 'unit_of_work' not in g:
+        g.unit_of_work = {
+            'conversations': {},
+            'managers': {},
+            'suggestions': {}
+        }
+    return g.unit_of_work
+
+
+def get_conversation(conversation_id: str) -> Optional[Conversation]:
+    """Loads a conversation once per request."""
+    store = _store()
+    if store is None:
+        return db.session.get(Conversation, conversation_id)
+
+    if conversation_id not in store['conversations']:
+        store['conversations'][conversation_id] = db.session.get(Conversation, conversation_id)
+    return store['conversations'][conversation_id]
+
+
+def get_suggestions(conversation_id: str) -> List[TravelSuggestion]:
+    """Loads the suggestions of a conversation (oldest first) once per request."""
+    store = _store()
+    if store is not None and conversation_id in store['suggestions']:
+        return store['suggestions'][conversation_id]
+
+    suggestions = TravelSuggestion.query.filter_by(
+        conversation_id=conversation_id
+    ).order_by(TravelSuggestion.created_at).all()
+
+    if store is not None:
+        store['suggestions'][conversation_id] = suggestions
+    return suggestions
+
+
+def invalidate_suggestions(conversation_id: str):
+    """Drops the memoized suggestion list after rows were added or deleted."""
+    store = _store()
+    if store is not None:
+        store['suggestions'].pop(conversation_id, None)
+
+
+def get_itinerary_manager(conversation: Conversation):
+    """Builds the ItineraryManager for a conversation once per request."""
+    # Imported here because the manager itself depends on this module
+    from agents.iternerary_manager import ItineraryManager
+
+    store = _store()
+    if store is None:
+        return ItineraryManager(conversation)
+
+    if conversation.id not in store['managers']:
+        store['managers'][conversation.id] = ItineraryManager(conversation)
+    return store['managers'][conversation.id]
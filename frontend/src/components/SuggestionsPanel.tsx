@@ -72,12 +72,32 @@ const SuggestionsPanel = ({
             setLoading(false);
             return;
         }
-        loadSuggestions();
-        const interval = setInterval(() => {
-            loadSuggestions();
-        }, 5000);
+        // Subscribe to server-pushed changes (the stream sends the current
+        // list first); fall back to interval polling if the browser or a
+        // proxy can't keep the stream open.
+        let interval: ReturnType<typeof setInterval> | null = null;
+        const stream = new EventSource(
+            `http://localhost:5001/api/suggestions/${conversationId}/stream`,
+            { withCredentials: true }
+        );
+        stream.addEventListener("suggestions", (event) => {
+            const data = JSON.parse((event as MessageEvent).data);
+            applySuggestions(data.suggestions);
+            setLoading(false);
+        });
+        stream.onerror = () => {
+            if (stream.readyState === EventSource.CLOSED && !interval) {
+                loadSuggestions();
+                interval = setInterval(() => {
+                    loadSuggestions();
+                }, 5000);
+            }
+        };
         return () => {
-            clearInterval(interval);
+            stream.close();
+            if (interval) {
+                clearInterval(interval);
+            }
         };
     }, [conversationId, refreshKey]);
 
@@ -98,44 +118,7 @@ const SuggestionsPanel = ({
             }
 
             const data = await response.json();
-            const loadedSuggestions = (data.suggestions as any[]).map(s => ({
-                ...s,
-                id: s.id.toString(),
-            })) as Suggestion[];
-
-            const grouped: GroupedSuggestions = {
-                flights: [],
-                hotels: [],
-                attractions: [],
-                restaurants: [],
-                museums: [],
-                shops: [],
-                leisure: [],
-            };
-
-            loadedSuggestions.forEach((suggestion) => {
-                if (suggestion.type === "flight") {
-                    grouped.flights.push(suggestion);
-                } else if (suggestion.type === "hotel") {
-                    grouped.hotels.push(suggestion);
-                } else if (suggestion.type === "restaurant") {
-                    grouped.restaurants.push(suggestion);
-                } else if (suggestion.type === "museum") {
-                    grouped.museums.push(suggestion);
-                } else if (suggestion.type === "shop") {
-                    grouped.shops.push(suggestion);
-                } else if (suggestion.type === "leisure") {
-                    grouped.leisure.push(suggestion);
-                } else {
-                    grouped.attractions.push(suggestion);
-                }
-            });
-
-            if (grouped.hotels.length > 0 && !destination) {
-                setDestination(grouped.hotels[0].location?.address || "");
-            }
-
-            setSuggestions(grouped);
+            applySuggestions(data.suggestions);
         } catch (error) {
             console.error("Failed to load suggestions:", error);
         } finally {
@@ -143,6 +126,47 @@ const SuggestionsPanel = ({
         }
     };
 
+    const applySuggestions = (rawSuggestions: any[]) => {
+        const loadedSuggestions = rawSuggestions.map(s => ({
+            ...s,
+            id: s.id.toString(),
+        })) as Suggestion[];
+
+        const grouped: GroupedSuggestions = {
+            flights: [],
+            hotels: [],
+            attractions: [],
+            restaurants: [],
+            museums: [],
+            shops: [],
+            leisure: [],
+        };
+
+        loadedSuggestions.forEach((suggestion) => {
+            if (suggestion.type === "flight") {
+                grouped.flights.push(suggestion);
+            } else if (suggestion.type === "hotel") {
+                grouped.hotels.push(suggestion);
+            } else if (suggestion.type === "restaurant") {
+                grouped.restaurants.push(suggestion);
+            } else if (suggestion.type === "museum") {
+                grouped.museums.push(suggestion);
+            } else if (suggestion.type === "shop") {
+                grouped.shops.push(suggestion);
+            } else if (suggestion.type === "leisure") {
+                grouped.leisure.push(suggestion);
+            } else {
+                grouped.attractions.push(suggestion);
+            }
+        });
+
+        if (grouped.hotels.length > 0 && !destination) {
+            setDestination(grouped.hotels[0].location?.address || "");
+        }
+
+        setSuggestions(grouped);
+    };
+
     const renderStars = (rating: number) => {
         const starCount = Math.round(rating);
         const stars = [];